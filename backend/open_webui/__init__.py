@@ -99,5 +99,16 @@ def dev(
     )
 
 
+@app.command()
+def reindex_chats():
+    """
+    Rebuild the full-text search index of the chat messages.
+    """
+    from open_webui.models.chats import Chats
+
+    count = Chats.rebuild_search_index()
+    typer.echo(f"Indexed {count} chat messages")
+
+
 if __name__ == "__main__":
     app()
@@ -2,11 +2,13 @@ import json
 import logging
 import os
 import shutil
+import time
 import base64
 import redis
 
 from datetime import datetime
 from pathlib import Path
+from types import MappingProxyType
 from typing import Generic, Optional, TypeVar
 from urllib.parse import urlparse
 
@@ -19,6 +21,7 @@ from open_webui.env import (
     DATABASE_URL,
     ENV,
     REDIS_URL,
+    REDIS_CONFIG_SYNC_INTERVAL,
     REDIS_SENTINEL_HOSTS,
     REDIS_SENTINEL_PORT,
     FRONTEND_BUILD_DIR,
@@ -208,14 +211,54 @@ class PersistentConfig(Generic[T]):
         self.config_value = self.value
 
 
+class ConfigSnapshot:
+    """
+    Immutable view of the `AppConfig` values at one point in time.
+
+    Taken once per request with `get_config_snapshot`, so a request sees the same
+    settings from start to end and reads are plain dictionary lookups. The values
+    themselves are shared with `AppConfig` and must not be modified in place.
+    """
+
+    __slots__ = ("_values", "version")
+
+    def __init__(self, values: dict, version: int):
+        object.__setattr__(self, "_values", MappingProxyType(values))
+        object.__setattr__(self, "version", version)
+
+    def __getattr__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            raise AttributeError(f"Config key '{key}' not found")
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Config snapshots are read-only")
+
+
 class AppConfig:
     _state: dict[str, PersistentConfig]
     _redis: Optional[redis.Redis] = None
+    # Bumped on every change of a value, `snapshot` is reused while it is unchanged
+    _version: int = 0
+    _snapshot: Optional[ConfigSnapshot] = None
+    # Value of the version key when the values were last read from Redis, the key
+    # is never empty so the first read always loads them
+    _redis_version: Optional[str] = ""
+    _redis_checked_at: float = 0.0
+    _redis_sync_interval: float = REDIS_CONFIG_SYNC_INTERVAL
+
+    _REDIS_KEY_PREFIX = "open-webui:config"
+    _REDIS_VERSION_KEY = "open-webui:config-version"
 
     def __init__(
-        self, redis_url: Optional[str] = None, redis_sentinels: Optional[list] = []
+        self,
+        redis_url: Optional[str] = None,
+        redis_sentinels: Optional[list] = [],
+        redis_sync_interval: float = REDIS_CONFIG_SYNC_INTERVAL,
     ):
         super().__setattr__("_state", {})
+        super().__setattr__("_redis_sync_interval", redis_sync_interval)
         if redis_url:
             super().__setattr__(
                 "_redis",
@@ -230,31 +273,92 @@ class AppConfig:
             self._state[key].save()
 
             if self._redis:
-                redis_key = f"open-webui:config:{key}"
-                self._redis.set(redis_key, json.dumps(self._state[key].value))
+                # Bump the version so that the other workers reload their values
+                pipe = self._redis.pipeline()
+                pipe.set(
+                    f"{self._REDIS_KEY_PREFIX}:{key}",
+                    json.dumps(self._state[key].value),
+                )
+                pipe.incr(self._REDIS_VERSION_KEY)
+                pipe.execute()
+
+        super().__setattr__("_version", self._version + 1)
 
     def __getattr__(self, key):
         if key not in self._state:
             raise AttributeError(f"Config key '{key}' not found")
 
-        # If Redis is available, check for an updated value
         if self._redis:
-            redis_key = f"open-webui:config:{key}"
-            redis_value = self._redis.get(redis_key)
+            self._sync_from_redis()
 
-            if redis_value is not None:
-                try:
-                    decoded_value = json.loads(redis_value)
+        return self._state[key].value
 
-                    # Update the in-memory value if different
-                    if self._state[key].value != decoded_value:
-                        self._state[key].value = decoded_value
-                        log.info(f"Updated {key} from Redis: {decoded_value}")
+    def _sync_from_redis(self):
+        """
+        Reload the values from Redis if another worker changed any of them.
+
+        Reads are served from memory, Redis is asked for the version at most once
+        every `REDIS_CONFIG_SYNC_INTERVAL` seconds and the values are only fetched
+        when it changed.
+        """
+        now = time.monotonic()
+        if now - self._redis_checked_at < self._redis_sync_interval:
+            return
+        super().__setattr__("_redis_checked_at", now)
+
+        version = self._redis.get(self._REDIS_VERSION_KEY)
+        if version == self._redis_version:
+            return
+
+        keys = list(self._state.keys())
+        redis_values = self._redis.mget(
+            [f"{self._REDIS_KEY_PREFIX}:{key}" for key in keys]
+        )
 
-                except json.JSONDecodeError:
-                    log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+        for key, redis_value in zip(keys, redis_values):
+            if redis_value is None:
+                continue
 
-        return self._state[key].value
+            try:
+                decoded_value = json.loads(redis_value)
+
+                # Update the in-memory value if different
+                if self._state[key].value != decoded_value:
+                    self._state[key].value = decoded_value
+                    super().__setattr__("_version", self._version + 1)
+                    log.info(f"Updated {key} from Redis: {decoded_value}")
+
+            except json.JSONDecodeError:
+                log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+
+        super().__setattr__("_redis_version", version)
+
+    def snapshot(self) -> ConfigSnapshot:
+        """Return the current values, the same snapshot until one of them changes."""
+        if self._redis:
+            self._sync_from_redis()
+
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != self._version:
+            snapshot = ConfigSnapshot(
+                {key: config.value for key, config in self._state.items()},
+                self._version,
+            )
+            super().__setattr__("_snapshot", snapshot)
+
+        return snapshot
+
+
+def get_config_snapshot(request) -> ConfigSnapshot:
+    """
+    Config of the current request, taken from `request.app.state.config` on first
+    use and kept on `request.state` for the rest of the request.
+    """
+    snapshot = getattr(request.state, "config", None)
+    if snapshot is None:
+        snapshot = request.app.state.config.snapshot()
+        request.state.config = snapshot
+    return snapshot
 
 
 ####################################
@@ -1470,6 +1574,31 @@ ENABLE_TITLE_GENERATION = PersistentConfig(
     os.environ.get("ENABLE_TITLE_GENERATION", "True").lower() == "true",
 )
 
+# Generate the title, tags and follow-ups of a chat with a single task model call
+ENABLE_COMBINED_BACKGROUND_TASKS = PersistentConfig(
+    "ENABLE_COMBINED_BACKGROUND_TASKS",
+    "task.combined.enable",
+    os.environ.get("ENABLE_COMBINED_BACKGROUND_TASKS", "False").lower() == "true",
+)
+
+DEFAULT_BACKGROUND_TASKS_GENERATION_PROMPT_TEMPLATE = """### Task:
+Analyze the chat history and generate, in a single JSON object:
+- "title": a concise, 3-5 word title with an emoji summarizing the chat history.
+- "tags": 1-3 broad tags categorizing the main themes of the chat history, along with 1-3 more specific subtopic tags.
+- "follow_ups": 3-5 relevant follow-up questions or prompts that the user might naturally ask next, written from the user's point of view and directed to the assistant.
+### Guidelines:
+- The title should clearly represent the main theme or subject of the conversation, avoid quotation marks or special formatting.
+- Start the tags with high-level domains (e.g. Science, Technology, Philosophy, Arts, Politics, Business, Health, Sports, Entertainment, Education); if the content is too short or too diverse, use only ["General"].
+- Make follow-up questions concise, clear, directly related to the discussed topic(s) and do not repeat what was already covered.
+- Use the chat's primary language; default to English if multilingual.
+- Your entire response must consist solely of the raw JSON object, without any markdown code fences, introductory or concluding text.
+### Output:
+JSON format: { "title": "your concise title here", "tags": ["tag1", "tag2", "tag3"], "follow_ups": ["Question 1?", "Question 2?", "Question 3?"] }
+### Chat History:
+<chat_history>
+{{MESSAGES:END:6}}
+</chat_history>"""
+
 
 ENABLE_SEARCH_QUERY_GENERATION = PersistentConfig(
     "ENABLE_SEARCH_QUERY_GENERATION",
@@ -113,6 +113,7 @@ class TASKS(str, Enum):
     TITLE_GENERATION = "title_generation"
     FOLLOW_UP_GENERATION = "follow_up_generation"
     TAGS_GENERATION = "tags_generation"
+    BACKGROUND_TASKS_GENERATION = "background_tasks_generation"
     EMOJI_GENERATION = "emoji_generation"
     QUERY_GENERATION = "query_generation"
     IMAGE_PROMPT_GENERATION = "image_prompt_generation"
@@ -312,6 +312,113 @@ else:
     except Exception:
         DATABASE_POOL_RECYCLE = 3600
 
+# PostgreSQL only: pool of the async engine. It comes on top of the pool above, so a
+# worker holds up to DATABASE_POOL_SIZE + DATABASE_POOL_MAX_OVERFLOW +
+# DATABASE_ASYNC_POOL_SIZE + DATABASE_ASYNC_POOL_MAX_OVERFLOW connections. Half of the
+# sync pool by default
+DATABASE_ASYNC_POOL_SIZE = os.environ.get("DATABASE_ASYNC_POOL_SIZE", "")
+
+try:
+    DATABASE_ASYNC_POOL_SIZE = int(DATABASE_ASYNC_POOL_SIZE)
+except Exception:
+    DATABASE_ASYNC_POOL_SIZE = (DATABASE_POOL_SIZE + 1) // 2
+
+DATABASE_ASYNC_POOL_MAX_OVERFLOW = os.environ.get(
+    "DATABASE_ASYNC_POOL_MAX_OVERFLOW", ""
+)
+
+try:
+    DATABASE_ASYNC_POOL_MAX_OVERFLOW = int(DATABASE_ASYNC_POOL_MAX_OVERFLOW)
+except Exception:
+    DATABASE_ASYNC_POOL_MAX_OVERFLOW = DATABASE_POOL_MAX_OVERFLOW // 2
+
+# SQLite only: write-ahead log with synchronous=NORMAL, readers no longer wait for
+# writers. Not for databases on network file systems.
+DATABASE_ENABLE_SQLITE_WAL = (
+    os.environ.get("DATABASE_ENABLE_SQLITE_WAL", "False").lower() == "true"
+)
+
+DATABASE_SQLITE_BUSY_TIMEOUT = os.environ.get("DATABASE_SQLITE_BUSY_TIMEOUT", "5000")
+
+try:
+    DATABASE_SQLITE_BUSY_TIMEOUT = int(DATABASE_SQLITE_BUSY_TIMEOUT)
+except Exception:
+    DATABASE_SQLITE_BUSY_TIMEOUT = 5000
+
+# PRAGMA cache_size (negative values are KiB, e.g. -65536 for 64 MiB) and
+# PRAGMA mmap_size in bytes, 0 keeps the SQLite default
+DATABASE_SQLITE_CACHE_SIZE = os.environ.get("DATABASE_SQLITE_CACHE_SIZE", "0")
+
+try:
+    DATABASE_SQLITE_CACHE_SIZE = int(DATABASE_SQLITE_CACHE_SIZE)
+except Exception:
+    DATABASE_SQLITE_CACHE_SIZE = 0
+
+DATABASE_SQLITE_MMAP_SIZE = os.environ.get("DATABASE_SQLITE_MMAP_SIZE", "0")
+
+try:
+    DATABASE_SQLITE_MMAP_SIZE = int(DATABASE_SQLITE_MMAP_SIZE)
+except Exception:
+    DATABASE_SQLITE_MMAP_SIZE = 0
+
+# SQLite only: run the frequent small writes (streamed messages, statuses, last
+# active times) on a single writer thread that commits them in batches
+DATABASE_ENABLE_SQLITE_WRITE_QUEUE = (
+    os.environ.get("DATABASE_ENABLE_SQLITE_WRITE_QUEUE", "False").lower() == "true"
+)
+
+DATABASE_SQLITE_WRITE_QUEUE_BATCH_SIZE = os.environ.get(
+    "DATABASE_SQLITE_WRITE_QUEUE_BATCH_SIZE", "100"
+)
+
+try:
+    DATABASE_SQLITE_WRITE_QUEUE_BATCH_SIZE = int(DATABASE_SQLITE_WRITE_QUEUE_BATCH_SIZE)
+except Exception:
+    DATABASE_SQLITE_WRITE_QUEUE_BATCH_SIZE = 100
+
+# Count and time the database queries of every request, returned in a Server-Timing
+# header and logged at debug level
+ENABLE_DATABASE_QUERY_STATS = (
+    os.environ.get("ENABLE_DATABASE_QUERY_STATS", "False").lower() == "true"
+)
+
+# Requests running more queries than this are logged as a warning, 0 disables it
+DATABASE_QUERY_STATS_WARN_THRESHOLD = os.environ.get(
+    "DATABASE_QUERY_STATS_WARN_THRESHOLD", "50"
+)
+
+try:
+    DATABASE_QUERY_STATS_WARN_THRESHOLD = int(DATABASE_QUERY_STATS_WARN_THRESHOLD)
+except Exception:
+    DATABASE_QUERY_STATS_WARN_THRESHOLD = 50
+
+# Seconds the group ids of a user are cached by a worker for access checks, group
+# changes made through the worker clear it right away. 0 disables the cache
+GROUP_MEMBERSHIP_CACHE_TTL = os.environ.get("GROUP_MEMBERSHIP_CACHE_TTL", "5")
+
+try:
+    GROUP_MEMBERSHIP_CACHE_TTL = float(GROUP_MEMBERSHIP_CACHE_TTL)
+except Exception:
+    GROUP_MEMBERSHIP_CACHE_TTL = 5.0
+
+# Seconds the user of an authenticated request is cached by a worker, changes made
+# through the worker clear it right away. 0 disables the cache
+USER_CACHE_TTL = os.environ.get("USER_CACHE_TTL", "5")
+
+try:
+    USER_CACHE_TTL = float(USER_CACHE_TTL)
+except Exception:
+    USER_CACHE_TTL = 5.0
+
+# Seconds the last active timestamps of users are collected for before they are
+# written in one bulk update. 0 writes every one immediately
+USER_LAST_ACTIVE_FLUSH_INTERVAL = os.environ.get("USER_LAST_ACTIVE_FLUSH_INTERVAL", "5")
+
+try:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = float(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+except Exception:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = 5.0
+
 RESET_CONFIG_ON_START = (
     os.environ.get("RESET_CONFIG_ON_START", "False").lower() == "true"
 )
@@ -320,6 +427,50 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Maximum number of seconds a realtime message update is buffered before it is written
+# to the database. 0 writes every update immediately.
+REALTIME_CHAT_SAVE_INTERVAL = os.environ.get("REALTIME_CHAT_SAVE_INTERVAL", "1")
+
+try:
+    REALTIME_CHAT_SAVE_INTERVAL = float(REALTIME_CHAT_SAVE_INTERVAL)
+except Exception:
+    REALTIME_CHAT_SAVE_INTERVAL = 1.0
+
+# Number of delta `chat:completion` events between two full content snapshots
+CHAT_STREAM_DELTA_SNAPSHOT_INTERVAL = os.environ.get(
+    "CHAT_STREAM_DELTA_SNAPSHOT_INTERVAL", "50"
+)
+
+try:
+    CHAT_STREAM_DELTA_SNAPSHOT_INTERVAL = int(CHAT_STREAM_DELTA_SNAPSHOT_INTERVAL)
+except Exception:
+    CHAT_STREAM_DELTA_SNAPSHOT_INTERVAL = 50
+
+# Streamed content updates are coalesced into one socket emit per window (ms) or
+# per number of updates, whichever comes first. Off by default (0), every update is
+# emitted as it arrives; set it to e.g. 50 to cut the emits of fast streams.
+CHAT_STREAM_EMIT_INTERVAL = os.environ.get("CHAT_STREAM_EMIT_INTERVAL", "0")
+
+try:
+    CHAT_STREAM_EMIT_INTERVAL = int(CHAT_STREAM_EMIT_INTERVAL)
+except Exception:
+    CHAT_STREAM_EMIT_INTERVAL = 0
+
+CHAT_STREAM_EMIT_MAX_UPDATES = os.environ.get("CHAT_STREAM_EMIT_MAX_UPDATES", "20")
+
+try:
+    CHAT_STREAM_EMIT_MAX_UPDATES = int(CHAT_STREAM_EMIT_MAX_UPDATES)
+except Exception:
+    CHAT_STREAM_EMIT_MAX_UPDATES = 20
+
+# Number of chats inserted per transaction by the bulk chat import
+CHAT_IMPORT_BATCH_SIZE = os.environ.get("CHAT_IMPORT_BATCH_SIZE", "500")
+
+try:
+    CHAT_IMPORT_BATCH_SIZE = int(CHAT_IMPORT_BATCH_SIZE)
+except Exception:
+    CHAT_IMPORT_BATCH_SIZE = 500
+
 ####################################
 # REDIS
 ####################################
@@ -328,6 +479,15 @@ REDIS_URL = os.environ.get("REDIS_URL", "")
 REDIS_SENTINEL_HOSTS = os.environ.get("REDIS_SENTINEL_HOSTS", "")
 REDIS_SENTINEL_PORT = os.environ.get("REDIS_SENTINEL_PORT", "26379")
 
+# Seconds between checks of the shared config version in Redis, config changes
+# made by another worker are picked up after at most this long
+REDIS_CONFIG_SYNC_INTERVAL = os.environ.get("REDIS_CONFIG_SYNC_INTERVAL", "1")
+
+try:
+    REDIS_CONFIG_SYNC_INTERVAL = float(REDIS_CONFIG_SYNC_INTERVAL)
+except Exception:
+    REDIS_CONFIG_SYNC_INTERVAL = 1.0
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -405,6 +565,15 @@ WEBSOCKET_MANAGER = os.environ.get("WEBSOCKET_MANAGER", "")
 WEBSOCKET_REDIS_URL = os.environ.get("WEBSOCKET_REDIS_URL", REDIS_URL)
 WEBSOCKET_REDIS_LOCK_TIMEOUT = os.environ.get("WEBSOCKET_REDIS_LOCK_TIMEOUT", 60)
 
+# Seconds the socket session and user pools read from Redis are cached by a worker,
+# 0 disables the cache
+WEBSOCKET_POOL_CACHE_TTL = os.environ.get("WEBSOCKET_POOL_CACHE_TTL", "0")
+
+try:
+    WEBSOCKET_POOL_CACHE_TTL = float(WEBSOCKET_POOL_CACHE_TTL)
+except Exception:
+    WEBSOCKET_POOL_CACHE_TTL = 0.0
+
 WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
@@ -551,6 +720,22 @@ OTEL_TRACES_SAMPLER = os.environ.get(
     "OTEL_TRACES_SAMPLER", "parentbased_always_on"
 ).lower()
 
+# Seconds between two measurements of the event loop lag, 0 disables them
+EVENT_LOOP_LAG_INTERVAL = os.environ.get("EVENT_LOOP_LAG_INTERVAL", "1")
+
+try:
+    EVENT_LOOP_LAG_INTERVAL = float(EVENT_LOOP_LAG_INTERVAL)
+except Exception:
+    EVENT_LOOP_LAG_INTERVAL = 1.0
+
+# A warning is logged when the event loop lags more than this many milliseconds
+EVENT_LOOP_LAG_WARN_THRESHOLD = os.environ.get("EVENT_LOOP_LAG_WARN_THRESHOLD", "500")
+
+try:
+    EVENT_LOOP_LAG_WARN_THRESHOLD = float(EVENT_LOOP_LAG_WARN_THRESHOLD)
+except Exception:
+    EVENT_LOOP_LAG_WARN_THRESHOLD = 500.0
+
 ####################################
 # TOOLS/FUNCTIONS PIP OPTIONS
 ####################################
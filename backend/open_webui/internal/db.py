@@ -1,6 +1,15 @@
+import asyncio
+import functools
 import json
 import logging
-from contextlib import contextmanager
+import queue
+import re
+import ssl
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from typing import Any, Optional
 
 from open_webui.internal.wrappers import register_connection
@@ -9,13 +18,24 @@ from open_webui.env import (
     DATABASE_URL,
     DATABASE_SCHEMA,
     SRC_LOG_LEVELS,
+    DATABASE_ASYNC_POOL_MAX_OVERFLOW,
+    DATABASE_ASYNC_POOL_SIZE,
     DATABASE_POOL_MAX_OVERFLOW,
     DATABASE_POOL_RECYCLE,
     DATABASE_POOL_SIZE,
     DATABASE_POOL_TIMEOUT,
+    DATABASE_ENABLE_SQLITE_WAL,
+    DATABASE_ENABLE_SQLITE_WRITE_QUEUE,
+    DATABASE_SQLITE_BUSY_TIMEOUT,
+    DATABASE_SQLITE_CACHE_SIZE,
+    DATABASE_SQLITE_MMAP_SIZE,
+    DATABASE_SQLITE_WRITE_QUEUE_BATCH_SIZE,
+    ENABLE_DATABASE_QUERY_STATS,
+    DATABASE_QUERY_STATS_WARN_THRESHOLD,
 )
 from peewee_migrate import Router
-from sqlalchemy import Dialect, create_engine, MetaData, types
+from sqlalchemy import Dialect, create_engine, event, make_url, MetaData, types
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.pool import QueuePool, NullPool
@@ -75,11 +95,25 @@ def handle_peewee_migration(DATABASE_URL):
 handle_peewee_migration(DATABASE_URL)
 
 
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {DATABASE_SQLITE_BUSY_TIMEOUT}")
+    if DATABASE_ENABLE_SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+    if DATABASE_SQLITE_CACHE_SIZE:
+        cursor.execute(f"PRAGMA cache_size = {DATABASE_SQLITE_CACHE_SIZE}")
+    if DATABASE_SQLITE_MMAP_SIZE:
+        cursor.execute(f"PRAGMA mmap_size = {DATABASE_SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+
 SQLALCHEMY_DATABASE_URL = DATABASE_URL
 if "sqlite" in SQLALCHEMY_DATABASE_URL:
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
     )
+    event.listen(engine, "connect", set_sqlite_pragmas)
 else:
     if DATABASE_POOL_SIZE > 0:
         engine = create_engine(
@@ -114,3 +148,305 @@ def get_session():
 
 
 get_db = contextmanager(get_session)
+
+
+def get_asyncpg_connect_args(query: dict) -> dict:
+    """
+    asyncpg arguments for the libpq parameters of a PostgreSQL URL. asyncpg takes some
+    of them under another name or shape and fails on the ones it doesn't know, which
+    are left out.
+    """
+    connect_args = {}
+    server_settings = {}
+    ssl_files = {}
+
+    for key, value in query.items():
+        if isinstance(value, tuple):
+            value = value[-1]
+
+        if key == "sslmode":
+            connect_args["ssl"] = value
+        elif key in ("sslrootcert", "sslcert", "sslkey"):
+            ssl_files[key] = value
+        elif key == "connect_timeout":
+            connect_args["timeout"] = float(value)
+        elif key == "target_session_attrs":
+            connect_args[key] = value
+        elif key == "application_name":
+            server_settings[key] = value
+        elif key == "options":
+            # e.g. "-c search_path=webui -c statement_timeout=5000"
+            server_settings.update(re.findall(r"(?:-c\s*|--)([\w.]+)=(\S+)", value))
+        else:
+            log.warning(f"Database URL parameter {key} isn't passed to asyncpg")
+
+    if server_settings:
+        connect_args["server_settings"] = server_settings
+
+    sslmode = connect_args.get("ssl", "prefer")
+    if ssl_files and sslmode != "disable":
+        context = ssl.create_default_context(cafile=ssl_files.get("sslrootcert"))
+        if "sslcert" in ssl_files:
+            context.load_cert_chain(ssl_files["sslcert"], ssl_files.get("sslkey"))
+        if sslmode != "verify-full":
+            context.check_hostname = False
+        if sslmode not in ("verify-ca", "verify-full"):
+            context.verify_mode = ssl.CERT_NONE
+        connect_args["ssl"] = context
+
+    return connect_args
+
+
+def get_async_database_url(database_url: str) -> tuple[Optional[str], dict]:
+    """
+    URL of the same database for the asyncio drivers (aiosqlite, asyncpg) and the
+    arguments to connect with, None when there is none for its dialect.
+    """
+    url = make_url(database_url)
+    connect_args = {}
+
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            # A separate connection would see a different in-memory database
+            return None, {}
+        url = url.set(drivername="sqlite+aiosqlite")
+    elif url.get_backend_name() == "postgresql":
+        # The query goes to asyncpg.connect() as is, pass it translated instead
+        connect_args = get_asyncpg_connect_args(url.query)
+        url = url.set(drivername="postgresql+asyncpg", query={})
+    else:
+        return None, {}
+
+    return url.render_as_string(hide_password=False), connect_args
+
+
+SQLALCHEMY_ASYNC_DATABASE_URL, ASYNC_CONNECT_ARGS = get_async_database_url(
+    SQLALCHEMY_DATABASE_URL
+)
+if SQLALCHEMY_ASYNC_DATABASE_URL is None:
+    log.info("No async driver for the database, async queries run in threads")
+    async_engine = None
+elif "sqlite" in SQLALCHEMY_ASYNC_DATABASE_URL:
+    async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL)
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+else:
+    # A pool of its own, see DATABASE_ASYNC_POOL_SIZE for the connection budget
+    if DATABASE_ASYNC_POOL_SIZE > 0:
+        async_engine = create_async_engine(
+            SQLALCHEMY_ASYNC_DATABASE_URL,
+            connect_args=ASYNC_CONNECT_ARGS,
+            pool_size=DATABASE_ASYNC_POOL_SIZE,
+            max_overflow=DATABASE_ASYNC_POOL_MAX_OVERFLOW,
+            pool_timeout=DATABASE_POOL_TIMEOUT,
+            pool_recycle=DATABASE_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    else:
+        async_engine = create_async_engine(
+            SQLALCHEMY_ASYNC_DATABASE_URL,
+            connect_args=ASYNC_CONNECT_ARGS,
+            pool_pre_ping=True,
+            poolclass=NullPool,
+        )
+
+AsyncSessionLocal = (
+    async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None
+    else None
+)
+
+
+@asynccontextmanager
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+class QueryStats:
+    """
+    The queries run for one request: how many, how long they took together and the
+    slowest few of them.
+    """
+
+    def __init__(self, slowest_size: int = 3):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_size = slowest_size
+        self.slowest: list[tuple[float, str]] = []
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+
+        if len(self.slowest) < self.slowest_size or duration > self.slowest[-1][0]:
+            self.slowest.append((duration, statement))
+            self.slowest.sort(key=lambda entry: entry[0], reverse=True)
+            del self.slowest[self.slowest_size :]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+    def log(self, name: str):
+        over_threshold = (
+            DATABASE_QUERY_STATS_WARN_THRESHOLD
+            and self.count > DATABASE_QUERY_STATS_WARN_THRESHOLD
+        )
+        if not over_threshold and not log.isEnabledFor(logging.DEBUG):
+            return
+
+        message = (
+            f"{name}: {self.count} queries in {self.duration * 1000:.1f} ms"
+            + "".join(
+                f"\n  {duration * 1000:.1f} ms: {' '.join(statement.split())[:200]}"
+                for duration, statement in self.slowest
+            )
+        )
+        if over_threshold:
+            log.warning(message)
+        else:
+            log.debug(message)
+
+
+# Stats of the request being handled, copied into the threads and greenlets its
+# queries run in
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if query_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    stats = query_stats.get()
+    start_times = conn.info.get("query_start_time")
+    if stats is not None and start_times:
+        stats.record(statement, time.perf_counter() - start_times.pop())
+
+
+if ENABLE_DATABASE_QUERY_STATS:
+    for instrumented_engine in (
+        [engine] if async_engine is None else [engine, async_engine.sync_engine]
+    ):
+        event.listen(instrumented_engine, "before_cursor_execute", start_query_timer)
+        event.listen(instrumented_engine, "after_cursor_execute", stop_query_timer)
+
+
+def async_fallback(sync_method):
+    """
+    Decorator for the async variant of a table method, used as is when the database
+    has an async driver and replaced by `sync_method` run in a worker thread when it
+    hasn't, so the event loop isn't blocked either way.
+    """
+
+    def decorator(async_method):
+        if async_engine is not None:
+            return async_method
+
+        @functools.wraps(async_method)
+        async def wrapper(*args, **kwargs):
+            return await asyncio.to_thread(sync_method, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class SQLiteWriteQueue:
+    """
+    Runs writes on a single thread, batching the ones queued meanwhile into one
+    transaction.
+
+    SQLite allows one writer at a time: concurrent writers wait on each other for the
+    lock, and a transaction that read before writing fails with "database is locked"
+    right away in WAL mode when another one committed in between. Going through one
+    thread removes the contention and many small writes share a commit.
+
+    A write is a function taking the session; it must not commit and must not have
+    side effects outside the database, since it runs again on its own when another
+    write of its batch fails.
+    """
+
+    def __init__(self, session_factory, batch_size: int = 100):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.queue: queue.Queue = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+    def submit(self, write) -> Future:
+        future = Future()
+        self.queue.put((write, future))
+
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(
+                        target=self._run, name="sqlite-writer", daemon=True
+                    )
+                    self.thread.start()
+
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self.session_factory() as db:
+                try:
+                    results = [write(db) for write, _ in batch]
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    self._run_one_by_one(db, batch)
+                else:
+                    for (_, future), result in zip(batch, results):
+                        future.set_result(result)
+
+    def _run_one_by_one(self, db, batch):
+        for write, future in batch:
+            try:
+                result = write(db)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+
+sqlite_write_queue = (
+    SQLiteWriteQueue(SessionLocal, DATABASE_SQLITE_WRITE_QUEUE_BATCH_SIZE)
+    if DATABASE_ENABLE_SQLITE_WRITE_QUEUE and "sqlite" in SQLALCHEMY_DATABASE_URL
+    else None
+)
+
+
+def run_write(write):
+    """
+    Run `write(db)` in a transaction and return its result, through the SQLite write
+    queue when it's enabled.
+    """
+    if sqlite_write_queue is not None:
+        return sqlite_write_queue.submit(write).result()
+
+    with get_db() as db:
+        result = write(db)
+        db.commit()
+        return result
+
+
+async def run_write_async(write):
+    """
+    `run_write` for coroutines: waits on the SQLite write queue without blocking the
+    event loop, or runs the write in a worker thread when there is no queue.
+    """
+    if sqlite_write_queue is not None:
+        return await asyncio.wrap_future(sqlite_write_queue.submit(write))
+
+    return await asyncio.to_thread(run_write, write)
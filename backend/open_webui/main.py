@@ -43,7 +43,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 
-from starlette_compress import CompressMiddleware
+from starlette_compress import CompressMiddleware, add_compress_type
 
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -93,12 +93,18 @@ from open_webui.routers.retrieval import (
     get_rf,
 )
 
-from open_webui.internal.db import Session, engine
+from open_webui.internal.db import (
+    QueryStats,
+    Session,
+    async_engine,
+    engine,
+    query_stats,
+)
 
 from open_webui.models.functions import Functions
 from open_webui.models.models import Models
-from open_webui.models.users import UserModel, Users
-from open_webui.models.chats import Chats
+from open_webui.models.users import UserModel, Users, UserLastActiveBuffer
+from open_webui.models.chats import Chats, ChatMessageBuffer, ChatMessageStatusBuffer
 
 from open_webui.config import (
     LICENSE_KEY,
@@ -377,6 +383,7 @@ from open_webui.config import (
     ENABLE_TAGS_GENERATION,
     ENABLE_TITLE_GENERATION,
     ENABLE_FOLLOW_UP_GENERATION,
+    ENABLE_COMBINED_BACKGROUND_TASKS,
     ENABLE_SEARCH_QUERY_GENERATION,
     ENABLE_RETRIEVAL_QUERY_GENERATION,
     ENABLE_AUTOCOMPLETE_GENERATION,
@@ -414,8 +421,12 @@ from open_webui.env import (
     ENABLE_WEBSOCKET_SUPPORT,
     BYPASS_MODEL_ACCESS_CONTROL,
     RESET_CONFIG_ON_START,
+    ENABLE_REALTIME_CHAT_SAVE,
     OFFLINE_MODE,
     ENABLE_OTEL,
+    ENABLE_DATABASE_QUERY_STATS,
+    EVENT_LOOP_LAG_INTERVAL,
+    EVENT_LOOP_LAG_WARN_THRESHOLD,
     EXTERNAL_PWA_MANIFEST_URL,
     AIOHTTP_CLIENT_SESSION_SSL,
 )
@@ -433,7 +444,7 @@ from open_webui.utils.chat import (
 )
 from open_webui.utils.embeddings import generate_embeddings
 from open_webui.utils.middleware import process_chat_payload, process_chat_response
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import get_access_control_evaluator_async
 
 from open_webui.utils.auth import (
     get_license_data,
@@ -446,6 +457,7 @@ from open_webui.utils.plugin import install_tool_and_function_dependencies
 from open_webui.utils.oauth import OAuthManager
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
 from open_webui.utils.redis import get_redis_connection
+from open_webui.utils.telemetry.event_loop import monitor_event_loop_lag
 
 from open_webui.tasks import (
     redis_task_command_listener,
@@ -533,11 +545,44 @@ async def lifespan(app: FastAPI):
 
     asyncio.create_task(periodic_usage_pool_cleanup())
 
+    if EVENT_LOOP_LAG_INTERVAL > 0:
+        app.state.event_loop_lag_task = asyncio.create_task(
+            monitor_event_loop_lag(
+                EVENT_LOOP_LAG_INTERVAL, EVENT_LOOP_LAG_WARN_THRESHOLD
+            )
+        )
+
+    if ENABLE_REALTIME_CHAT_SAVE:
+        app.state.chat_message_buffer_task = asyncio.create_task(
+            ChatMessageBuffer.periodic_flush()
+        )
+
+    if UserLastActiveBuffer.interval > 0:
+        app.state.user_last_active_buffer_task = asyncio.create_task(
+            UserLastActiveBuffer.periodic_flush()
+        )
+
     yield
 
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    if hasattr(app.state, "event_loop_lag_task"):
+        app.state.event_loop_lag_task.cancel()
+
+    if hasattr(app.state, "chat_message_buffer_task"):
+        app.state.chat_message_buffer_task.cancel()
+        await ChatMessageBuffer.flush_all()
+
+    ChatMessageStatusBuffer.flush_all()
+
+    if hasattr(app.state, "user_last_active_buffer_task"):
+        app.state.user_last_active_buffer_task.cancel()
+        UserLastActiveBuffer.flush_all()
+
+    if async_engine is not None:
+        await async_engine.dispose()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -1019,6 +1064,7 @@ app.state.config.ENABLE_AUTOCOMPLETE_GENERATION = ENABLE_AUTOCOMPLETE_GENERATION
 app.state.config.ENABLE_TAGS_GENERATION = ENABLE_TAGS_GENERATION
 app.state.config.ENABLE_TITLE_GENERATION = ENABLE_TITLE_GENERATION
 app.state.config.ENABLE_FOLLOW_UP_GENERATION = ENABLE_FOLLOW_UP_GENERATION
+app.state.config.ENABLE_COMBINED_BACKGROUND_TASKS = ENABLE_COMBINED_BACKGROUND_TASKS
 
 
 app.state.config.TITLE_GENERATION_PROMPT_TEMPLATE = TITLE_GENERATION_PROMPT_TEMPLATE
@@ -1072,6 +1118,7 @@ class RedirectMiddleware(BaseHTTPMiddleware):
 
 
 # Add the middleware to the app
+add_compress_type("application/x-ndjson")  # streamed chat exports
 app.add_middleware(CompressMiddleware)
 app.add_middleware(RedirectMiddleware)
 app.add_middleware(SecurityHeadersMiddleware)
@@ -1099,6 +1146,25 @@ async def check_url(request: Request, call_next):
     return response
 
 
+if ENABLE_DATABASE_QUERY_STATS:
+
+    @app.middleware("http")
+    async def record_query_stats(request: Request, call_next):
+        # Only the queries run until the response starts are counted: the headers,
+        # Server-Timing included, go out before the body of a StreamingResponse is
+        # iterated, so the queries made while streaming aren't in the stats
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            query_stats.reset(token)
+
+        response.headers.append("Server-Timing", stats.server_timing())
+        stats.log(f"{request.method} {request.url.path}")
+        return response
+
+
 @app.middleware("http")
 async def inspect_websocket(request: Request, call_next):
     if (
@@ -1189,12 +1255,18 @@ if audit_level != AuditLevel.NONE:
 
 @app.get("/api/models")
 async def get_models(request: Request, user=Depends(get_verified_user)):
-    def get_filtered_models(models, user):
+    async def get_filtered_models(models, user):
+        # Looked up once instead of once per model
+        model_infos = {
+            model_info.id: model_info
+            for model_info in await Models.get_all_models_async()
+        }
+        access = await get_access_control_evaluator_async(user.id)
+
         filtered_models = []
         for model in models:
             if model.get("arena"):
-                if has_access(
-                    user.id,
+                if access.has_access(
                     type="read",
                     access_control=model.get("info", {})
                     .get("meta", {})
@@ -1203,12 +1275,9 @@ async def get_models(request: Request, user=Depends(get_verified_user)):
                     filtered_models.append(model)
                 continue
 
-            model_info = Models.get_model_by_id(model["id"])
-            if model_info:
-                if user.id == model_info.user_id or has_access(
-                    user.id, type="read", access_control=model_info.access_control
-                ):
-                    filtered_models.append(model)
+            model_info = model_infos.get(model["id"])
+            if model_info and access.can_access(model_info, type="read"):
+                filtered_models.append(model)
 
         return filtered_models
 
@@ -1246,7 +1315,7 @@ async def get_models(request: Request, user=Depends(get_verified_user)):
 
     # Filter out models that the user does not have access to
     if user.role == "user" and not BYPASS_MODEL_ACCESS_CONTROL:
-        models = get_filtered_models(models, user)
+        models = await get_filtered_models(models, user)
 
     log.debug(
         f"/api/models returned filtered models accessible to the user: {json.dumps([model['id'] for model in models])}"
@@ -1331,6 +1400,7 @@ async def chat_completion(
             "chat_id": form_data.pop("chat_id", None),
             "message_id": form_data.pop("id", None),
             "session_id": form_data.pop("session_id", None),
+            "stream_delta": form_data.pop("stream_delta", False),
             "filter_ids": form_data.pop("filter_ids", []),
             "tool_ids": form_data.get("tool_ids", None),
             "tool_servers": form_data.pop("tool_servers", None),
@@ -1660,7 +1730,10 @@ async def get_current_usage(user=Depends(get_verified_user)):
     This is an experimental endpoint and subject to change.
     """
     try:
-        return {"model_ids": get_models_in_use(), "user_ids": get_active_user_ids()}
+        return {
+            "model_ids": await get_models_in_use(),
+            "user_ids": await get_active_user_ids(),
+        }
     except Exception as e:
         log.error(f"Error getting usage statistics: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
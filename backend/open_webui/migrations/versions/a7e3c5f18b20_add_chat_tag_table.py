@@ -0,0 +1,70 @@
+"""Add chat_tag table
+
+Revision ID: a7e3c5f18b20
+Revises: f4c2d7e91a3b
+Create Date: 2025-05-23 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, select
+
+revision = "a7e3c5f18b20"
+down_revision = "f4c2d7e91a3b"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+chat_table = table(
+    "chat",
+    sa.Column("id", sa.String(), primary_key=True),
+    sa.Column("user_id", sa.String()),
+    sa.Column("meta", sa.JSON()),
+)
+
+chat_tag_table = table(
+    "chat_tag",
+    sa.Column("chat_id", sa.String()),
+    sa.Column("tag_id", sa.String()),
+    sa.Column("user_id", sa.String()),
+)
+
+
+def upgrade():
+    op.create_table(
+        "chat_tag",
+        sa.Column("chat_id", sa.String(), nullable=False),
+        sa.Column("tag_id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "tag_id", name="pk_chat_id_tag_id"),
+    )
+    op.create_index("ix_chat_tag_user_id_tag_id", "chat_tag", ["user_id", "tag_id"])
+
+    # Copy `chat.meta.tags` of every chat into `chat_tag` rows
+    connection = op.get_bind()
+    results = connection.execute(
+        select(chat_table.c.id, chat_table.c.user_id, chat_table.c.meta)
+    ).fetchall()
+
+    rows = []
+    for row in results:
+        meta = row.meta if isinstance(row.meta, dict) else {}
+        tag_ids = {
+            tag.replace(" ", "_").lower()
+            for tag in meta.get("tags", []) or []
+            if isinstance(tag, str)
+        }
+        rows.extend(
+            {"chat_id": row.id, "tag_id": tag_id, "user_id": row.user_id}
+            for tag_id in tag_ids
+        )
+
+    for i in range(0, len(rows), BATCH_SIZE):
+        connection.execute(chat_tag_table.insert(), rows[i : i + BATCH_SIZE])
+
+
+def downgrade():
+    op.drop_index("ix_chat_tag_user_id_tag_id", table_name="chat_tag")
+    op.drop_table("chat_tag")
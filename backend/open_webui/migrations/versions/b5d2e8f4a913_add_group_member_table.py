@@ -0,0 +1,68 @@
+"""Add group_member table
+
+Revision ID: b5d2e8f4a913
+Revises: a7e3c5f18b20
+Create Date: 2025-05-24 10:00:00.000000
+
+"""
+
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, select
+
+revision = "b5d2e8f4a913"
+down_revision = "a7e3c5f18b20"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+group_table = table(
+    "group",
+    sa.Column("id", sa.Text(), primary_key=True),
+    sa.Column("user_ids", sa.JSON()),
+)
+
+group_member_table = table(
+    "group_member",
+    sa.Column("group_id", sa.Text()),
+    sa.Column("user_id", sa.Text()),
+    sa.Column("created_at", sa.BigInteger()),
+)
+
+
+def upgrade():
+    op.create_table(
+        "group_member",
+        sa.Column("group_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("group_id", "user_id", name="pk_group_id_user_id"),
+    )
+    op.create_index("ix_group_member_user_id", "group_member", ["user_id"])
+
+    # Copy `group.user_ids` of every group into `group_member` rows
+    connection = op.get_bind()
+    results = connection.execute(
+        select(group_table.c.id, group_table.c.user_ids)
+    ).fetchall()
+    now = int(time.time())
+
+    rows = []
+    for row in results:
+        user_ids = row.user_ids if isinstance(row.user_ids, list) else []
+        rows.extend(
+            {"group_id": row.id, "user_id": user_id, "created_at": now}
+            for user_id in dict.fromkeys(user_ids)
+            if isinstance(user_id, str)
+        )
+
+    for i in range(0, len(rows), BATCH_SIZE):
+        connection.execute(group_member_table.insert(), rows[i : i + BATCH_SIZE])
+
+
+def downgrade():
+    op.drop_index("ix_group_member_user_id", table_name="group_member")
+    op.drop_table("group_member")
@@ -0,0 +1,32 @@
+"""Add message indexes
+
+Revision ID: c8e4a1d7b256
+Revises: b5d2e8f4a913
+Create Date: 2025-05-25 10:00:00.000000
+
+"""
+
+from alembic import op
+
+revision = "c8e4a1d7b256"
+down_revision = "b5d2e8f4a913"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_message_channel_id_created_at", "message", ["channel_id", "created_at"]
+    )
+    op.create_index(
+        "ix_message_parent_id_created_at", "message", ["parent_id", "created_at"]
+    )
+    op.create_index(
+        "ix_message_reaction_message_id", "message_reaction", ["message_id"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_message_reaction_message_id", table_name="message_reaction")
+    op.drop_index("ix_message_parent_id_created_at", table_name="message")
+    op.drop_index("ix_message_channel_id_created_at", table_name="message")
@@ -0,0 +1,169 @@
+"""Add chat_message table
+
+Revision ID: d31026856c01
+Revises: 9f0c9cd09105
+Create Date: 2025-05-20 10:00:00.000000
+
+"""
+
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, select
+
+revision = "d31026856c01"
+down_revision = "9f0c9cd09105"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 100
+
+chat_table = table(
+    "chat",
+    sa.Column("id", sa.String(), primary_key=True),
+    sa.Column("chat", sa.JSON()),
+)
+
+chat_message_table = table(
+    "chat_message",
+    sa.Column("chat_id", sa.String()),
+    sa.Column("id", sa.String()),
+    sa.Column("parent_id", sa.String()),
+    sa.Column("data", sa.JSON()),
+    sa.Column("seq", sa.Integer()),
+    sa.Column("created_at", sa.BigInteger()),
+    sa.Column("updated_at", sa.BigInteger()),
+)
+
+
+def get_chat_ids(connection):
+    return [row.id for row in connection.execute(select(chat_table.c.id))]
+
+
+def get_message_rows(chat_id: str, messages: dict, now: int) -> list[dict]:
+    """
+    Rows of the messages of a chat, in the order of `history.messages`. A message is
+    dated by its own timestamp, but never before the message ahead of it, so ordering
+    by `created_at` and then `seq` gives back that order.
+    """
+    rows = []
+    created_at = None
+    for seq, (message_id, message) in enumerate(messages.items()):
+        timestamp = message.get("timestamp")
+        if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+            created_at = max(created_at or 0, int(timestamp))
+
+        rows.append(
+            {
+                "chat_id": chat_id,
+                "id": message_id,
+                "parent_id": message.get("parentId"),
+                "data": message,
+                "seq": seq,
+                "created_at": created_at,
+                "updated_at": now,
+            }
+        )
+
+    # Messages before the first timestamp take the first one
+    first_created_at = next(
+        (row["created_at"] for row in rows if row["created_at"] is not None), now
+    )
+    for row in rows:
+        if row["created_at"] is not None:
+            break
+        row["created_at"] = first_created_at
+
+    return rows
+
+
+def upgrade():
+    op.create_table(
+        "chat_message",
+        sa.Column("chat_id", sa.String(), nullable=False),
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("parent_id", sa.String(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("seq", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "id"),
+    )
+
+    # Move `chat.history.messages` of every chat into `chat_message` rows
+    connection = op.get_bind()
+    chat_ids = get_chat_ids(connection)
+    now = int(time.time())
+
+    for i in range(0, len(chat_ids), BATCH_SIZE):
+        results = connection.execute(
+            select(chat_table.c.id, chat_table.c.chat).where(
+                chat_table.c.id.in_(chat_ids[i : i + BATCH_SIZE])
+            )
+        ).fetchall()
+
+        for row in results:
+            chat = row.chat
+            history = chat.get("history") if isinstance(chat, dict) else None
+            if not isinstance(history, dict):
+                continue
+
+            messages = history.get("messages") or {}
+            if messages:
+                connection.execute(
+                    chat_message_table.insert(),
+                    get_message_rows(row.id, messages, now),
+                )
+
+            history = {
+                key: value for key, value in history.items() if key != "messages"
+            }
+            connection.execute(
+                sa.update(chat_table)
+                .where(chat_table.c.id == row.id)
+                .values(chat={**chat, "history": history})
+            )
+
+
+def downgrade():
+    # Put the messages back into `chat.history.messages`
+    connection = op.get_bind()
+    chat_ids = get_chat_ids(connection)
+
+    for i in range(0, len(chat_ids), BATCH_SIZE):
+        batch = chat_ids[i : i + BATCH_SIZE]
+
+        messages = {chat_id: {} for chat_id in batch}
+        for row in connection.execute(
+            select(
+                chat_message_table.c.chat_id,
+                chat_message_table.c.id,
+                chat_message_table.c.data,
+            )
+            .where(chat_message_table.c.chat_id.in_(batch))
+            .order_by(chat_message_table.c.created_at, chat_message_table.c.seq)
+        ):
+            messages[row.chat_id][row.id] = row.data
+
+        results = connection.execute(
+            select(chat_table.c.id, chat_table.c.chat).where(chat_table.c.id.in_(batch))
+        ).fetchall()
+
+        for row in results:
+            chat = row.chat
+            if not isinstance(chat, dict) or "history" not in chat:
+                continue
+
+            connection.execute(
+                sa.update(chat_table)
+                .where(chat_table.c.id == row.id)
+                .values(
+                    chat={
+                        **chat,
+                        "history": {**chat["history"], "messages": messages[row.id]},
+                    }
+                )
+            )
+
+    op.drop_table("chat_message")
@@ -0,0 +1,34 @@
+"""Add chat_message_status table
+
+Revision ID: e1a8b6c04f27
+Revises: d31026856c01
+Create Date: 2025-05-21 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "e1a8b6c04f27"
+down_revision = "d31026856c01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "chat_message_status",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("chat_id", sa.String(), nullable=True),
+        sa.Column("message_id", sa.String(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+    )
+    op.create_index(
+        "ix_chat_message_status_chat_id", "chat_message_status", ["chat_id"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_chat_message_status_chat_id", table_name="chat_message_status")
+    op.drop_table("chat_message_status")
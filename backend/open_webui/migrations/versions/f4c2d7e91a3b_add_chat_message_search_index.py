@@ -0,0 +1,87 @@
+"""Add full-text search index of chat messages
+
+Revision ID: f4c2d7e91a3b
+Revises: e1a8b6c04f27
+Create Date: 2025-05-22 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "f4c2d7e91a3b"
+down_revision = "e1a8b6c04f27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect_name = op.get_bind().dialect.name
+
+    if dialect_name == "sqlite":
+        # FTS5 table keyed by the rowid of `chat_message`, kept in sync by triggers
+        op.execute(
+            "CREATE VIRTUAL TABLE chat_message_fts USING fts5(content, chat_id UNINDEXED)"
+        )
+        op.execute(
+            """
+            CREATE TRIGGER chat_message_fts_insert AFTER INSERT ON chat_message
+            BEGIN
+                INSERT INTO chat_message_fts (rowid, chat_id, content)
+                VALUES (new.rowid, new.chat_id, json_extract(new.data, '$.content'));
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER chat_message_fts_update AFTER UPDATE OF data ON chat_message
+            WHEN json_extract(old.data, '$.content') IS NOT json_extract(new.data, '$.content')
+            BEGIN
+                DELETE FROM chat_message_fts WHERE rowid = old.rowid;
+                INSERT INTO chat_message_fts (rowid, chat_id, content)
+                VALUES (new.rowid, new.chat_id, json_extract(new.data, '$.content'));
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER chat_message_fts_delete AFTER DELETE ON chat_message
+            BEGIN
+                DELETE FROM chat_message_fts WHERE rowid = old.rowid;
+            END
+            """
+        )
+        op.execute(
+            """
+            INSERT INTO chat_message_fts (rowid, chat_id, content)
+            SELECT rowid, chat_id, json_extract(data, '$.content') FROM chat_message
+            """
+        )
+    elif dialect_name == "postgresql":
+        op.execute(
+            """
+            ALTER TABLE chat_message ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                to_tsvector('simple', coalesce(data->>'content', ''))
+            ) STORED
+            """
+        )
+        op.create_index(
+            "ix_chat_message_search_vector",
+            "chat_message",
+            ["search_vector"],
+            postgresql_using="gin",
+        )
+
+
+def downgrade():
+    dialect_name = op.get_bind().dialect.name
+
+    if dialect_name == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS chat_message_fts_insert")
+        op.execute("DROP TRIGGER IF EXISTS chat_message_fts_update")
+        op.execute("DROP TRIGGER IF EXISTS chat_message_fts_delete")
+        op.execute("DROP TABLE IF EXISTS chat_message_fts")
+    elif dialect_name == "postgresql":
+        op.drop_index("ix_chat_message_search_vector", table_name="chat_message")
+        op.drop_column("chat_message", "search_vector")
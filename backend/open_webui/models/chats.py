@@ -1,16 +1,38 @@
+import asyncio
 import logging
 import json
+import re
 import time
 import uuid
-from typing import Optional
-
-from open_webui.internal.db import Base, get_db
+from typing import Iterator, Optional
+
+from open_webui.internal.db import (
+    Base,
+    async_fallback,
+    get_async_db,
+    get_db,
+    run_write,
+    run_write_async,
+    sqlite_write_queue,
+)
 from open_webui.models.tags import TagModel, Tag, Tags
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, REALTIME_CHAT_SAVE_INTERVAL
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
-from sqlalchemy import or_, func, select, and_, text
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Float,
+    Index,
+    Integer,
+    String,
+    Text,
+    JSON,
+    PrimaryKeyConstraint,
+)
+from sqlalchemy import or_, func, insert, select, text
+from sqlalchemy.orm import defer
 from sqlalchemy.sql import exists
 
 ####################
@@ -40,6 +62,48 @@ class Chat(Base):
     folder_id = Column(Text, nullable=True)
 
 
+class ChatMessage(Base):
+    __tablename__ = "chat_message"
+
+    # Messages of `chat.history.messages`, one row per message
+    chat_id = Column(String, primary_key=True)
+    id = Column(String, primary_key=True)
+    parent_id = Column(String, nullable=True)
+
+    data = Column(JSON)
+    # Position in `history.messages`, orders the messages created in the same second
+    seq = Column(Integer, nullable=True)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+
+class ChatMessageStatus(Base):
+    __tablename__ = "chat_message_status"
+
+    # Append-only `statusHistory` entries, merged into their message when read
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chat_id = Column(String, index=True)
+    message_id = Column(String)
+
+    data = Column(JSON)
+    created_at = Column(BigInteger)
+
+
+class ChatTag(Base):
+    __tablename__ = "chat_tag"
+
+    # Relational copy of `chat.meta.tags`, used to filter and count chats by tag
+    chat_id = Column(String)
+    tag_id = Column(String)
+    user_id = Column(String)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("chat_id", "tag_id", name="pk_chat_id_tag_id"),
+        Index("ix_chat_tag_user_id_tag_id", "user_id", "tag_id"),
+    )
+
+
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -59,6 +123,36 @@ class ChatModel(BaseModel):
     folder_id: Optional[str] = None
 
 
+class LazyChatModel(BaseModel):
+    """
+    `ChatModel` of a projection query that did not fetch the `chat` column. Accessing
+    `chat` raises instead of loading the document of every chat of a list one by one,
+    query the list as `ChatModel` when the documents are needed.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    user_id: str
+    title: str
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+    share_id: Optional[str] = None
+    archived: bool = False
+    pinned: Optional[bool] = False
+
+    meta: dict = {}
+    folder_id: Optional[str] = None
+
+    @property
+    def chat(self) -> dict:
+        raise AttributeError(
+            f"The chat document of {self.id} was not loaded by the chat list query"
+        )
+
+
 ####################
 # Forms
 ####################
@@ -104,7 +198,281 @@ class ChatTitleIdResponse(BaseModel):
     created_at: int
 
 
+def split_chat_messages(chat: dict) -> tuple[dict, dict]:
+    """
+    Split a chat document into the document stored in `chat.chat` and the messages of
+    `history.messages`, which are stored as `chat_message` rows.
+    """
+    history = chat.get("history")
+    if not isinstance(history, dict):
+        return chat, {}
+
+    messages = history.get("messages") or {}
+    history = {
+        key: value
+        for key, value in history.items()
+        if key not in ("messages", "statusId")
+    }
+    return {**chat, "history": history}, messages
+
+
+def get_chat_status_id(chat: dict) -> Optional[int]:
+    """
+    The highest `chat_message_status` id merged into the messages of a chat document
+    when it was read, see `assemble_chat_messages`.
+    """
+    history = chat.get("history")
+    status_id = history.get("statusId") if isinstance(history, dict) else None
+    return status_id if isinstance(status_id, int) else None
+
+
+def assemble_chat_messages(
+    chat: dict, messages: dict, status_id: Optional[int] = None
+) -> dict:
+    """
+    Inverse of `split_chat_messages`, rebuilds the legacy chat document returned by
+    the API. `status_id` is kept in `history.statusId` so that a full update of the
+    document only drops the status rows it holds.
+    """
+    if "history" not in chat and not messages:
+        return chat
+
+    history = {**chat.get("history", {}), "messages": messages}
+    if status_id is not None:
+        history["statusId"] = status_id
+    return {**chat, "history": history}
+
+
+def merge_status_history(message: dict, statuses: list[dict]) -> dict:
+    """
+    Append the `chat_message_status` entries of a message to its `statusHistory`.
+
+    A full chat update folds the entries into the message, but one still queued by
+    `ChatMessageStatusBuffer` (or by another worker) is written after that, while the
+    client already sent it along. Entries equal to one of the folded history are
+    skipped, each folded entry matching once.
+    """
+    if not statuses:
+        return message
+
+    status_history = message.get("statusHistory", [])
+    folded = list(status_history)
+    added = []
+    for status in statuses:
+        if status in folded:
+            folded.remove(status)
+        else:
+            added.append(status)
+
+    if not added:
+        return message
+    return {**message, "statusHistory": [*status_history, *added]}
+
+
 class ChatTable:
+    def _get_messages_by_chat_ids(
+        self, db, chat_ids: list[str], status_ids: Optional[dict] = None
+    ) -> dict[str, dict]:
+        """
+        The messages of each chat with their status rows merged in. `status_ids`, when
+        given, gets the highest id of the status rows merged for each chat.
+        """
+        messages = {chat_id: {} for chat_id in chat_ids}
+
+        # Chunked to stay below the bound parameter limit of SQLite
+        for i in range(0, len(chat_ids), 500):
+            rows = (
+                db.query(ChatMessage.chat_id, ChatMessage.id, ChatMessage.data)
+                .filter(ChatMessage.chat_id.in_(chat_ids[i : i + 500]))
+                .order_by(ChatMessage.created_at, ChatMessage.seq)
+            )
+            for chat_id, message_id, data in rows:
+                messages[chat_id][message_id] = data
+
+            statuses = (
+                db.query(
+                    ChatMessageStatus.id,
+                    ChatMessageStatus.chat_id,
+                    ChatMessageStatus.message_id,
+                    ChatMessageStatus.data,
+                )
+                .filter(ChatMessageStatus.chat_id.in_(chat_ids[i : i + 500]))
+                .order_by(ChatMessageStatus.id)
+            )
+            message_statuses = {}
+            for status_id, chat_id, message_id, data in statuses:
+                if message_id not in messages[chat_id]:
+                    continue
+                message_statuses.setdefault((chat_id, message_id), []).append(data)
+                if status_ids is not None:
+                    status_ids[chat_id] = status_id
+
+            for (chat_id, message_id), entries in message_statuses.items():
+                messages[chat_id][message_id] = merge_status_history(
+                    messages[chat_id][message_id], entries
+                )
+
+        return messages
+
+    def _to_chat_models(self, db, chats) -> list[ChatModel]:
+        chats = list(chats)
+        status_ids = {}
+        messages = self._get_messages_by_chat_ids(
+            db, [chat.id for chat in chats], status_ids
+        )
+
+        chat_models = []
+        for chat in chats:
+            chat_model = ChatModel.model_validate(chat)
+            chat_model.chat = assemble_chat_messages(
+                chat_model.chat, messages[chat.id], status_ids.get(chat.id)
+            )
+            chat_models.append(chat_model)
+        return chat_models
+
+    def _to_chat_model(self, db, chat) -> Optional[ChatModel]:
+        if chat is None:
+            return None
+        return self._to_chat_models(db, [chat])[0]
+
+    def _query_chat_list(self, db):
+        # Never fetch the `chat` column, raise instead of loading it row by row
+        return db.query(Chat).options(defer(Chat.chat, raiseload=True))
+
+    def _set_chat_messages(
+        self,
+        db,
+        chat_id: str,
+        messages: dict,
+        new: bool = False,
+        status_id: Optional[int] = None,
+    ):
+        """
+        Make the `chat_message` rows of a chat match `messages`, only writing the rows
+        of messages that were added, changed or removed.
+
+        `messages` carries the status rows up to `status_id` merged in when it was
+        read, those are dropped. Rows written since are kept and merged on read.
+        """
+        now = int(time.time())
+        rows = (
+            {}
+            if new
+            else {
+                row.id: row for row in db.query(ChatMessage).filter_by(chat_id=chat_id)
+            }
+        )
+
+        for seq, (message_id, message) in enumerate(messages.items()):
+            row = rows.pop(message_id, None)
+            if row is None:
+                db.add(
+                    ChatMessage(
+                        chat_id=chat_id,
+                        id=message_id,
+                        parent_id=message.get("parentId"),
+                        data=message,
+                        seq=seq,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                )
+            elif row.data != message or row.seq != seq:
+                row.parent_id = message.get("parentId")
+                row.data = message
+                row.seq = seq
+                row.updated_at = now
+
+        for row in rows.values():
+            db.delete(row)
+
+        if rows:
+            # Statuses of removed messages
+            db.query(ChatMessageStatus).filter(
+                ChatMessageStatus.chat_id == chat_id,
+                ChatMessageStatus.message_id.in_(rows.keys()),
+            ).delete(synchronize_session=False)
+
+        if not new and status_id is not None:
+            # An entry written meanwhile but also sent along by the client is merged
+            # once on read, see `merge_status_history`
+            db.query(ChatMessageStatus).filter(
+                ChatMessageStatus.chat_id == chat_id,
+                ChatMessageStatus.id <= status_id,
+            ).delete(synchronize_session=False)
+
+    def _set_chat_tags(self, db, chat_id: str, user_id: str, tag_ids: list[str]):
+        tag_ids = {tag_id.replace(" ", "_").lower() for tag_id in tag_ids}
+        existing_tag_ids = {
+            tag_id for (tag_id,) in db.query(ChatTag.tag_id).filter_by(chat_id=chat_id)
+        }
+
+        removed_tag_ids = existing_tag_ids - tag_ids
+        if removed_tag_ids:
+            db.query(ChatTag).filter(
+                ChatTag.chat_id == chat_id, ChatTag.tag_id.in_(removed_tag_ids)
+            ).delete(synchronize_session=False)
+
+        for tag_id in tag_ids - existing_tag_ids:
+            db.add(ChatTag(chat_id=chat_id, tag_id=tag_id, user_id=user_id))
+
+    def _delete_chat_rows(self, db, chat_ids):
+        db.query(ChatMessage).filter(ChatMessage.chat_id.in_(chat_ids)).delete(
+            synchronize_session=False
+        )
+        db.query(ChatMessageStatus).filter(
+            ChatMessageStatus.chat_id.in_(chat_ids)
+        ).delete(synchronize_session=False)
+        db.query(ChatTag).filter(ChatTag.chat_id.in_(chat_ids)).delete(
+            synchronize_session=False
+        )
+
+    def _get_search_rank_query(self, db, user_id: str, search_text: str):
+        """
+        Chats of the user with a message matching every word of the search text
+        (as a prefix), looked up in the full-text index. Lower rank is better.
+        """
+        words = re.findall(r"\w+", search_text)
+        if not words:
+            return None
+
+        dialect_name = db.bind.dialect.name
+        if dialect_name == "sqlite":
+            # FTS5 query: every word as a quoted prefix token, implicitly AND-ed, the
+            # hidden `rank` column is the bm25 score
+            query = text(
+                """
+                SELECT chat_message_fts.chat_id AS chat_id,
+                       MIN(chat_message_fts.rank) AS rank
+                FROM chat_message_fts
+                JOIN chat ON chat.id = chat_message_fts.chat_id
+                WHERE chat_message_fts MATCH :search_query AND chat.user_id = :user_id
+                GROUP BY chat_message_fts.chat_id
+                """
+            ).bindparams(
+                search_query=" ".join(f'"{word}"*' for word in words),
+                user_id=user_id,
+            )
+        elif dialect_name == "postgresql":
+            query = text(
+                """
+                SELECT chat_message.chat_id AS chat_id,
+                       -MAX(ts_rank(chat_message.search_vector, query)) AS rank
+                FROM chat_message
+                JOIN chat ON chat.id = chat_message.chat_id,
+                     to_tsquery('simple', :search_query) AS query
+                WHERE chat_message.search_vector @@ query AND chat.user_id = :user_id
+                GROUP BY chat_message.chat_id
+                """
+            ).bindparams(
+                search_query=" & ".join(f"{word}:*" for word in words),
+                user_id=user_id,
+            )
+        else:
+            raise NotImplementedError(f"Unsupported dialect: {dialect_name}")
+
+        return query.columns(chat_id=String, rank=Float).subquery()
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -123,11 +491,13 @@ class ChatTable:
                 }
             )
 
-            result = Chat(**chat.model_dump())
+            chat_data, messages = split_chat_messages(chat.chat)
+            result = Chat(**{**chat.model_dump(), "chat": chat_data})
             db.add(result)
+            self._set_chat_messages(db, id, messages, new=True)
             db.commit()
             db.refresh(result)
-            return ChatModel.model_validate(result) if result else None
+            return self._to_chat_model(db, result)
 
     def import_chat(
         self, user_id: str, form_data: ChatImportForm
@@ -152,23 +522,117 @@ class ChatTable:
                 }
             )
 
-            result = Chat(**chat.model_dump())
+            chat_data, messages = split_chat_messages(chat.chat)
+            result = Chat(**{**chat.model_dump(), "chat": chat_data})
             db.add(result)
+            self._set_chat_messages(db, id, messages, new=True)
+            self._set_chat_tags(db, id, user_id, chat.meta.get("tags", []))
             db.commit()
             db.refresh(result)
-            return ChatModel.model_validate(result) if result else None
+            return self._to_chat_model(db, result)
+
+    def import_chats(
+        self, user_id: str, forms: list[ChatImportForm]
+    ) -> list[Optional[str]]:
+        """
+        Import many chats with one multi-row insert per table in a single transaction.
+        If the transaction fails the chats are retried one by one, so only the broken
+        ones are lost. Returns the error of every chat, None if it was imported.
+        """
+        now = int(time.time())
+        errors = [None] * len(forms)
+        rows = []
+
+        for idx, form_data in enumerate(forms):
+            try:
+                id = str(uuid.uuid4())
+                chat = ChatModel(
+                    **{
+                        "id": id,
+                        "user_id": user_id,
+                        "title": (
+                            form_data.chat["title"]
+                            if "title" in form_data.chat
+                            else "New Chat"
+                        ),
+                        "chat": form_data.chat,
+                        "meta": form_data.meta or {},
+                        "pinned": form_data.pinned,
+                        "folder_id": form_data.folder_id,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                )
+                chat_data, messages = split_chat_messages(chat.chat)
+                rows.append(
+                    (
+                        idx,
+                        {**chat.model_dump(), "chat": chat_data},
+                        [
+                            {
+                                "chat_id": id,
+                                "id": message_id,
+                                "parent_id": message.get("parentId"),
+                                "data": message,
+                                "seq": seq,
+                                "created_at": now,
+                                "updated_at": now,
+                            }
+                            for seq, (message_id, message) in enumerate(
+                                messages.items()
+                            )
+                        ],
+                        [
+                            {"chat_id": id, "tag_id": tag_id, "user_id": user_id}
+                            for tag_id in {
+                                tag.replace(" ", "_").lower()
+                                for tag in chat.meta.get("tags", [])
+                            }
+                        ],
+                    )
+                )
+            except Exception as e:
+                errors[idx] = str(e)
+
+        def insert_rows(db, rows):
+            db.execute(insert(Chat), [chat for _, chat, _, _ in rows])
+            messages = [message for _, _, messages, _ in rows for message in messages]
+            if messages:
+                db.execute(insert(ChatMessage), messages)
+            tags = [tag for _, _, _, tags in rows for tag in tags]
+            if tags:
+                db.execute(insert(ChatTag), tags)
+            db.commit()
+
+        with get_db() as db:
+            try:
+                if rows:
+                    insert_rows(db, rows)
+            except Exception:
+                db.rollback()
+                for row in rows:
+                    try:
+                        insert_rows(db, [row])
+                    except Exception as e:
+                        db.rollback()
+                        errors[row[0]] = str(e)
+
+        return errors
 
     def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat_item = db.get(Chat, id)
-                chat_item.chat = chat
+                chat_item.chat, messages = split_chat_messages(chat)
                 chat_item.title = chat["title"] if "title" in chat else "New Chat"
                 chat_item.updated_at = int(time.time())
+                self._set_chat_messages(
+                    db, id, messages, status_id=get_chat_status_id(chat)
+                )
                 db.commit()
                 db.refresh(chat_item)
 
-                return ChatModel.model_validate(chat_item)
+                return self._to_chat_model(db, chat_item)
         except Exception:
             return None
 
@@ -190,10 +654,7 @@ class ChatTable:
             return None
 
         self.delete_all_tags_by_id_and_user_id(id, user.id)
-
-        for tag in chat.meta.get("tags", []):
-            if self.count_chats_by_tag_name_and_user_id(tag, user.id) == 0:
-                Tags.delete_tag_by_name_and_user_id(tag, user.id)
+        self.delete_unused_tags_by_user_id(chat.meta.get("tags", []), user.id)
 
         for tag_name in tags:
             if tag_name.lower() == "none":
@@ -210,61 +671,177 @@ class ChatTable:
         return chat.chat.get("title", "New Chat")
 
     def get_messages_by_chat_id(self, id: str) -> Optional[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            if db.get(Chat, id) is None:
+                return None
 
-        return chat.chat.get("history", {}).get("messages", {}) or {}
+            return self._get_messages_by_chat_ids(db, [id])[id]
 
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
-        chat = self.get_chat_by_id(id)
+        with get_db() as db:
+            message = db.get(ChatMessage, (id, message_id))
+            if message is None:
+                return None if db.get(Chat, id) is None else {}
+
+            statuses = [
+                status
+                for (status,) in db.query(ChatMessageStatus.data)
+                .filter_by(chat_id=id, message_id=message_id)
+                .order_by(ChatMessageStatus.id)
+            ]
+            return merge_status_history(message.data, statuses)
+
+    @async_fallback(get_message_by_id_and_message_id)
+    async def get_message_by_id_and_message_id_async(
+        self, id: str, message_id: str
+    ) -> Optional[dict]:
+        async with get_async_db() as db:
+            message = await db.get(ChatMessage, (id, message_id))
+            if message is None:
+                chat_id = await db.scalar(select(Chat.id).filter_by(id=id))
+                return None if chat_id is None else {}
+
+            statuses = (
+                await db.scalars(
+                    select(ChatMessageStatus.data)
+                    .filter_by(chat_id=id, message_id=message_id)
+                    .order_by(ChatMessageStatus.id)
+                )
+            ).all()
+            return merge_status_history(message.data, statuses)
+
+    def _next_message_seq(self, chat_id: str):
+        return select(func.coalesce(func.max(ChatMessage.seq) + 1, 0)).where(
+            ChatMessage.chat_id == chat_id
+        )
+
+    def _upsert_message(
+        self, db, id: str, message_id: str, message: dict
+    ) -> Optional[dict]:
+        chat = db.get(Chat, id)
         if chat is None:
             return None
 
-        return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
+        now = int(time.time())
+        row = db.get(ChatMessage, (id, message_id))
+        if row is None:
+            row = ChatMessage(
+                chat_id=id,
+                id=message_id,
+                data={},
+                seq=db.scalar(self._next_message_seq(id)),
+                created_at=now,
+            )
+            db.add(row)
+            # Another write of the same SQLite write queue batch finds it from now on
+            db.flush()
+
+        row.data = {**row.data, **message}
+        row.parent_id = row.data.get("parentId")
+        row.updated_at = now
+
+        history = (chat.chat or {}).get("history", {})
+        if history.get("currentId") != message_id:
+            chat.chat = {
+                **chat.chat,
+                "history": {**history, "currentId": message_id},
+            }
+        chat.updated_at = now
+
+        return row.data
 
     def upsert_message_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, message: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+    ) -> Optional[dict]:
+        """
+        Merge `message` into a single message of the chat and make it the current one.
+        Only the row of that message is written, returns the merged message.
+        """
+        return run_write(lambda db: self._upsert_message(db, id, message_id, message))
 
-        chat = chat.chat
-        history = chat.get("history", {})
+    @async_fallback(upsert_message_to_chat_by_id_and_message_id)
+    async def upsert_message_to_chat_by_id_and_message_id_async(
+        self, id: str, message_id: str, message: dict
+    ) -> Optional[dict]:
+        if sqlite_write_queue is not None:
+            return await run_write_async(
+                lambda db: self._upsert_message(db, id, message_id, message)
+            )
 
-        if message_id in history.get("messages", {}):
-            history["messages"][message_id] = {
-                **history["messages"][message_id],
-                **message,
-            }
-        else:
-            history["messages"][message_id] = message
+        async with get_async_db() as db:
+            chat = await db.get(Chat, id)
+            if chat is None:
+                return None
+
+            now = int(time.time())
+            row = await db.get(ChatMessage, (id, message_id))
+            if row is None:
+                row = ChatMessage(
+                    chat_id=id,
+                    id=message_id,
+                    data={},
+                    seq=await db.scalar(self._next_message_seq(id)),
+                    created_at=now,
+                )
+                db.add(row)
 
-        history["currentId"] = message_id
+            row.data = {**row.data, **message}
+            row.parent_id = row.data.get("parentId")
+            row.updated_at = now
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+            history = (chat.chat or {}).get("history", {})
+            if history.get("currentId") != message_id:
+                chat.chat = {
+                    **chat.chat,
+                    "history": {**history, "currentId": message_id},
+                }
+            chat.updated_at = now
+
+            await db.commit()
+            return row.data
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+    ) -> bool:
+        return self.add_message_statuses({(id, message_id): [status]})
 
-        chat = chat.chat
-        history = chat.get("history", {})
+    def add_message_statuses(self, statuses: dict[tuple[str, str], list[dict]]) -> bool:
+        """
+        Append status history entries, keyed by (chat_id, message_id), without reading
+        or rewriting the messages. They are merged into the messages when read.
+        """
+        try:
+            run_write(self._add_message_statuses(statuses))
+            return True
+        except Exception as e:
+            log.exception(f"Error adding message statuses: {e}")
+            return False
 
-        if message_id in history.get("messages", {}):
-            status_history = history["messages"][message_id].get("statusHistory", [])
-            status_history.append(status)
-            history["messages"][message_id]["statusHistory"] = status_history
+    async def add_message_statuses_async(
+        self, statuses: dict[tuple[str, str], list[dict]]
+    ) -> bool:
+        try:
+            await run_write_async(self._add_message_statuses(statuses))
+            return True
+        except Exception as e:
+            log.exception(f"Error adding message statuses: {e}")
+            return False
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+    def _add_message_statuses(self, statuses: dict[tuple[str, str], list[dict]]):
+        now = int(time.time())
+        rows = [
+            ChatMessageStatus(
+                chat_id=chat_id,
+                message_id=message_id,
+                data=status,
+                created_at=now,
+            )
+            for (chat_id, message_id), entries in statuses.items()
+            for status in entries
+        ]
+        return lambda db: db.add_all(rows)
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
@@ -286,6 +863,10 @@ class ChatTable:
             )
             shared_result = Chat(**shared_chat.model_dump())
             db.add(shared_result)
+
+            messages = self._get_messages_by_chat_ids(db, [chat_id])[chat_id]
+            self._set_chat_messages(db, shared_chat.id, messages, new=True)
+            shared_chat.chat = assemble_chat_messages(shared_chat.chat, messages)
             db.commit()
             db.refresh(shared_result)
 
@@ -312,17 +893,24 @@ class ChatTable:
                 shared_chat.title = chat.title
                 shared_chat.chat = chat.chat
 
+                messages = self._get_messages_by_chat_ids(db, [chat_id])[chat_id]
+                self._set_chat_messages(db, shared_chat.id, messages)
+
                 shared_chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(shared_chat)
 
-                return ChatModel.model_validate(shared_chat)
+                return self._to_chat_model(db, shared_chat)
         except Exception:
             return None
 
     def delete_shared_chat_by_chat_id(self, chat_id: str) -> bool:
         try:
             with get_db() as db:
+                self._delete_chat_rows(
+                    db,
+                    select(Chat.id).filter_by(user_id=f"shared-{chat_id}"),
+                )
                 db.query(Chat).filter_by(user_id=f"shared-{chat_id}").delete()
                 db.commit()
 
@@ -339,7 +927,7 @@ class ChatTable:
                 chat.share_id = share_id
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -351,7 +939,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -363,7 +951,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -382,10 +970,10 @@ class ChatTable:
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
-    ) -> list[ChatModel]:
+    ) -> list[LazyChatModel]:
 
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id, archived=True)
+            query = self._query_chat_list(db).filter_by(user_id=user_id, archived=True)
 
             if filter:
                 query_key = filter.get("query")
@@ -411,7 +999,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [LazyChatModel.model_validate(chat) for chat in all_chats]
 
     def get_chat_list_by_user_id(
         self,
@@ -420,9 +1008,9 @@ class ChatTable:
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
-    ) -> list[ChatModel]:
+    ) -> list[LazyChatModel]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
+            query = self._query_chat_list(db).filter_by(user_id=user_id)
             if not include_archived:
                 query = query.filter_by(archived=False)
 
@@ -450,7 +1038,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [LazyChatModel.model_validate(chat) for chat in all_chats]
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -492,22 +1080,22 @@ class ChatTable:
 
     def get_chat_list_by_chat_ids(
         self, chat_ids: list[str], skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
+    ) -> list[LazyChatModel]:
         with get_db() as db:
             all_chats = (
-                db.query(Chat)
+                self._query_chat_list(db)
                 .filter(Chat.id.in_(chat_ids))
                 .filter_by(archived=False)
                 .order_by(Chat.updated_at.desc())
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [LazyChatModel.model_validate(chat) for chat in all_chats]
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat = db.get(Chat, id)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -529,7 +1117,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -540,7 +1128,23 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
+
+    def iter_chats(
+        self, user_id: Optional[str] = None, batch_size: int = 100
+    ) -> Iterator[ChatModel]:
+        """
+        Yield the chats (of a user), most recently updated first, reading them in
+        batches from a server-side cursor so the whole result never is in memory.
+        """
+        with get_db() as db:
+            query = select(Chat).order_by(Chat.updated_at.desc())
+            if user_id is not None:
+                query = query.filter_by(user_id=user_id)
+
+            result = db.execute(query.execution_options(yield_per=batch_size))
+            for chats in result.scalars().partitions():
+                yield from self._to_chat_models(db, chats)
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -549,16 +1153,16 @@ class ChatTable:
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
-    def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
+    def get_pinned_chats_by_user_id(self, user_id: str) -> list[LazyChatModel]:
         with get_db() as db:
             all_chats = (
-                db.query(Chat)
+                self._query_chat_list(db)
                 .filter_by(user_id=user_id, pinned=True, archived=False)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [LazyChatModel.model_validate(chat) for chat in all_chats]
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -567,7 +1171,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_user_id_and_search_text(
         self,
@@ -576,7 +1180,7 @@ class ChatTable:
         include_archived: bool = False,
         skip: int = 0,
         limit: int = 60,
-    ) -> list[ChatModel]:
+    ) -> list[LazyChatModel]:
         """
         Filters chats based on a search query using Python, allowing pagination using skip and limit.
         """
@@ -603,115 +1207,38 @@ class ChatTable:
         search_text = " ".join(search_text_words)
 
         with get_db() as db:
-            query = db.query(Chat).filter(Chat.user_id == user_id)
+            query = self._query_chat_list(db).filter(Chat.user_id == user_id)
 
             if not include_archived:
                 query = query.filter(Chat.archived == False)
 
-            query = query.order_by(Chat.updated_at.desc())
+            # Case-insensitive search in title, messages are looked up in the search index
+            title_match = Chat.title.ilike(f"%{search_text}%")
+            rank_query = self._get_search_rank_query(db, user_id, search_text)
 
-            # Check if the database dialect is either 'sqlite' or 'postgresql'
-            dialect_name = db.bind.dialect.name
-            if dialect_name == "sqlite":
-                # SQLite case: using JSON1 extension for JSON searching
+            if rank_query is not None:
+                query = query.outerjoin(rank_query, rank_query.c.chat_id == Chat.id)
                 query = query.filter(
-                    (
-                        Chat.title.ilike(
-                            f"%{search_text}%"
-                        )  # Case-insensitive search in title
-                        | text(
-                            """
-                            EXISTS (
-                                SELECT 1 
-                                FROM json_each(Chat.chat, '$.messages') AS message 
-                                WHERE LOWER(message.value->>'content') LIKE '%' || :search_text || '%'
-                            )
-                            """
-                        )
-                    ).params(search_text=search_text)
+                    or_(title_match, rank_query.c.chat_id.isnot(None))
+                ).order_by(
+                    title_match.desc(),
+                    rank_query.c.rank.asc().nulls_last(),
+                    Chat.updated_at.desc(),
                 )
+            else:
+                query = query.filter(title_match).order_by(Chat.updated_at.desc())
 
-                # Check if there are any tags to filter, it should have all the tags
-                if "none" in tag_ids:
-                    query = query.filter(
-                        text(
-                            """
-                            NOT EXISTS (
-                                SELECT 1
-                                FROM json_each(Chat.meta, '$.tags') AS tag
-                            )
-                            """
-                        )
-                    )
-                elif tag_ids:
-                    query = query.filter(
-                        and_(
-                            *[
-                                text(
-                                    f"""
-                                    EXISTS (
-                                        SELECT 1
-                                        FROM json_each(Chat.meta, '$.tags') AS tag
-                                        WHERE tag.value = :tag_id_{tag_idx}
-                                    )
-                                    """
-                                ).params(**{f"tag_id_{tag_idx}": tag_id})
-                                for tag_idx, tag_id in enumerate(tag_ids)
-                            ]
-                        )
-                    )
-
-            elif dialect_name == "postgresql":
-                # PostgreSQL relies on proper JSON query for search
+            # Check if there are any tags to filter, it should have all the tags
+            if "none" in tag_ids:
+                query = query.filter(~exists().where(ChatTag.chat_id == Chat.id))
+            elif tag_ids:
                 query = query.filter(
-                    (
-                        Chat.title.ilike(
-                            f"%{search_text}%"
-                        )  # Case-insensitive search in title
-                        | text(
-                            """
-                            EXISTS (
-                                SELECT 1
-                                FROM json_array_elements(Chat.chat->'messages') AS message
-                                WHERE LOWER(message->>'content') LIKE '%' || :search_text || '%'
-                            )
-                            """
-                        )
-                    ).params(search_text=search_text)
-                )
-
-                # Check if there are any tags to filter, it should have all the tags
-                if "none" in tag_ids:
-                    query = query.filter(
-                        text(
-                            """
-                            NOT EXISTS (
-                                SELECT 1
-                                FROM json_array_elements_text(Chat.meta->'tags') AS tag
-                            )
-                            """
-                        )
+                    Chat.id.in_(
+                        select(ChatTag.chat_id)
+                        .filter(ChatTag.user_id == user_id, ChatTag.tag_id.in_(tag_ids))
+                        .group_by(ChatTag.chat_id)
+                        .having(func.count(ChatTag.tag_id) == len(set(tag_ids)))
                     )
-                elif tag_ids:
-                    query = query.filter(
-                        and_(
-                            *[
-                                text(
-                                    f"""
-                                    EXISTS (
-                                        SELECT 1
-                                        FROM json_array_elements_text(Chat.meta->'tags') AS tag
-                                        WHERE tag = :tag_id_{tag_idx}
-                                    )
-                                    """
-                                ).params(**{f"tag_id_{tag_idx}": tag_id})
-                                for tag_idx, tag_id in enumerate(tag_ids)
-                            ]
-                        )
-                    )
-            else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
                 )
 
             # Perform pagination at the SQL level
@@ -720,20 +1247,22 @@ class ChatTable:
             log.info(f"The number of chats: {len(all_chats)}")
 
             # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [LazyChatModel.model_validate(chat) for chat in all_chats]
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str
-    ) -> list[ChatModel]:
+    ) -> list[LazyChatModel]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(folder_id=folder_id, user_id=user_id)
+            query = self._query_chat_list(db).filter_by(
+                folder_id=folder_id, user_id=user_id
+            )
             query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
             query = query.filter_by(archived=False)
 
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [LazyChatModel.model_validate(chat) for chat in all_chats]
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -748,7 +1277,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
@@ -761,7 +1290,7 @@ class ChatTable:
                 chat.pinned = False
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -773,34 +1302,18 @@ class ChatTable:
 
     def get_chat_list_by_user_id_and_tag_name(
         self, user_id: str, tag_name: str, skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
+    ) -> list[LazyChatModel]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
             tag_id = tag_name.replace(" ", "_").lower()
-
-            log.info(f"DB dialect name: {db.bind.dialect.name}")
-            if db.bind.dialect.name == "sqlite":
-                # SQLite JSON1 querying for tags within the meta JSON field
-                query = query.filter(
-                    text(
-                        f"EXISTS (SELECT 1 FROM json_each(Chat.meta, '$.tags') WHERE json_each.value = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-            elif db.bind.dialect.name == "postgresql":
-                # PostgreSQL JSON query for tags within the meta JSON field (for `json` type)
-                query = query.filter(
-                    text(
-                        "EXISTS (SELECT 1 FROM json_array_elements_text(Chat.meta->'tags') elem WHERE elem = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-            else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
-                )
+            query = (
+                self._query_chat_list(db)
+                .join(ChatTag, ChatTag.chat_id == Chat.id)
+                .filter(ChatTag.user_id == user_id, ChatTag.tag_id == tag_id)
+            )
 
             all_chats = query.all()
             log.debug(f"all_chats: {all_chats}")
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [LazyChatModel.model_validate(chat) for chat in all_chats]
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -818,47 +1331,62 @@ class ChatTable:
                         **chat.meta,
                         "tags": list(set(chat.meta.get("tags", []) + [tag_id])),
                     }
+                    self._set_chat_tags(db, id, chat.user_id, chat.meta["tags"])
 
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
     def count_chats_by_tag_name_and_user_id(self, tag_name: str, user_id: str) -> int:
-        with get_db() as db:  # Assuming `get_db()` returns a session object
-            query = db.query(Chat).filter_by(user_id=user_id, archived=False)
-
+        with get_db() as db:
             # Normalize the tag_name for consistency
             tag_id = tag_name.replace(" ", "_").lower()
 
-            if db.bind.dialect.name == "sqlite":
-                # SQLite JSON1 support for querying the tags inside the `meta` JSON field
-                query = query.filter(
-                    text(
-                        f"EXISTS (SELECT 1 FROM json_each(Chat.meta, '$.tags') WHERE json_each.value = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-
-            elif db.bind.dialect.name == "postgresql":
-                # PostgreSQL JSONB support for querying the tags inside the `meta` JSON field
-                query = query.filter(
-                    text(
-                        "EXISTS (SELECT 1 FROM json_array_elements_text(Chat.meta->'tags') elem WHERE elem = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-
-            else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
+            count = (
+                db.query(ChatTag)
+                .join(Chat, Chat.id == ChatTag.chat_id)
+                .filter(
+                    ChatTag.user_id == user_id,
+                    ChatTag.tag_id == tag_id,
+                    Chat.archived == False,
                 )
+                .count()
+            )
 
-            # Get the count of matching records
-            count = query.count()
-
-            # Debugging output for inspection
             log.info(f"Count of chats for tag '{tag_name}': {count}")
+            return count
+
+    def delete_unused_tags_by_user_id(self, tag_names: list[str], user_id: str) -> int:
+        """
+        Delete the tags among `tag_names` that are no longer used by an unarchived
+        chat of the user, returns the number of deleted tags.
+        """
+        tag_ids = {tag_name.replace(" ", "_").lower() for tag_name in tag_names}
+        if not tag_ids:
+            return 0
 
+        with get_db() as db:
+            used_tag_ids = (
+                select(ChatTag.tag_id)
+                .join(Chat, Chat.id == ChatTag.chat_id)
+                .filter(
+                    ChatTag.user_id == user_id,
+                    ChatTag.tag_id.in_(tag_ids),
+                    Chat.archived == False,
+                )
+            )
+            count = (
+                db.query(Tag)
+                .filter(
+                    Tag.user_id == user_id,
+                    Tag.id.in_(tag_ids),
+                    Tag.id.not_in(used_tag_ids),
+                )
+                .delete(synchronize_session=False)
+            )
+            db.commit()
             return count
 
     def delete_tag_by_id_and_user_id_and_tag_name(
@@ -875,6 +1403,7 @@ class ChatTable:
                     **chat.meta,
                     "tags": list(set(tags)),
                 }
+                self._set_chat_tags(db, id, chat.user_id, chat.meta["tags"])
                 db.commit()
                 return True
         except Exception:
@@ -888,6 +1417,7 @@ class ChatTable:
                     **chat.meta,
                     "tags": [],
                 }
+                self._set_chat_tags(db, id, chat.user_id, [])
                 db.commit()
 
                 return True
@@ -897,6 +1427,7 @@ class ChatTable:
     def delete_chat_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                self._delete_chat_rows(db, [id])
                 db.query(Chat).filter_by(id=id).delete()
                 db.commit()
 
@@ -907,6 +1438,9 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
+                self._delete_chat_rows(
+                    db, select(Chat.id).filter_by(id=id, user_id=user_id)
+                )
                 db.query(Chat).filter_by(id=id, user_id=user_id).delete()
                 db.commit()
 
@@ -919,6 +1453,7 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                self._delete_chat_rows(db, select(Chat.id).filter_by(user_id=user_id))
                 db.query(Chat).filter_by(user_id=user_id).delete()
                 db.commit()
 
@@ -931,6 +1466,9 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                self._delete_chat_rows(
+                    db, select(Chat.id).filter_by(user_id=user_id, folder_id=folder_id)
+                )
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
@@ -944,6 +1482,9 @@ class ChatTable:
                 chats_by_user = db.query(Chat).filter_by(user_id=user_id).all()
                 shared_chat_ids = [f"shared-{chat.id}" for chat in chats_by_user]
 
+                self._delete_chat_rows(
+                    db, select(Chat.id).filter(Chat.user_id.in_(shared_chat_ids))
+                )
                 db.query(Chat).filter(Chat.user_id.in_(shared_chat_ids)).delete()
                 db.commit()
 
@@ -951,5 +1492,133 @@ class ChatTable:
         except Exception:
             return False
 
+    def rebuild_search_index(self) -> int:
+        """
+        Rebuild the full-text index of the chat messages, returns the number of
+        indexed messages.
+        """
+        with get_db() as db:
+            dialect_name = db.bind.dialect.name
+            if dialect_name == "sqlite":
+                db.execute(text("DELETE FROM chat_message_fts"))
+                db.execute(
+                    text(
+                        """
+                        INSERT INTO chat_message_fts (rowid, chat_id, content)
+                        SELECT rowid, chat_id, json_extract(data, '$.content')
+                        FROM chat_message
+                        """
+                    )
+                )
+            elif dialect_name == "postgresql":
+                # `search_vector` is a generated column, only the index can go stale
+                db.execute(text("REINDEX INDEX ix_chat_message_search_vector"))
+            else:
+                raise NotImplementedError(f"Unsupported dialect: {dialect_name}")
+
+            db.commit()
+            return db.query(ChatMessage).count()
+
 
 Chats = ChatTable()
+
+
+class ChatMessageWriteBuffer:
+    """
+    Write-behind buffer for message updates that are saved while a response streams.
+
+    Updates are merged per (chat_id, message_id) and written with a single upsert at most
+    once every `interval` seconds per message; `flush()` writes the pending update right
+    away and is called when the stream ends. The interval bounds how much of a message
+    can be lost if the process dies mid-stream, 0 writes every update immediately.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.pending: dict[tuple[str, str], dict] = {}
+        self.flushed_at: dict[tuple[str, str], float] = {}
+        # Writes of a message run one at a time, so that they land in order
+        self.locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    async def _write(self, key: tuple[str, str]):
+        async with self.locks.setdefault(key, asyncio.Lock()):
+            message = self.pending.pop(key, None)
+            if message is not None:
+                await Chats.upsert_message_to_chat_by_id_and_message_id_async(
+                    *key, message
+                )
+                self.flushed_at[key] = time.monotonic()
+
+    async def upsert_message(self, chat_id: str, message_id: str, message: dict):
+        key = (chat_id, message_id)
+        self.pending[key] = {**self.pending.get(key, {}), **message}
+
+        flushed_at = self.flushed_at.get(key, float("-inf"))
+        if time.monotonic() - flushed_at >= self.interval:
+            await self._write(key)
+
+    async def flush(self, chat_id: str, message_id: str):
+        key = (chat_id, message_id)
+        await self._write(key)
+        self.flushed_at.pop(key, None)
+        self.locks.pop(key, None)
+
+    async def flush_due(self):
+        now = time.monotonic()
+        for key, flushed_at in list(self.flushed_at.items()):
+            if now - flushed_at >= self.interval:
+                if key in self.pending:
+                    await self._write(key)
+                else:
+                    self.flushed_at.pop(key, None)
+                    self.locks.pop(key, None)
+
+    async def flush_all(self):
+        for key in list(self.pending.keys()):
+            await self._write(key)
+        self.flushed_at.clear()
+        self.locks.clear()
+
+    async def periodic_flush(self):
+        while True:
+            await asyncio.sleep(max(self.interval / 2, 0.1))
+            try:
+                await self.flush_due()
+            except Exception as e:
+                log.exception(f"Error flushing buffered chat messages: {e}")
+
+
+ChatMessageBuffer = ChatMessageWriteBuffer(REALTIME_CHAT_SAVE_INTERVAL)
+
+
+class ChatMessageStatusWriteBuffer:
+    """
+    Appends the status events of the event emitter without blocking the event loop.
+
+    Statuses are queued per (chat_id, message_id) and written by a single background
+    task, so the event loop never waits on the database. Everything queued while a
+    write is running goes out together with the next one.
+    """
+
+    def __init__(self):
+        self.pending: dict[tuple[str, str], list[dict]] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    def append(self, chat_id: str, message_id: str, status: dict):
+        self.pending.setdefault((chat_id, message_id), []).append(status)
+
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._write_pending())
+
+    async def _write_pending(self):
+        while self.pending:
+            pending, self.pending = self.pending, {}
+            await Chats.add_message_statuses_async(pending)
+
+    def flush_all(self):
+        pending, self.pending = self.pending, {}
+        if pending:
+            Chats.add_message_statuses(pending)
+
+
+ChatMessageStatusBuffer = ChatMessageStatusWriteBuffer()
@@ -2,10 +2,16 @@ import logging
 import time
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import (
+    Base,
+    JSONField,
+    async_fallback,
+    get_async_db,
+    get_db,
+)
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Text, JSON, select
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -147,6 +153,14 @@ class FilesTable:
         with get_db() as db:
             return [FileModel.model_validate(file) for file in db.query(File).all()]
 
+    @async_fallback(get_files)
+    async def get_files_async(self) -> list[FileModel]:
+        async with get_async_db() as db:
+            return [
+                FileModel.model_validate(file)
+                for file in await db.scalars(select(File))
+            ]
+
     def get_files_by_ids(self, ids: list[str]) -> list[FileModel]:
         with get_db() as db:
             return [
@@ -179,6 +193,14 @@ class FilesTable:
                 for file in db.query(File).filter_by(user_id=user_id).all()
             ]
 
+    @async_fallback(get_files_by_user_id)
+    async def get_files_by_user_id_async(self, user_id: str) -> list[FileModel]:
+        async with get_async_db() as db:
+            return [
+                FileModel.model_validate(file)
+                for file in await db.scalars(select(File).filter_by(user_id=user_id))
+            ]
+
     def update_file_hash_by_id(self, id: str, hash: str) -> Optional[FileModel]:
         with get_db() as db:
             try:
@@ -4,14 +4,22 @@ import time
 from typing import Optional
 import uuid
 
-from open_webui.internal.db import Base, get_db
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.internal.db import Base, async_fallback, get_async_db, get_db
+from open_webui.env import SRC_LOG_LEVELS, GROUP_MEMBERSHIP_CACHE_TTL
 
 from open_webui.models.files import FileMetadataResponse
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON, func
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Index,
+    PrimaryKeyConstraint,
+    Text,
+    JSON,
+    select,
+)
 
 
 log = logging.getLogger(__name__)
@@ -41,6 +49,20 @@ class Group(Base):
     updated_at = Column(BigInteger)
 
 
+class GroupMember(Base):
+    __tablename__ = "group_member"
+
+    # Relational copy of `group.user_ids`, used to look up the groups of a user
+    group_id = Column(Text)
+    user_id = Column(Text)
+    created_at = Column(BigInteger)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("group_id", "user_id", name="pk_group_id_user_id"),
+        Index("ix_group_member_user_id", "user_id"),
+    )
+
+
 class GroupModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: str
@@ -87,7 +109,53 @@ class GroupUpdateForm(GroupForm):
     user_ids: Optional[list[str]] = None
 
 
+class GroupMembershipCache:
+    """
+    Group ids of a user kept in the worker for `ttl` seconds, so access checks don't
+    query them again every time. Cleared whenever a group changes through this worker,
+    other workers pick the change up once their entry expires. A `ttl` of 0 turns it
+    off.
+    """
+
+    def __init__(self, ttl=0, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = {}
+
+    def get(self, user_id: str) -> Optional[list[str]]:
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return None
+
+        expires_at, group_ids = entry
+        if expires_at < time.monotonic():
+            self.entries.pop(user_id, None)
+            return None
+        return group_ids
+
+    def set(self, user_id: str, group_ids: list[str]):
+        if self.ttl <= 0:
+            return
+
+        if len(self.entries) >= self.max_size:
+            self.entries.clear()
+        self.entries[user_id] = (time.monotonic() + self.ttl, group_ids)
+
+    def clear(self):
+        self.entries.clear()
+
+
+group_membership_cache = GroupMembershipCache(ttl=GROUP_MEMBERSHIP_CACHE_TTL)
+
+
 class GroupTable:
+    def _set_group_members(self, db, id: str, user_ids: list[str]):
+        db.query(GroupMember).filter_by(group_id=id).delete()
+        db.add_all(
+            GroupMember(group_id=id, user_id=user_id, created_at=int(time.time()))
+            for user_id in dict.fromkeys(user_ids)
+        )
+
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
     ) -> Optional[GroupModel]:
@@ -105,8 +173,10 @@ class GroupTable:
             try:
                 result = Group(**group.model_dump())
                 db.add(result)
+                self._set_group_members(db, group.id, group.user_ids)
                 db.commit()
                 db.refresh(result)
+                group_membership_cache.clear()
                 if result:
                     return GroupModel.model_validate(result)
                 else:
@@ -127,16 +197,38 @@ class GroupTable:
             return [
                 GroupModel.model_validate(group)
                 for group in db.query(Group)
-                .filter(
-                    func.json_array_length(Group.user_ids) > 0
-                )  # Ensure array exists
-                .filter(
-                    Group.user_ids.cast(String).like(f'%"{user_id}"%')
-                )  # String-based check
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .filter(GroupMember.user_id == user_id)
                 .order_by(Group.updated_at.desc())
                 .all()
             ]
 
+    def get_group_ids_by_member_id(self, user_id: str) -> list[str]:
+        group_ids = group_membership_cache.get(user_id)
+        if group_ids is None:
+            with get_db() as db:
+                group_ids = [
+                    group_id
+                    for (group_id,) in db.query(GroupMember.group_id)
+                    .filter_by(user_id=user_id)
+                    .all()
+                ]
+            group_membership_cache.set(user_id, group_ids)
+        return group_ids
+
+    @async_fallback(get_group_ids_by_member_id)
+    async def get_group_ids_by_member_id_async(self, user_id: str) -> list[str]:
+        group_ids = group_membership_cache.get(user_id)
+        if group_ids is None:
+            async with get_async_db() as db:
+                group_ids = list(
+                    await db.scalars(
+                        select(GroupMember.group_id).filter_by(user_id=user_id)
+                    )
+                )
+            group_membership_cache.set(user_id, group_ids)
+        return group_ids
+
     def get_group_by_id(self, id: str) -> Optional[GroupModel]:
         try:
             with get_db() as db:
@@ -163,7 +255,10 @@ class GroupTable:
                         "updated_at": int(time.time()),
                     }
                 )
+                if form_data.user_ids is not None:
+                    self._set_group_members(db, id, form_data.user_ids)
                 db.commit()
+                group_membership_cache.clear()
                 return self.get_group_by_id(id=id)
         except Exception as e:
             log.exception(e)
@@ -173,7 +268,9 @@ class GroupTable:
         try:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
+                db.query(GroupMember).filter_by(group_id=id).delete()
                 db.commit()
+                group_membership_cache.clear()
                 return True
         except Exception:
             return False
@@ -182,7 +279,9 @@ class GroupTable:
         with get_db() as db:
             try:
                 db.query(Group).delete()
+                db.query(GroupMember).delete()
                 db.commit()
+                group_membership_cache.clear()
 
                 return True
             except Exception:
@@ -201,7 +300,9 @@ class GroupTable:
                             "updated_at": int(time.time()),
                         }
                     )
-                    db.commit()
+                db.query(GroupMember).filter_by(user_id=user_id).delete()
+                db.commit()
+                group_membership_cache.clear()
 
                 return True
             except Exception:
@@ -250,15 +351,25 @@ class GroupTable:
 
                 for group in existing_groups:
                     if group.id not in group_ids:
-                        group.user_ids.remove(user_id)
-                        db.query(Group).filter_by(id=group.id).update(
-                            {
-                                "user_ids": group.user_ids,
-                                "updated_at": int(time.time()),
-                            }
-                        )
+                        if user_id in group.user_ids:
+                            group.user_ids.remove(user_id)
+                            db.query(Group).filter_by(id=group.id).update(
+                                {
+                                    "user_ids": group.user_ids,
+                                    "updated_at": int(time.time()),
+                                }
+                            )
+                        db.query(GroupMember).filter_by(
+                            group_id=group.id, user_id=user_id
+                        ).delete()
 
                 # Add user to new groups
+                member_group_ids = {
+                    group_id
+                    for (group_id,) in db.query(GroupMember.group_id).filter_by(
+                        user_id=user_id
+                    )
+                }
                 for group in groups:
                     if user_id not in group.user_ids:
                         group.user_ids.append(user_id)
@@ -269,7 +380,19 @@ class GroupTable:
                             }
                         )
 
+                    # Checked on its own, the mirror rows may have drifted from
+                    # `user_ids`
+                    if group.id not in member_group_ids:
+                        db.add(
+                            GroupMember(
+                                group_id=group.id,
+                                user_id=user_id,
+                                created_at=int(time.time()),
+                            )
+                        )
+
                 db.commit()
+                group_membership_cache.clear()
                 return True
             except Exception as e:
                 log.exception(e)
@@ -8,7 +8,7 @@ from open_webui.models.tags import TagModel, Tag, Tags
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Boolean, Column, Index, String, Text, JSON
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
 
@@ -25,6 +25,8 @@ class MessageReaction(Base):
     name = Column(Text)
     created_at = Column(BigInteger)
 
+    __table_args__ = (Index("ix_message_reaction_message_id", "message_id"),)
+
 
 class MessageReactionModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -52,6 +54,11 @@ class Message(Base):
     created_at = Column(BigInteger)  # time_ns
     updated_at = Column(BigInteger)  # time_ns
 
+    __table_args__ = (
+        Index("ix_message_channel_id_created_at", "channel_id", "created_at"),
+        Index("ix_message_parent_id_created_at", "parent_id", "created_at"),
+    )
+
 
 class MessageModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -129,13 +136,15 @@ class MessageTable:
                 return None
 
             reactions = self.get_reactions_by_message_id(id)
-            replies = self.get_replies_by_message_id(id)
+            reply_count, latest_reply_at = self.get_reply_stats_by_message_ids(
+                [id]
+            ).get(id, (0, None))
 
             return MessageResponse(
                 **{
                     **MessageModel.model_validate(message).model_dump(),
-                    "latest_reply_at": replies[0].created_at if replies else None,
-                    "reply_count": len(replies),
+                    "latest_reply_at": latest_reply_at,
+                    "reply_count": reply_count,
                     "reactions": reactions,
                 }
             )
@@ -150,6 +159,26 @@ class MessageTable:
             )
             return [MessageModel.model_validate(message) for message in all_messages]
 
+    def get_reply_stats_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, tuple[int, int]]:
+        """Reply count and latest reply time of each of the messages with replies."""
+        if not ids:
+            return {}
+
+        with get_db() as db:
+            return {
+                parent_id: (reply_count, latest_reply_at)
+                for parent_id, reply_count, latest_reply_at in db.query(
+                    Message.parent_id,
+                    func.count(Message.id),
+                    func.max(Message.created_at),
+                )
+                .filter(Message.parent_id.in_(ids))
+                .group_by(Message.parent_id)
+                .all()
+            }
+
     def get_reply_user_ids_by_message_id(self, id: str) -> list[str]:
         with get_db() as db:
             return [
@@ -227,21 +256,44 @@ class MessageTable:
             return MessageReactionModel.model_validate(result) if result else None
 
     def get_reactions_by_message_id(self, id: str) -> list[Reactions]:
+        return self.get_reactions_by_message_ids([id]).get(id, [])
+
+    def get_reactions_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, list[Reactions]]:
+        if not ids:
+            return {}
+
         with get_db() as db:
-            all_reactions = db.query(MessageReaction).filter_by(message_id=id).all()
+            all_reactions = (
+                db.query(
+                    MessageReaction.message_id,
+                    MessageReaction.user_id,
+                    MessageReaction.name,
+                )
+                .filter(MessageReaction.message_id.in_(ids))
+                .order_by(MessageReaction.created_at)
+                .all()
+            )
 
             reactions = {}
-            for reaction in all_reactions:
-                if reaction.name not in reactions:
-                    reactions[reaction.name] = {
-                        "name": reaction.name,
+            for message_id, user_id, name in all_reactions:
+                message_reactions = reactions.setdefault(message_id, {})
+                if name not in message_reactions:
+                    message_reactions[name] = {
+                        "name": name,
                         "user_ids": [],
                         "count": 0,
                     }
-                reactions[reaction.name]["user_ids"].append(reaction.user_id)
-                reactions[reaction.name]["count"] += 1
-
-            return [Reactions(**reaction) for reaction in reactions.values()]
+                message_reactions[name]["user_ids"].append(user_id)
+                message_reactions[name]["count"] += 1
+
+            return {
+                message_id: [
+                    Reactions(**reaction) for reaction in message_reactions.values()
+                ]
+                for message_id, message_reactions in reactions.items()
+            }
 
     def remove_reaction_by_id_and_user_id_and_name(
         self, id: str, user_id: str, name: str
@@ -2,7 +2,13 @@ import logging
 import time
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import (
+    Base,
+    JSONField,
+    async_fallback,
+    get_async_db,
+    get_db,
+)
 from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.models.users import Users, UserResponse
@@ -10,12 +16,12 @@ from open_webui.models.users import Users, UserResponse
 
 from pydantic import BaseModel, ConfigDict
 
-from sqlalchemy import or_, and_, func
+from sqlalchemy import or_, and_, func, select
 from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy import BigInteger, Column, Text, JSON, Boolean
 
 
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import get_access_control_evaluator
 
 
 log = logging.getLogger(__name__)
@@ -173,6 +179,14 @@ class ModelsTable:
         with get_db() as db:
             return [ModelModel.model_validate(model) for model in db.query(Model).all()]
 
+    @async_fallback(get_all_models)
+    async def get_all_models_async(self) -> list[ModelModel]:
+        async with get_async_db() as db:
+            return [
+                ModelModel.model_validate(model)
+                for model in await db.scalars(select(Model))
+            ]
+
     def get_models(self) -> list[ModelUserResponse]:
         with get_db() as db:
             models = []
@@ -199,12 +213,7 @@ class ModelsTable:
         self, user_id: str, permission: str = "write"
     ) -> list[ModelUserResponse]:
         models = self.get_models()
-        return [
-            model
-            for model in models
-            if model.user_id == user_id
-            or has_access(user_id, permission, model.access_control)
-        ]
+        return get_access_control_evaluator(user_id).filter(models, permission)
 
     def get_model_by_id(self, id: str) -> Optional[ModelModel]:
         try:
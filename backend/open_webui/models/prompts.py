@@ -7,7 +7,7 @@ from open_webui.models.users import Users, UserResponse
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text, JSON
 
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import get_access_control_evaluator
 
 ####################
 # Prompts DB Schema
@@ -123,12 +123,7 @@ class PromptsTable:
     ) -> list[PromptUserResponse]:
         prompts = self.get_prompts()
 
-        return [
-            prompt
-            for prompt in prompts
-            if prompt.user_id == user_id
-            or has_access(user_id, permission, prompt.access_control)
-        ]
+        return get_access_control_evaluator(user_id).filter(prompts, permission)
 
     def update_prompt_by_command(
         self, command: str, form_data: PromptForm
@@ -1,7 +1,22 @@
+import asyncio
+import logging
 import time
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import (
+    Base,
+    JSONField,
+    async_fallback,
+    get_async_db,
+    get_db,
+    run_write,
+)
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    USER_CACHE_TTL,
+    USER_LAST_ACTIVE_FLUSH_INTERVAL,
+)
 
 
 from open_webui.models.chats import Chats
@@ -10,7 +25,10 @@ from open_webui.models.groups import Groups
 
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text
-from sqlalchemy import or_
+from sqlalchemy import case, or_, update
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 
 ####################
@@ -102,6 +120,49 @@ class UserUpdateForm(BaseModel):
     password: Optional[str] = None
 
 
+class UserCache:
+    """
+    Users kept in the worker for `ttl` seconds, so authenticating a request doesn't
+    query the user again every time. A user is dropped whenever it changes through
+    this worker, other workers pick the change up once their entry expires. A `ttl`
+    of 0 turns it off.
+    """
+
+    def __init__(self, ttl=0, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = {}
+
+    def get(self, id: str) -> Optional[UserModel]:
+        entry = self.entries.get(id)
+        if entry is None:
+            return None
+
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            self.entries.pop(id, None)
+            return None
+        # Callers may change the user they get, keep the cached one as it is
+        return user.model_copy(deep=True)
+
+    def set(self, user: UserModel):
+        if self.ttl <= 0:
+            return
+
+        if len(self.entries) >= self.max_size:
+            self.entries.clear()
+        self.entries[user.id] = (
+            time.monotonic() + self.ttl,
+            user.model_copy(deep=True),
+        )
+
+    def invalidate(self, id: str):
+        self.entries.pop(id, None)
+
+
+user_cache = UserCache(ttl=USER_CACHE_TTL)
+
+
 class UsersTable:
     def insert_new_user(
         self,
@@ -143,6 +204,23 @@ class UsersTable:
         except Exception:
             return None
 
+    def get_cached_user_by_id(self, id: str) -> Optional[UserModel]:
+        user = user_cache.get(id)
+        if user is None:
+            user = self.get_user_by_id(id)
+            if user is not None:
+                user_cache.set(user)
+        return user
+
+    @async_fallback(get_user_by_id)
+    async def get_user_by_id_async(self, id: str) -> Optional[UserModel]:
+        try:
+            async with get_async_db() as db:
+                user = await db.get(User, id)
+                return UserModel.model_validate(user)
+        except Exception:
+            return None
+
     def get_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -275,6 +353,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"role": role})
                 db.commit()
+                user_cache.invalidate(id)
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
@@ -289,6 +368,7 @@ class UsersTable:
                     {"profile_image_url": profile_image_url}
                 )
                 db.commit()
+                user_cache.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -296,18 +376,31 @@ class UsersTable:
             return None
 
     def update_user_last_active_by_id(self, id: str) -> Optional[UserModel]:
-        try:
-            with get_db() as db:
-                db.query(User).filter_by(id=id).update(
-                    {"last_active_at": int(time.time())}
-                )
-                db.commit()
+        def write(db):
+            db.query(User).filter_by(id=id).update({"last_active_at": int(time.time())})
+            user = db.query(User).filter_by(id=id).first()
+            return UserModel.model_validate(user) if user else None
 
-                user = db.query(User).filter_by(id=id).first()
-                return UserModel.model_validate(user)
+        try:
+            return run_write(write)
         except Exception:
             return None
 
+    def update_users_last_active(self, last_active: dict[str, int]) -> int:
+        """Sets the last active timestamps of many users in one UPDATE."""
+        if not last_active:
+            return 0
+
+        def write(db):
+            return db.execute(
+                update(User)
+                .where(User.id.in_(last_active.keys()))
+                .values(last_active_at=case(last_active, value=User.id))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+        return run_write(write)
+
     def update_user_oauth_sub_by_id(
         self, id: str, oauth_sub: str
     ) -> Optional[UserModel]:
@@ -315,6 +408,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"oauth_sub": oauth_sub})
                 db.commit()
+                user_cache.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -326,6 +420,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
+                user_cache.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -345,6 +440,7 @@ class UsersTable:
 
                 db.query(User).filter_by(id=id).update({"settings": user_settings})
                 db.commit()
+                user_cache.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -363,6 +459,7 @@ class UsersTable:
                     # Delete User
                     db.query(User).filter_by(id=id).delete()
                     db.commit()
+                    user_cache.invalidate(id)
 
                 return True
             else:
@@ -375,6 +472,7 @@ class UsersTable:
             with get_db() as db:
                 result = db.query(User).filter_by(id=id).update({"api_key": api_key})
                 db.commit()
+                user_cache.invalidate(id)
                 return True if result == 1 else False
         except Exception:
             return False
@@ -402,3 +500,42 @@ class UsersTable:
 
 
 Users = UsersTable()
+
+
+class UserLastActiveWriteBuffer:
+    """
+    Collects the last active timestamps set by every authenticated request.
+
+    Only the latest timestamp per user is kept, and all of them are written with one
+    UPDATE every `interval` seconds instead of one write per request. The interval
+    bounds how stale `last_active_at` can be, 0 writes every one immediately.
+    """
+
+    def __init__(self, interval: float, batch_size: int = 500):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pending: dict[str, int] = {}
+
+    def touch(self, user_id: str):
+        if self.interval <= 0:
+            Users.update_user_last_active_by_id(user_id)
+            return
+
+        self.pending[user_id] = int(time.time())
+
+    def flush_all(self):
+        pending, self.pending = self.pending, {}
+        items = list(pending.items())
+        for i in range(0, len(items), self.batch_size):
+            Users.update_users_last_active(dict(items[i : i + self.batch_size]))
+
+    async def periodic_flush(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.flush_all)
+            except Exception as e:
+                log.exception(f"Error flushing last active timestamps: {e}")
+
+
+UserLastActiveBuffer = UserLastActiveWriteBuffer(USER_LAST_ACTIVE_FLUSH_INTERVAL)
@@ -161,24 +161,29 @@ async def get_channel_messages(
         )
 
     message_list = Messages.get_messages_by_channel_id(id, skip, limit)
-    users = {}
+
+    # Looked up for the whole page at once instead of once per message
+    message_ids = [message.id for message in message_list]
+    reply_stats = Messages.get_reply_stats_by_message_ids(message_ids)
+    reactions = Messages.get_reactions_by_message_ids(message_ids)
+    users = {
+        user.id: user
+        for user in Users.get_users_by_user_ids(
+            list({message.user_id for message in message_list})
+        )
+    }
 
     messages = []
     for message in message_list:
-        if message.user_id not in users:
-            user = Users.get_user_by_id(message.user_id)
-            users[message.user_id] = user
-
-        replies = Messages.get_replies_by_message_id(message.id)
-        latest_reply_at = replies[0].created_at if replies else None
+        reply_count, latest_reply_at = reply_stats.get(message.id, (0, None))
 
         messages.append(
             MessageUserResponse(
                 **{
                     **message.model_dump(),
-                    "reply_count": len(replies),
+                    "reply_count": reply_count,
                     "latest_reply_at": latest_reply_at,
-                    "reactions": Messages.get_reactions_by_message_id(message.id),
+                    "reactions": reactions.get(message.id, []),
                     "user": UserNameResponse(**users[message.user_id].model_dump()),
                 }
             )
@@ -299,7 +304,7 @@ async def post_new_message(
                         to=f"channel:{channel.id}",
                     )
 
-            active_user_ids = get_user_ids_from_room(f"channel:{channel.id}")
+            active_user_ids = await get_user_ids_from_room(f"channel:{channel.id}")
 
             background_tasks.add_task(
                 send_notification,
@@ -390,21 +395,27 @@ async def get_channel_thread_messages(
         )
 
     message_list = Messages.get_messages_by_parent_id(id, message_id, skip, limit)
-    users = {}
+
+    # Looked up for the whole page at once instead of once per message
+    reactions = Messages.get_reactions_by_message_ids(
+        [message.id for message in message_list]
+    )
+    users = {
+        user.id: user
+        for user in Users.get_users_by_user_ids(
+            list({message.user_id for message in message_list})
+        )
+    }
 
     messages = []
     for message in message_list:
-        if message.user_id not in users:
-            user = Users.get_user_by_id(message.user_id)
-            users[message.user_id] = user
-
         messages.append(
             MessageUserResponse(
                 **{
                     **message.model_dump(),
                     "reply_count": 0,
                     "latest_reply_at": None,
-                    "reactions": Messages.get_reactions_by_message_id(message.id),
+                    "reactions": reactions.get(message.id, []),
                     "user": UserNameResponse(**users[message.user_id].model_dump()),
                 }
             )
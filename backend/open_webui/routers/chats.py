@@ -1,6 +1,8 @@
+import asyncio
 import json
 import logging
-from typing import Optional
+import tempfile
+from typing import Iterator, Optional
 
 
 from open_webui.socket.main import get_event_emitter
@@ -16,8 +18,9 @@ from open_webui.models.folders import Folders
 
 from open_webui.config import ENABLE_ADMIN_CHAT_ACCESS, ENABLE_ADMIN_EXPORT
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, CHAT_IMPORT_BATCH_SIZE
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 
@@ -29,6 +32,36 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 router = APIRouter()
 
+
+def stream_chat_export(chats: Iterator, format: str) -> StreamingResponse:
+    """
+    Stream chats as a JSON array or as NDJSON (one chat per line) chunk by chunk,
+    compression is applied on the fly by the `CompressMiddleware`.
+    """
+    if format not in ("json", "ndjson"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(f"Unsupported export format: {format}"),
+        )
+
+    def generator():
+        if format == "json":
+            yield b"["
+        for idx, chat in enumerate(chats):
+            line = ChatResponse(**chat.model_dump()).model_dump_json().encode("utf-8")
+            if format == "json":
+                yield line if idx == 0 else b"," + line
+            else:
+                yield line + b"\n"
+        if format == "json":
+            yield b"]"
+
+    return StreamingResponse(
+        generator(),
+        media_type="application/json" if format == "json" else "application/x-ndjson",
+    )
+
+
 ############################
 # GetChatList
 ############################
@@ -225,11 +258,8 @@ async def get_user_pinned_chats(user=Depends(get_verified_user)):
 
 
 @router.get("/all", response_model=list[ChatResponse])
-async def get_user_chats(user=Depends(get_verified_user)):
-    return [
-        ChatResponse(**chat.model_dump())
-        for chat in Chats.get_chats_by_user_id(user.id)
-    ]
+async def get_user_chats(format: str = "json", user=Depends(get_verified_user)):
+    return stream_chat_export(Chats.iter_chats(user_id=user.id), format)
 
 
 ############################
@@ -268,13 +298,13 @@ async def get_all_user_tags(user=Depends(get_verified_user)):
 
 
 @router.get("/all/db", response_model=list[ChatResponse])
-async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
+async def get_all_user_chats_in_db(format: str = "json", user=Depends(get_admin_user)):
     if not ENABLE_ADMIN_EXPORT:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
-    return [ChatResponse(**chat.model_dump()) for chat in Chats.get_chats()]
+    return stream_chat_export(Chats.iter_chats(), format)
 
 
 ############################
@@ -444,13 +474,14 @@ async def update_chat_message_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    chat = Chats.upsert_message_to_chat_by_id_and_message_id(
+    Chats.upsert_message_to_chat_by_id_and_message_id(
         id,
         message_id,
         {
             "content": form_data.content,
         },
     )
+    chat = Chats.get_chat_by_id(id)
 
     event_emitter = get_event_emitter(
         {
@@ -520,6 +551,98 @@ async def send_chat_message_event_by_id(
         return False
 
 
+############################
+# ImportChats
+############################
+
+
+def insert_missing_tags(tag_ids: set[str], user_id: str):
+    existing_tag_ids = {
+        tag.id for tag in Tags.get_tags_by_ids_and_user_id(list(tag_ids), user_id)
+    }
+    for tag_id in tag_ids - existing_tag_ids - {"none"}:
+        tag_name = " ".join([word.capitalize() for word in tag_id.split("_")])
+        Tags.insert_new_tag(tag_name, user_id)
+
+
+@router.post("/import/bulk")
+async def import_chats(request: Request, user=Depends(get_verified_user)):
+    """
+    Import chats from an NDJSON body, one `ChatImportForm` per line. The response is
+    an NDJSON stream of `error` events for the lines that could not be imported and
+    a `progress` event after every batch, the last one with `"done": true`.
+    """
+
+    async def import_batch(batch: list[tuple[int, ChatImportForm]]):
+        errors = await asyncio.to_thread(
+            Chats.import_chats, user.id, [form_data for _, form_data in batch]
+        )
+
+        tag_ids = {
+            tag.replace(" ", "_").lower()
+            for (_, form_data), error in zip(batch, errors)
+            if error is None
+            for tag in (form_data.meta or {}).get("tags", [])
+        }
+        if tag_ids:
+            await asyncio.to_thread(insert_missing_tags, tag_ids, user.id)
+
+        return [(line, error) for (line, _), error in zip(batch, errors) if error]
+
+    # The body can't be read while the response streams, spool it (to disk if large)
+    upload = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+    async for chunk in request.stream():
+        upload.write(chunk)
+    upload.seek(0)
+
+    async def generator():
+        imported = failed = 0
+        batch = []
+
+        def event(data: dict) -> bytes:
+            return json.dumps(data).encode("utf-8") + b"\n"
+
+        async def flush():
+            nonlocal imported, failed, batch
+            errors = await import_batch(batch)
+            imported += len(batch) - len(errors)
+            failed += len(errors)
+            batch = []
+
+            for line, error in errors:
+                yield event({"type": "error", "line": line, "error": error})
+            yield event({"type": "progress", "imported": imported, "failed": failed})
+
+        try:
+            for line_number, line in enumerate(upload, start=1):
+                if not line.strip():
+                    continue
+
+                try:
+                    batch.append(
+                        (line_number, ChatImportForm.model_validate_json(line))
+                    )
+                except Exception as e:
+                    failed += 1
+                    yield event({"type": "error", "line": line_number, "error": str(e)})
+
+                if len(batch) >= CHAT_IMPORT_BATCH_SIZE:
+                    async for data in flush():
+                        yield data
+
+            if batch:
+                async for data in flush():
+                    yield data
+        finally:
+            upload.close()
+
+        yield event(
+            {"type": "progress", "imported": imported, "failed": failed, "done": True}
+        )
+
+    return StreamingResponse(generator(), media_type="application/x-ndjson")
+
+
 ############################
 # DeleteChatById
 ############################
@@ -529,11 +652,8 @@ async def send_chat_message_event_by_id(
 async def delete_chat_by_id(request: Request, id: str, user=Depends(get_verified_user)):
     if user.role == "admin":
         chat = Chats.get_chat_by_id(id)
-        for tag in chat.meta.get("tags", []):
-            if Chats.count_chats_by_tag_name_and_user_id(tag, user.id) == 1:
-                Tags.delete_tag_by_name_and_user_id(tag, user.id)
-
         result = Chats.delete_chat_by_id(id)
+        Chats.delete_unused_tags_by_user_id(chat.meta.get("tags", []), user.id)
 
         return result
     else:
@@ -546,11 +666,9 @@ async def delete_chat_by_id(request: Request, id: str, user=Depends(get_verified
             )
 
         chat = Chats.get_chat_by_id(id)
-        for tag in chat.meta.get("tags", []):
-            if Chats.count_chats_by_tag_name_and_user_id(tag, user.id) == 1:
-                Tags.delete_tag_by_name_and_user_id(tag, user.id)
-
         result = Chats.delete_chat_by_id_and_user_id(id, user.id)
+        Chats.delete_unused_tags_by_user_id(chat.meta.get("tags", []), user.id)
+
         return result
 
 
@@ -659,10 +777,7 @@ async def archive_chat_by_id(id: str, user=Depends(get_verified_user)):
 
         # Delete tags if chat is archived
         if chat.archived:
-            for tag_id in chat.meta.get("tags", []):
-                if Chats.count_chats_by_tag_name_and_user_id(tag_id, user.id) == 0:
-                    log.debug(f"deleting tag: {tag_id}")
-                    Tags.delete_tag_by_name_and_user_id(tag_id, user.id)
+            Chats.delete_unused_tags_by_user_id(chat.meta.get("tags", []), user.id)
         else:
             for tag_id in chat.meta.get("tags", []):
                 tag = Tags.get_tag_by_name_and_user_id(tag_id, user.id)
@@ -825,9 +940,7 @@ async def delete_tag_by_id_and_tag_name(
     chat = Chats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         Chats.delete_tag_by_id_and_user_id_and_tag_name(id, user.id, form_data.name)
-
-        if Chats.count_chats_by_tag_name_and_user_id(form_data.name, user.id) == 0:
-            Tags.delete_tag_by_name_and_user_id(form_data.name, user.id)
+        Chats.delete_unused_tags_by_user_id([form_data.name], user.id)
 
         chat = Chats.get_chat_by_id_and_user_id(id, user.id)
         tags = chat.meta.get("tags", [])
@@ -848,10 +961,7 @@ async def delete_all_tags_by_id(id: str, user=Depends(get_verified_user)):
     chat = Chats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         Chats.delete_all_tags_by_id_and_user_id(id, user.id)
-
-        for tag in chat.meta.get("tags", []):
-            if Chats.count_chats_by_tag_name_and_user_id(tag, user.id) == 0:
-                Tags.delete_tag_by_name_and_user_id(tag, user.id)
+        Chats.delete_unused_tags_by_user_id(chat.meta.get("tags", []), user.id)
 
         return True
     else:
@@ -220,9 +220,9 @@ def upload_file(
 @router.get("/", response_model=list[FileModelResponse])
 async def list_files(user=Depends(get_verified_user), content: bool = Query(True)):
     if user.role == "admin":
-        files = Files.get_files()
+        files = await Files.get_files_async()
     else:
-        files = Files.get_files_by_user_id(user.id)
+        files = await Files.get_files_by_user_id_async(user.id)
 
     if not content:
         for file in files:
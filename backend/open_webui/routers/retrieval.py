@@ -81,6 +81,7 @@ from open_webui.utils.misc import (
 from open_webui.utils.auth import get_admin_user, get_verified_user
 
 from open_webui.config import (
+    get_config_snapshot,
     ENV,
     RAG_EMBEDDING_MODEL_AUTO_UPDATE,
     RAG_EMBEDDING_MODEL_TRUST_REMOTE_CODE,
@@ -1106,6 +1107,8 @@ def save_docs_to_vector_db(
     add: bool = False,
     user=None,
 ) -> bool:
+    config = get_config_snapshot(request)
+
     def _get_docs_info(docs: list[Document]) -> str:
         docs_info = set()
 
@@ -1140,22 +1143,20 @@ def save_docs_to_vector_db(
                 raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
 
     if split:
-        if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
+        if config.TEXT_SPLITTER in ["", "character"]:
             text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+                chunk_size=config.CHUNK_SIZE,
+                chunk_overlap=config.CHUNK_OVERLAP,
                 add_start_index=True,
             )
-        elif request.app.state.config.TEXT_SPLITTER == "token":
-            log.info(
-                f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
-            )
+        elif config.TEXT_SPLITTER == "token":
+            log.info(f"Using token text splitter: {config.TIKTOKEN_ENCODING_NAME}")
 
-            tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
+            tiktoken.get_encoding(str(config.TIKTOKEN_ENCODING_NAME))
             text_splitter = TokenTextSplitter(
-                encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+                encoding_name=str(config.TIKTOKEN_ENCODING_NAME),
+                chunk_size=config.CHUNK_SIZE,
+                chunk_overlap=config.CHUNK_OVERLAP,
                 add_start_index=True,
             )
         else:
@@ -1173,8 +1174,8 @@ def save_docs_to_vector_db(
             **(metadata if metadata else {}),
             "embedding_config": json.dumps(
                 {
-                    "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
-                    "model": request.app.state.config.RAG_EMBEDDING_MODEL,
+                    "engine": config.RAG_EMBEDDING_ENGINE,
+                    "model": config.RAG_EMBEDDING_MODEL,
                 }
             ),
         }
@@ -1207,31 +1208,31 @@ def save_docs_to_vector_db(
 
         log.info(f"adding to collection {collection_name}")
         embedding_function = get_embedding_function(
-            request.app.state.config.RAG_EMBEDDING_ENGINE,
-            request.app.state.config.RAG_EMBEDDING_MODEL,
+            config.RAG_EMBEDDING_ENGINE,
+            config.RAG_EMBEDDING_MODEL,
             request.app.state.ef,
             (
-                request.app.state.config.RAG_OPENAI_API_BASE_URL
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+                config.RAG_OPENAI_API_BASE_URL
+                if config.RAG_EMBEDDING_ENGINE == "openai"
                 else (
-                    request.app.state.config.RAG_OLLAMA_BASE_URL
-                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
-                    else request.app.state.config.RAG_AZURE_OPENAI_BASE_URL
+                    config.RAG_OLLAMA_BASE_URL
+                    if config.RAG_EMBEDDING_ENGINE == "ollama"
+                    else config.RAG_AZURE_OPENAI_BASE_URL
                 )
             ),
             (
-                request.app.state.config.RAG_OPENAI_API_KEY
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+                config.RAG_OPENAI_API_KEY
+                if config.RAG_EMBEDDING_ENGINE == "openai"
                 else (
-                    request.app.state.config.RAG_OLLAMA_API_KEY
-                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
-                    else request.app.state.config.RAG_AZURE_OPENAI_API_KEY
+                    config.RAG_OLLAMA_API_KEY
+                    if config.RAG_EMBEDDING_ENGINE == "ollama"
+                    else config.RAG_AZURE_OPENAI_API_KEY
                 )
             ),
-            request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
+            config.RAG_EMBEDDING_BATCH_SIZE,
             azure_api_version=(
-                request.app.state.config.RAG_AZURE_OPENAI_API_VERSION
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
+                config.RAG_AZURE_OPENAI_API_VERSION
+                if config.RAG_EMBEDDING_ENGINE == "azure_openai"
                 else None
             ),
         )
@@ -1275,6 +1276,8 @@ def process_file(
     form_data: ProcessFileForm,
     user=Depends(get_verified_user),
 ):
+    config = get_config_snapshot(request)
+
     try:
         file = Files.get_file_by_id(form_data.file_id)
 
@@ -1346,32 +1349,32 @@ def process_file(
             if file_path:
                 file_path = Storage.get_file(file_path)
                 loader = Loader(
-                    engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
-                    DATALAB_MARKER_API_KEY=request.app.state.config.DATALAB_MARKER_API_KEY,
-                    DATALAB_MARKER_LANGS=request.app.state.config.DATALAB_MARKER_LANGS,
-                    DATALAB_MARKER_SKIP_CACHE=request.app.state.config.DATALAB_MARKER_SKIP_CACHE,
-                    DATALAB_MARKER_FORCE_OCR=request.app.state.config.DATALAB_MARKER_FORCE_OCR,
-                    DATALAB_MARKER_PAGINATE=request.app.state.config.DATALAB_MARKER_PAGINATE,
-                    DATALAB_MARKER_STRIP_EXISTING_OCR=request.app.state.config.DATALAB_MARKER_STRIP_EXISTING_OCR,
-                    DATALAB_MARKER_DISABLE_IMAGE_EXTRACTION=request.app.state.config.DATALAB_MARKER_DISABLE_IMAGE_EXTRACTION,
-                    DATALAB_MARKER_USE_LLM=request.app.state.config.DATALAB_MARKER_USE_LLM,
-                    DATALAB_MARKER_OUTPUT_FORMAT=request.app.state.config.DATALAB_MARKER_OUTPUT_FORMAT,
-                    EXTERNAL_DOCUMENT_LOADER_URL=request.app.state.config.EXTERNAL_DOCUMENT_LOADER_URL,
-                    EXTERNAL_DOCUMENT_LOADER_API_KEY=request.app.state.config.EXTERNAL_DOCUMENT_LOADER_API_KEY,
-                    TIKA_SERVER_URL=request.app.state.config.TIKA_SERVER_URL,
-                    DOCLING_SERVER_URL=request.app.state.config.DOCLING_SERVER_URL,
+                    engine=config.CONTENT_EXTRACTION_ENGINE,
+                    DATALAB_MARKER_API_KEY=config.DATALAB_MARKER_API_KEY,
+                    DATALAB_MARKER_LANGS=config.DATALAB_MARKER_LANGS,
+                    DATALAB_MARKER_SKIP_CACHE=config.DATALAB_MARKER_SKIP_CACHE,
+                    DATALAB_MARKER_FORCE_OCR=config.DATALAB_MARKER_FORCE_OCR,
+                    DATALAB_MARKER_PAGINATE=config.DATALAB_MARKER_PAGINATE,
+                    DATALAB_MARKER_STRIP_EXISTING_OCR=config.DATALAB_MARKER_STRIP_EXISTING_OCR,
+                    DATALAB_MARKER_DISABLE_IMAGE_EXTRACTION=config.DATALAB_MARKER_DISABLE_IMAGE_EXTRACTION,
+                    DATALAB_MARKER_USE_LLM=config.DATALAB_MARKER_USE_LLM,
+                    DATALAB_MARKER_OUTPUT_FORMAT=config.DATALAB_MARKER_OUTPUT_FORMAT,
+                    EXTERNAL_DOCUMENT_LOADER_URL=config.EXTERNAL_DOCUMENT_LOADER_URL,
+                    EXTERNAL_DOCUMENT_LOADER_API_KEY=config.EXTERNAL_DOCUMENT_LOADER_API_KEY,
+                    TIKA_SERVER_URL=config.TIKA_SERVER_URL,
+                    DOCLING_SERVER_URL=config.DOCLING_SERVER_URL,
                     DOCLING_PARAMS={
-                        "ocr_engine": request.app.state.config.DOCLING_OCR_ENGINE,
-                        "ocr_lang": request.app.state.config.DOCLING_OCR_LANG,
-                        "do_picture_description": request.app.state.config.DOCLING_DO_PICTURE_DESCRIPTION,
-                        "picture_description_mode": request.app.state.config.DOCLING_PICTURE_DESCRIPTION_MODE,
-                        "picture_description_local": request.app.state.config.DOCLING_PICTURE_DESCRIPTION_LOCAL,
-                        "picture_description_api": request.app.state.config.DOCLING_PICTURE_DESCRIPTION_API,
+                        "ocr_engine": config.DOCLING_OCR_ENGINE,
+                        "ocr_lang": config.DOCLING_OCR_LANG,
+                        "do_picture_description": config.DOCLING_DO_PICTURE_DESCRIPTION,
+                        "picture_description_mode": config.DOCLING_PICTURE_DESCRIPTION_MODE,
+                        "picture_description_local": config.DOCLING_PICTURE_DESCRIPTION_LOCAL,
+                        "picture_description_api": config.DOCLING_PICTURE_DESCRIPTION_API,
                     },
-                    PDF_EXTRACT_IMAGES=request.app.state.config.PDF_EXTRACT_IMAGES,
-                    DOCUMENT_INTELLIGENCE_ENDPOINT=request.app.state.config.DOCUMENT_INTELLIGENCE_ENDPOINT,
-                    DOCUMENT_INTELLIGENCE_KEY=request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
-                    MISTRAL_OCR_API_KEY=request.app.state.config.MISTRAL_OCR_API_KEY,
+                    PDF_EXTRACT_IMAGES=config.PDF_EXTRACT_IMAGES,
+                    DOCUMENT_INTELLIGENCE_ENDPOINT=config.DOCUMENT_INTELLIGENCE_ENDPOINT,
+                    DOCUMENT_INTELLIGENCE_KEY=config.DOCUMENT_INTELLIGENCE_KEY,
+                    MISTRAL_OCR_API_KEY=config.MISTRAL_OCR_API_KEY,
                 )
                 docs = loader.load(
                     file.filename, file.meta.get("content_type"), file_path
@@ -1414,7 +1417,7 @@ def process_file(
         hash = calculate_sha256_string(text_content)
         Files.update_file_hash_by_id(file.id, hash)
 
-        if not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
+        if not config.BYPASS_EMBEDDING_AND_RETRIEVAL:
             try:
                 result = save_docs_to_vector_db(
                     request,
@@ -2,12 +2,11 @@ import asyncio
 import socketio
 import logging
 import sys
-import time
 from redis import asyncio as aioredis
 
 from open_webui.models.users import Users, UserNameResponse
 from open_webui.models.channels import Channels
-from open_webui.models.chats import Chats
+from open_webui.models.chats import Chats, ChatMessageStatusBuffer
 from open_webui.utils.redis import (
     get_sentinels_from_env,
     get_sentinel_url_from_env,
@@ -18,11 +17,20 @@ from open_webui.env import (
     WEBSOCKET_MANAGER,
     WEBSOCKET_REDIS_URL,
     WEBSOCKET_REDIS_LOCK_TIMEOUT,
+    WEBSOCKET_POOL_CACHE_TTL,
     WEBSOCKET_SENTINEL_PORT,
     WEBSOCKET_SENTINEL_HOSTS,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock
+from open_webui.socket.utils import (
+    AsyncDict,
+    AsyncExpiringSet,
+    AsyncRedisDict,
+    AsyncRedisExpiringSet,
+    AsyncRedisSetDict,
+    AsyncSetDict,
+    RedisLock,
+)
 
 from open_webui.env import (
     GLOBAL_LOG_LEVEL,
@@ -72,18 +80,23 @@ if WEBSOCKET_MANAGER == "redis":
     redis_sentinels = get_sentinels_from_env(
         WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
     )
-    SESSION_POOL = RedisDict(
+    SESSION_POOL = AsyncRedisDict(
         "open-webui:session_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
+        cache_ttl=WEBSOCKET_POOL_CACHE_TTL,
     )
-    USER_POOL = RedisDict(
-        "open-webui:user_pool",
+    # Socket ids by user id, one Redis set per user
+    USER_POOL = AsyncRedisSetDict(
+        "open-webui:user_sessions",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
+        cache_ttl=WEBSOCKET_POOL_CACHE_TTL,
     )
-    USAGE_POOL = RedisDict(
-        "open-webui:usage_pool",
+    # Models in use, scored by the time of their last usage heartbeat
+    USAGE_POOL = AsyncRedisExpiringSet(
+        "open-webui:model_usage",
+        timeout=TIMEOUT_DURATION,
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
     )
@@ -98,9 +111,9 @@ if WEBSOCKET_MANAGER == "redis":
     renew_func = clean_up_lock.renew_lock
     release_func = clean_up_lock.release_lock
 else:
-    SESSION_POOL = {}
-    USER_POOL = {}
-    USAGE_POOL = {}
+    SESSION_POOL = AsyncDict()
+    USER_POOL = AsyncSetDict()
+    USAGE_POOL = AsyncExpiringSet(timeout=TIMEOUT_DURATION)
     aquire_func = release_func = renew_func = lambda: True
 
 
@@ -115,26 +128,11 @@ async def periodic_usage_pool_cleanup():
                 log.error(f"Unable to renew cleanup lock. Exiting usage pool cleanup.")
                 raise Exception("Unable to renew usage pool cleanup lock.")
 
-            now = int(time.time())
-            send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
-                # Creating a list of sids to remove if they have timed out
-                expired_sids = [
-                    sid
-                    for sid, details in connections.items()
-                    if now - details["updated_at"] > TIMEOUT_DURATION
-                ]
-
-                for sid in expired_sids:
-                    del connections[sid]
-
-                if not connections:
-                    log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
-                else:
-                    USAGE_POOL[model_id] = connections
-
-                send_usage = True
+            # Models without a heartbeat for TIMEOUT_DURATION seconds
+            expired = await USAGE_POOL.expire()
+            if expired:
+                log.debug(f"Cleaned up {expired} models from usage pool")
+
             await asyncio.sleep(TIMEOUT_DURATION)
     finally:
         release_func()
@@ -146,61 +144,56 @@ app = socketio.ASGIApp(
 )
 
 
-def get_models_in_use():
+def get_user_room(user_id):
+    # Every socket of a user joins this room, events for the user are sent to it
+    return f"user:{user_id}"
+
+
+async def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
+    models_in_use = await USAGE_POOL.members()
     return models_in_use
 
 
-def get_active_user_ids():
+async def get_active_user_ids():
     """Get the list of active user IDs."""
-    return list(USER_POOL.keys())
+    return await USER_POOL.keys()
 
 
-def get_user_active_status(user_id):
+async def get_user_active_status(user_id):
     """Check if a user is currently active."""
-    return user_id in USER_POOL
+    return await USER_POOL.contains(user_id)
 
 
-def get_user_id_from_session_pool(sid):
-    user = SESSION_POOL.get(sid)
+async def get_user_id_from_session_pool(sid):
+    user = await SESSION_POOL.get(sid)
     if user:
         return user["id"]
     return None
 
 
-def get_user_ids_from_room(room):
+async def get_user_ids_from_room(room):
     active_session_ids = sio.manager.get_participants(
         namespace="/",
         room=room,
     )
 
-    active_user_ids = list(
-        set(
-            [SESSION_POOL.get(session_id[0])["id"] for session_id in active_session_ids]
-        )
+    users = await SESSION_POOL.get_many(
+        [session_id[0] for session_id in active_session_ids]
     )
+    active_user_ids = list(set([user["id"] for user in users if user]))
     return active_user_ids
 
 
-def get_active_status_by_user_id(user_id):
-    if user_id in USER_POOL:
-        return True
-    return False
+async def get_active_status_by_user_id(user_id):
+    return await USER_POOL.contains(user_id)
 
 
 @sio.on("usage")
 async def usage(sid, data):
-    if sid in SESSION_POOL:
-        model_id = data["model"]
+    if await SESSION_POOL.contains(sid):
         # Record the timestamp for the last update
-        current_time = int(time.time())
-
-        # Store the new usage data and task
-        USAGE_POOL[model_id] = {
-            **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-            sid: {"updated_at": current_time},
-        }
+        await USAGE_POOL.touch(data["model"])
 
 
 @sio.event
@@ -210,14 +203,12 @@ async def connect(sid, environ, auth):
         data = decode_token(auth["token"])
 
         if data is not None and "id" in data:
-            user = Users.get_user_by_id(data["id"])
+            user = await Users.get_user_by_id_async(data["id"])
 
         if user:
-            SESSION_POOL[sid] = user.model_dump()
-            if user.id in USER_POOL:
-                USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-            else:
-                USER_POOL[user.id] = [sid]
+            await SESSION_POOL.set(sid, user.model_dump())
+            await USER_POOL.add(user.id, sid)
+            await sio.enter_room(sid, get_user_room(user.id))
 
 
 @sio.on("user-join")
@@ -231,15 +222,13 @@ async def user_join(sid, data):
     if data is None or "id" not in data:
         return
 
-    user = Users.get_user_by_id(data["id"])
+    user = await Users.get_user_by_id_async(data["id"])
     if not user:
         return
 
-    SESSION_POOL[sid] = user.model_dump()
-    if user.id in USER_POOL:
-        USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-    else:
-        USER_POOL[user.id] = [sid]
+    await SESSION_POOL.set(sid, user.model_dump())
+    await USER_POOL.add(user.id, sid)
+    await sio.enter_room(sid, get_user_room(user.id))
 
     # Join all the channels
     channels = Channels.get_channels_by_user_id(user.id)
@@ -259,7 +248,7 @@ async def join_channel(sid, data):
     if data is None or "id" not in data:
         return
 
-    user = Users.get_user_by_id(data["id"])
+    user = await Users.get_user_by_id_async(data["id"])
     if not user:
         return
 
@@ -292,7 +281,7 @@ async def channel_events(sid, data):
                 "channel_id": data["channel_id"],
                 "message_id": data.get("message_id", None),
                 "data": event_data,
-                "user": UserNameResponse(**SESSION_POOL[sid]).model_dump(),
+                "user": UserNameResponse(**(await SESSION_POOL.get(sid))).model_dump(),
             },
             room=room,
         )
@@ -300,60 +289,42 @@ async def channel_events(sid, data):
 
 @sio.event
 async def disconnect(sid):
-    if sid in SESSION_POOL:
-        user = SESSION_POOL[sid]
-        del SESSION_POOL[sid]
-
-        user_id = user["id"]
-        USER_POOL[user_id] = [_sid for _sid in USER_POOL[user_id] if _sid != sid]
-
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
+    user = await SESSION_POOL.pop(sid)
+    if user:
+        await USER_POOL.remove(user["id"], sid)
     else:
         pass
         # print(f"Unknown session ID {sid} disconnected")
 
 
 def get_event_emitter(request_info, update_db=True):
+    # Resolved once, the sessions of the user are reached through their room and the
+    # session of the request is added in case it hasn't joined it
+    rooms = [get_user_room(request_info["user_id"])]
+    if request_info.get("session_id"):
+        rooms.append(request_info["session_id"])
+
     async def __event_emitter__(event_data):
-        user_id = request_info["user_id"]
-
-        session_ids = list(
-            set(
-                USER_POOL.get(user_id, [])
-                + (
-                    [request_info.get("session_id")]
-                    if request_info.get("session_id")
-                    else []
-                )
-            )
+        await sio.emit(
+            "chat-events",
+            {
+                "chat_id": request_info.get("chat_id", None),
+                "message_id": request_info.get("message_id", None),
+                "data": event_data,
+            },
+            to=rooms,
         )
 
-        emit_tasks = [
-            sio.emit(
-                "chat-events",
-                {
-                    "chat_id": request_info.get("chat_id", None),
-                    "message_id": request_info.get("message_id", None),
-                    "data": event_data,
-                },
-                to=session_id,
-            )
-            for session_id in session_ids
-        ]
-
-        await asyncio.gather(*emit_tasks)
-
         if update_db:
             if "type" in event_data and event_data["type"] == "status":
-                Chats.add_message_status_to_chat_by_id_and_message_id(
+                ChatMessageStatusBuffer.append(
                     request_info["chat_id"],
                     request_info["message_id"],
                     event_data.get("data", {}),
                 )
 
             if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
+                message = await Chats.get_message_by_id_and_message_id_async(
                     request_info["chat_id"],
                     request_info["message_id"],
                 )
@@ -362,7 +333,7 @@ def get_event_emitter(request_info, update_db=True):
                     content = message.get("content", "")
                     content += event_data.get("data", {}).get("content", "")
 
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                         request_info["chat_id"],
                         request_info["message_id"],
                         {
@@ -373,7 +344,7 @@ def get_event_emitter(request_info, update_db=True):
             if "type" in event_data and event_data["type"] == "replace":
                 content = event_data.get("data", {}).get("content", "")
 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                     request_info["chat_id"],
                     request_info["message_id"],
                     {
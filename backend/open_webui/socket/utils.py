@@ -1,7 +1,19 @@
+import asyncio
 import json
+import time
 import uuid
+from opentelemetry import metrics
+from redis.exceptions import WatchError
+
 from open_webui.utils.redis import get_redis_connection
 
+meter = metrics.get_meter(__name__)
+coalesced_events_counter = meter.create_counter(
+    name="chat.completion.events.coalesced",
+    description="Streamed chat:completion events merged into a later emit",
+    unit="1",
+)
+
 
 class RedisLock:
     def __init__(self, redis_url, lock_name, timeout_secs, redis_sentinels=[]):
@@ -89,3 +101,346 @@ class RedisDict:
         if key not in self:
             self[key] = default
         return self[key]
+
+
+_MISSING = object()
+
+
+class NearCache:
+    """
+    Values read from Redis kept in the worker for `ttl` seconds, so hot keys such as
+    the session of a socket aren't fetched again for every event. A `ttl` of 0 turns
+    it off.
+    """
+
+    def __init__(self, ttl=0, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = {}
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return _MISSING
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self.entries.pop(key, None)
+            return _MISSING
+        return value
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+
+        now = time.monotonic()
+        if len(self.entries) >= self.max_size:
+            self.entries = {
+                k: entry for k, entry in self.entries.items() if entry[0] >= now
+            }
+            if len(self.entries) >= self.max_size:
+                self.entries.clear()
+
+        self.entries[key] = (now + self.ttl, value)
+
+    def invalidate(self, key):
+        self.entries.pop(key, None)
+
+
+class AsyncRedisDict:
+    """
+    Hash of JSON values in Redis using the asyncio client, for use from the
+    Socket.IO handlers without blocking the event loop.
+    """
+
+    def __init__(self, name, redis_url, redis_sentinels=[], cache_ttl=0):
+        self.name = name
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, async_mode=True, decode_responses=True
+        )
+        self.cache = NearCache(cache_ttl)
+
+    async def get(self, key, default=None):
+        value = self.cache.get(key)
+        if value is _MISSING:
+            value = await self.redis.hget(self.name, key)
+            if value is not None:
+                value = json.loads(value)
+            self.cache.set(key, value)
+
+        return default if value is None else value
+
+    async def get_many(self, keys):
+        values = {key: self.cache.get(key) for key in keys}
+        missing = [key for key, value in values.items() if value is _MISSING]
+
+        if missing:
+            for key, value in zip(missing, await self.redis.hmget(self.name, missing)):
+                if value is not None:
+                    value = json.loads(value)
+                values[key] = value
+                self.cache.set(key, value)
+
+        return [values[key] for key in keys]
+
+    async def set(self, key, value):
+        await self.redis.hset(self.name, key, json.dumps(value))
+        self.cache.set(key, value)
+
+    async def pop(self, key, default=None):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hget(self.name, key)
+            pipe.hdel(self.name, key)
+            value, _ = await pipe.execute()
+        self.cache.invalidate(key)
+
+        return default if value is None else json.loads(value)
+
+    async def delete(self, key):
+        self.cache.invalidate(key)
+        return await self.redis.hdel(self.name, key) > 0
+
+    async def contains(self, key):
+        return await self.get(key) is not None
+
+    async def keys(self):
+        return await self.redis.hkeys(self.name)
+
+    async def items(self):
+        return [
+            (k, json.loads(v)) for k, v in (await self.redis.hgetall(self.name)).items()
+        ]
+
+
+class AsyncRedisSetDict:
+    """
+    Sets of members by key, e.g. the socket ids of every connected user.
+
+    Each key is its own Redis set so members are added and removed atomically
+    instead of rewriting a list, and a set of the non-empty keys is kept next to
+    them to list the keys without scanning.
+    """
+
+    def __init__(self, name, redis_url, redis_sentinels=[], cache_ttl=0):
+        self.name = name
+        self.keys_name = f"{name}:keys"
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, async_mode=True, decode_responses=True
+        )
+        self.cache = NearCache(cache_ttl)
+
+    def _members_name(self, key):
+        return f"{self.name}:members:{key}"
+
+    async def add(self, key, member):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.sadd(self._members_name(key), member)
+            pipe.sadd(self.keys_name, key)
+            await pipe.execute()
+        self.cache.invalidate(key)
+
+    async def remove(self, key, member):
+        members_name = self._members_name(key)
+        await self.redis.srem(members_name, member)
+        self.cache.invalidate(key)
+
+        # Drop the key once its set is empty, unless a member is added meanwhile
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(members_name)
+                    if await pipe.scard(members_name) == 0:
+                        pipe.multi()
+                        pipe.srem(self.keys_name, key)
+                        await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+
+    async def members(self, key):
+        members = self.cache.get(key)
+        if members is _MISSING:
+            members = await self.redis.smembers(self._members_name(key))
+            self.cache.set(key, members)
+        return set(members)
+
+    async def contains(self, key):
+        return len(await self.members(key)) > 0
+
+    async def keys(self):
+        return list(await self.redis.smembers(self.keys_name))
+
+
+class AsyncRedisExpiringSet:
+    """
+    Members that stay in the set for `timeout` seconds after they were last touched,
+    kept as a Redis sorted set scored by that time. Touching is a single ZADD, the
+    live members a single range query and the expired ones are dropped with one
+    range delete.
+    """
+
+    def __init__(self, name, timeout, redis_url, redis_sentinels=[]):
+        self.name = name
+        self.timeout = timeout
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, async_mode=True, decode_responses=True
+        )
+
+    async def touch(self, member):
+        await self.redis.zadd(self.name, {member: time.time()})
+
+    async def members(self):
+        return await self.redis.zrangebyscore(
+            self.name, time.time() - self.timeout, "+inf"
+        )
+
+    async def expire(self):
+        return await self.redis.zremrangebyscore(
+            self.name, "-inf", f"({time.time() - self.timeout}"
+        )
+
+
+class AsyncDict:
+    """In-memory counterpart of `AsyncRedisDict` for a single worker."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    async def get_many(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value):
+        self.data[key] = value
+
+    async def pop(self, key, default=None):
+        return self.data.pop(key, default)
+
+    async def delete(self, key):
+        return self.data.pop(key, None) is not None
+
+    async def contains(self, key):
+        return key in self.data
+
+    async def keys(self):
+        return list(self.data.keys())
+
+    async def items(self):
+        return list(self.data.items())
+
+
+class AsyncExpiringSet:
+    """In-memory counterpart of `AsyncRedisExpiringSet` for a single worker."""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.data = {}
+
+    async def touch(self, member):
+        self.data[member] = time.time()
+
+    async def members(self):
+        cutoff = time.time() - self.timeout
+        return [member for member, touched in self.data.items() if touched >= cutoff]
+
+    async def expire(self):
+        cutoff = time.time() - self.timeout
+        expired = [member for member, touched in self.data.items() if touched < cutoff]
+        for member in expired:
+            del self.data[member]
+        return len(expired)
+
+
+class AsyncSetDict:
+    """In-memory counterpart of `AsyncRedisSetDict` for a single worker."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def add(self, key, member):
+        self.data.setdefault(key, set()).add(member)
+
+    async def remove(self, key, member):
+        members = self.data.get(key)
+        if members is not None:
+            members.discard(member)
+            if not members:
+                del self.data[key]
+
+    async def members(self, key):
+        return set(self.data.get(key, ()))
+
+    async def contains(self, key):
+        return key in self.data
+
+    async def keys(self):
+        return list(self.data.keys())
+
+
+class ChatCompletionEventBuffer:
+    """
+    Coalesces the content updates of a streamed message into fewer `chat:completion`
+    emits.
+
+    `update()` only marks the content as changed; the event data is built by `get_data`
+    when the buffer is flushed, which happens `interval` ms after the first pending
+    update or once `max_updates` updates are pending, whichever comes first. Any other
+    event sent through `emit()` flushes the pending update first so ordering is kept.
+    """
+
+    def __init__(self, event_emitter, get_data, interval=0, max_updates=20):
+        self.event_emitter = event_emitter
+        self.get_data = get_data
+        self.interval = interval / 1000
+        self.max_updates = max_updates
+
+        self.pending_updates = 0
+        self.emitted_events = 0
+        self.coalesced_events = 0
+
+        self.lock = asyncio.Lock()
+        self.timer = None
+        self.flush_task = None
+
+    async def update(self, flush=False):
+        self.pending_updates += 1
+
+        if flush or self.interval <= 0 or self.pending_updates >= self.max_updates:
+            await self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(
+                self.interval, self._schedule_flush
+            )
+
+    def _schedule_flush(self):
+        self.timer = None
+        self.flush_task = asyncio.create_task(self.flush())
+
+    async def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        if self.pending_updates == 0:
+            return
+
+        coalesced = self.pending_updates - 1
+        self.pending_updates = 0
+
+        await self.event_emitter({"type": "chat:completion", "data": self.get_data()})
+
+        self.emitted_events += 1
+        if coalesced:
+            self.coalesced_events += coalesced
+            coalesced_events_counter.add(coalesced)
+
+    async def flush(self):
+        async with self.lock:
+            await self._flush()
+
+    async def emit(self, event):
+        async with self.lock:
+            await self._flush()
+            await self.event_emitter(event)
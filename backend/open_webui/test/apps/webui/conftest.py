@@ -0,0 +1,19 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The database is created on import, keep it away from the real data directory
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="open_webui_test_"))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def dispose_async_engine():
+    yield
+
+    # aiosqlite runs its connections on threads that would keep the process alive
+    db = sys.modules.get("open_webui.internal.db")
+    if db is not None:
+        asyncio.run(db.async_engine.dispose())
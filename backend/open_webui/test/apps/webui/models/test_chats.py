@@ -0,0 +1,182 @@
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+import open_webui.config  # noqa: F401, runs the migrations
+from open_webui.models.chats import (
+    ChatForm,
+    ChatMessageWriteBuffer,
+    Chats,
+    merge_status_history,
+)
+
+MIGRATIONS_DIR = Path(open_webui.config.__file__).parent / "migrations" / "versions"
+
+
+def load_migration(name: str):
+    spec = importlib.util.spec_from_file_location(name, MIGRATIONS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def new_chat(message_ids: list[str]):
+    messages = {
+        message_id: {"id": message_id, "content": message_id}
+        for message_id in message_ids
+    }
+    return Chats.insert_new_chat(
+        "user",
+        ChatForm(
+            chat={
+                "title": "Chat",
+                "history": {"currentId": message_ids[-1], "messages": messages},
+            }
+        ),
+    )
+
+
+def get_message_ids(chat_id: str) -> list[str]:
+    return list(Chats.get_chat_by_id(chat_id).chat["history"]["messages"])
+
+
+def test_messages_created_together_keep_their_order():
+    chat = new_chat(["5", "3", "9", "1", "7"])
+    assert get_message_ids(chat.id) == ["5", "3", "9", "1", "7"]
+
+
+def test_upserted_messages_come_last():
+    chat = new_chat(["b", "a"])
+    Chats.upsert_message_to_chat_by_id_and_message_id(chat.id, "d", {"content": ""})
+    Chats.upsert_message_to_chat_by_id_and_message_id(chat.id, "c", {"content": ""})
+    Chats.upsert_message_to_chat_by_id_and_message_id(chat.id, "b", {"content": ""})
+
+    assert get_message_ids(chat.id) == ["b", "a", "d", "c"]
+
+
+def test_update_keeps_the_order_of_the_document():
+    chat = new_chat(["b", "a"])
+    document = Chats.get_chat_by_id(chat.id).chat
+    document["history"]["messages"]["c"] = {"id": "c", "content": "c"}
+
+    Chats.update_chat_by_id(chat.id, document)
+    assert get_message_ids(chat.id) == ["b", "a", "c"]
+
+
+def test_chat_list_does_not_load_the_documents():
+    chat = new_chat(["a"])
+    (listed,) = Chats.get_chat_list_by_chat_ids([chat.id])
+
+    assert listed.title == "Chat"
+    assert "chat" not in listed.model_dump()
+    with pytest.raises(AttributeError):
+        listed.chat
+
+
+def test_migration_dates_messages_by_timestamp_in_order():
+    migration = load_migration("d31026856c01_add_chat_message_table")
+    messages = {
+        "a": {"id": "a"},
+        "b": {"id": "b", "timestamp": 200},
+        "c": {"id": "c", "timestamp": 100},
+        "d": {"id": "d"},
+        "e": {"id": "e", "timestamp": 300},
+    }
+
+    rows = migration.get_message_rows("chat", messages, now=1000)
+    assert [(row["id"], row["seq"], row["created_at"]) for row in rows] == [
+        ("a", 0, 200),
+        ("b", 1, 200),
+        ("c", 2, 200),
+        ("d", 3, 200),
+        ("e", 4, 300),
+    ]
+
+    # Without any timestamp they are dated by the migration
+    rows = migration.get_message_rows("chat", {"a": {}}, now=1000)
+    assert rows[0]["created_at"] == 1000
+
+
+def test_status_written_after_a_full_update_is_merged_once():
+    chat = new_chat(["a"])
+    searching = {"action": "web_search", "description": "Searching"}
+    done = {"action": "web_search", "description": "Done", "done": True}
+    Chats.add_message_statuses({(chat.id, "a"): [searching]})
+
+    # The client saves the chat with both statuses, while the last one is still
+    # queued by the status write buffer
+    document = Chats.get_chat_by_id(chat.id).chat
+    document["history"]["messages"]["a"]["statusHistory"].append(done)
+    Chats.update_chat_by_id(chat.id, document)
+    Chats.add_message_statuses({(chat.id, "a"): [done]})
+
+    assert Chats.get_message_by_id_and_message_id(chat.id, "a")["statusHistory"] == [
+        searching,
+        done,
+    ]
+
+    reading = {"action": "web_search", "description": "Reading"}
+    Chats.add_message_statuses({(chat.id, "a"): [reading]})
+    messages = Chats.get_chat_by_id(chat.id).chat["history"]["messages"]
+    assert messages["a"]["statusHistory"] == [searching, done, reading]
+
+
+def test_status_written_after_the_chat_was_read_survives_a_full_update():
+    chat = new_chat(["a"])
+    searching = {"action": "web_search", "description": "Searching"}
+    reading = {"action": "web_search", "description": "Reading"}
+    Chats.add_message_statuses({(chat.id, "a"): [searching]})
+
+    document = Chats.get_chat_by_id(chat.id).chat
+    Chats.add_message_statuses({(chat.id, "a"): [reading]})
+    Chats.update_chat_by_id(chat.id, document)
+
+    messages = Chats.get_chat_by_id(chat.id).chat["history"]["messages"]
+    assert messages["a"]["statusHistory"] == [searching, reading]
+
+    # The statuses of a removed message go with it
+    document = Chats.get_chat_by_id(chat.id).chat
+    document["history"]["messages"]["b"] = {"id": "b", "content": "b"}
+    del document["history"]["messages"]["a"]
+    Chats.update_chat_by_id(chat.id, document)
+    document["history"]["messages"]["a"] = {"id": "a", "content": "a"}
+    Chats.update_chat_by_id(chat.id, document)
+
+    messages = Chats.get_chat_by_id(chat.id).chat["history"]["messages"]
+    assert "statusHistory" not in messages["a"]
+
+
+def test_write_buffer_merges_updates_until_flushed():
+    chat = new_chat(["a"])
+    buffer = ChatMessageWriteBuffer(interval=60)
+
+    async def stream():
+        await buffer.upsert_message(chat.id, "b", {"role": "assistant"})
+        await buffer.upsert_message(chat.id, "b", {"content": "Hel"})
+        await buffer.upsert_message(chat.id, "b", {"content": "Hello"})
+        assert Chats.get_message_by_id_and_message_id(chat.id, "b") == {
+            "role": "assistant"
+        }
+
+        await buffer.flush(chat.id, "b")
+
+    asyncio.run(stream())
+    assert Chats.get_message_by_id_and_message_id(chat.id, "b") == {
+        "role": "assistant",
+        "content": "Hello",
+    }
+    assert buffer.pending == {} and buffer.flushed_at == {}
+
+
+def test_merge_status_history():
+    status = {"description": "Searching"}
+
+    assert merge_status_history({}, [status, status]) == {
+        "statusHistory": [status, status]
+    }
+    assert merge_status_history({"statusHistory": [status]}, [status, status]) == {
+        "statusHistory": [status, status]
+    }
+    assert merge_status_history({"content": ""}, []) == {"content": ""}
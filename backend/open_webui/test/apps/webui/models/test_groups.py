@@ -0,0 +1,61 @@
+import time
+import uuid
+
+import open_webui.config  # noqa: F401, runs the migrations
+from open_webui.internal.db import get_db
+from open_webui.models.groups import Group, GroupForm, GroupMember, Groups
+
+
+def new_group():
+    return Groups.insert_new_group(
+        "admin", GroupForm(name=str(uuid.uuid4()), description="")
+    )
+
+
+def get_member_group_ids(user_id: str) -> set[str]:
+    with get_db() as db:
+        return {
+            group_id
+            for (group_id,) in db.query(GroupMember.group_id).filter_by(user_id=user_id)
+        }
+
+
+def test_sync_groups_by_group_names():
+    first, second, third = new_group(), new_group(), new_group()
+    user_id = str(uuid.uuid4())
+
+    assert Groups.sync_groups_by_group_names(user_id, [first.name, second.name])
+    assert get_member_group_ids(user_id) == {first.id, second.id}
+
+    assert Groups.sync_groups_by_group_names(user_id, [second.name, third.name])
+    assert get_member_group_ids(user_id) == {second.id, third.id}
+    assert Groups.get_group_by_id(first.id).user_ids == []
+    assert Groups.get_group_by_id(third.id).user_ids == [user_id]
+    assert sorted(Groups.get_group_ids_by_member_id(user_id)) == sorted(
+        [second.id, third.id]
+    )
+
+
+def test_sync_groups_by_group_names_with_drifted_members():
+    in_mirror_only, in_user_ids_only, leaving = new_group(), new_group(), new_group()
+    user_id = str(uuid.uuid4())
+
+    with get_db() as db:
+        for group in (in_mirror_only, leaving):
+            db.add(
+                GroupMember(
+                    group_id=group.id, user_id=user_id, created_at=int(time.time())
+                )
+            )
+        db.query(Group).filter_by(id=in_user_ids_only.id).update(
+            {"user_ids": [user_id]}
+        )
+        db.commit()
+
+    assert Groups.sync_groups_by_group_names(
+        user_id, [in_mirror_only.name, in_user_ids_only.name]
+    )
+    assert get_member_group_ids(user_id) == {in_mirror_only.id, in_user_ids_only.id}
+    assert Groups.get_group_by_id(in_mirror_only.id).user_ids == [user_id]
+    assert Groups.get_group_by_id(in_user_ids_only.id).user_ids == [user_id]
+    assert Groups.get_group_by_id(leaving.id).user_ids == []
@@ -0,0 +1,76 @@
+import uuid
+
+import open_webui.config  # noqa: F401, runs the migrations
+from open_webui.internal.db import get_db
+from open_webui.models.messages import (
+    MessageForm,
+    MessageReaction,
+    Messages,
+    Reactions,
+)
+
+
+def get_reply_stats(id: str):
+    """Per-message reply stats, as the channel listing computed them before."""
+    replies = Messages.get_replies_by_message_id(id)
+    return len(replies), replies[0].created_at if replies else None
+
+
+def get_reactions(id: str) -> list[Reactions]:
+    """Per-message reactions, as `get_reactions_by_message_id` loaded them before."""
+    with get_db() as db:
+        reactions = {}
+        for reaction in db.query(MessageReaction).filter_by(message_id=id).all():
+            entry = reactions.setdefault(
+                reaction.name, {"name": reaction.name, "user_ids": [], "count": 0}
+            )
+            entry["user_ids"].append(reaction.user_id)
+            entry["count"] += 1
+        return [Reactions(**reaction) for reaction in reactions.values()]
+
+
+def new_message(channel_id: str, parent_id=None, user_id="user-1"):
+    return Messages.insert_new_message(
+        MessageForm(content="Hello", parent_id=parent_id), channel_id, user_id
+    )
+
+
+def test_batched_stats_match_per_message_results():
+    channel_id = str(uuid.uuid4())
+    quiet, replied, popular = [new_message(channel_id) for _ in range(3)]
+
+    for user_id in ["user-1", "user-2", "user-1"]:
+        new_message(channel_id, parent_id=replied.id, user_id=user_id)
+    new_message(channel_id, parent_id=popular.id)
+
+    # Several users on one emoji, and a second emoji
+    for user_id in ["user-1", "user-2", "user-3"]:
+        Messages.add_reaction_to_message(popular.id, user_id, "thumbsup")
+    Messages.add_reaction_to_message(popular.id, "user-2", "heart")
+    Messages.add_reaction_to_message(replied.id, "user-3", "heart")
+
+    ids = [quiet.id, replied.id, popular.id]
+    reply_stats = Messages.get_reply_stats_by_message_ids(ids)
+    reactions = Messages.get_reactions_by_message_ids(ids)
+
+    for id in ids:
+        reply_count, latest_reply_at = reply_stats.get(id, (0, None))
+        assert (reply_count, latest_reply_at) == get_reply_stats(id)
+        assert reactions.get(id, []) == get_reactions(id)
+        assert Messages.get_reactions_by_message_id(id) == get_reactions(id)
+
+    # No replies and no reactions
+    assert quiet.id not in reply_stats
+    assert quiet.id not in reactions
+
+    assert reply_stats[replied.id][0] == 3
+    assert reactions[popular.id] == [
+        Reactions(name="thumbsup", user_ids=["user-1", "user-2", "user-3"], count=3),
+        Reactions(name="heart", user_ids=["user-2"], count=1),
+    ]
+
+
+def test_batched_stats_of_no_messages():
+    assert Messages.get_reply_stats_by_message_ids([]) == {}
+    assert Messages.get_reactions_by_message_ids([]) == {}
+    assert Messages.get_reactions_by_message_id(str(uuid.uuid4())) == []
@@ -0,0 +1,88 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+import open_webui.config  # noqa: F401, runs the migrations
+from open_webui.internal.db import (
+    QueryStats,
+    engine,
+    get_db,
+    query_stats,
+    start_query_timer,
+    stop_query_timer,
+)
+
+
+@pytest.fixture
+def listeners():
+    # Registered on import only when ENABLE_DATABASE_QUERY_STATS is set
+    registered = event.contains(engine, "before_cursor_execute", start_query_timer)
+    if not registered:
+        event.listen(engine, "before_cursor_execute", start_query_timer)
+        event.listen(engine, "after_cursor_execute", stop_query_timer)
+    yield
+    if not registered:
+        event.remove(engine, "before_cursor_execute", start_query_timer)
+        event.remove(engine, "after_cursor_execute", stop_query_timer)
+
+
+def test_query_stats_keeps_the_slowest():
+    stats = QueryStats(slowest_size=2)
+    for statement, duration in [("a", 0.002), ("b", 0.001), ("c", 0.004), ("d", 0.003)]:
+        stats.record(statement, duration)
+
+    assert stats.count == 4
+    assert stats.duration == pytest.approx(0.01)
+    assert stats.slowest == [(0.004, "c"), (0.003, "d")]
+    assert stats.server_timing() == 'db;dur=10.0;desc="4 queries"'
+
+
+def test_queries_are_recorded_only_while_set(listeners):
+    with get_db() as db:
+        db.execute(text("SELECT 1"))
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        try:
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 2"))
+        finally:
+            query_stats.reset(token)
+
+        db.execute(text("SELECT 3"))
+
+    assert stats.count == 2
+    assert sorted(statement for _, statement in stats.slowest) == [
+        "SELECT 1",
+        "SELECT 2",
+    ]
+
+
+def test_queries_of_an_endpoint_are_counted(listeners):
+    app = FastAPI()
+
+    # As the middleware of open_webui.main
+    @app.middleware("http")
+    async def record_query_stats(request: Request, call_next):
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            query_stats.reset(token)
+
+        response.headers.append("Server-Timing", stats.server_timing())
+        return response
+
+    # A sync endpoint, run in a worker thread that gets a copy of the context
+    @app.get("/items")
+    def get_items():
+        with get_db() as db:
+            return [db.execute(text(f"SELECT {i}")).scalar() for i in range(3)]
+
+    with TestClient(app) as client:
+        response = client.get("/items")
+
+    assert response.json() == [0, 1, 2]
+    assert response.headers["Server-Timing"].endswith('desc="3 queries"')
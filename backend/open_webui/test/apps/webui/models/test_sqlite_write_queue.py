@@ -0,0 +1,39 @@
+import threading
+
+import open_webui.config  # noqa: F401, runs the migrations
+from open_webui.internal.db import SessionLocal, SQLiteWriteQueue
+from open_webui.models.chats import ChatForm, Chats
+
+
+def test_writes_to_the_same_new_message_in_one_batch():
+    chat = Chats.insert_new_chat(
+        "user", ChatForm(chat={"title": "Chat", "history": {"messages": {}}})
+    )
+
+    write_queue = SQLiteWriteQueue(SessionLocal)
+    one_by_one = []
+    run_one_by_one = write_queue._run_one_by_one
+    write_queue._run_one_by_one = lambda db, batch: (
+        one_by_one.append(batch),
+        run_one_by_one(db, batch),
+    )
+
+    # Hold the writer so that both writes are queued before the next batch starts
+    release = threading.Event()
+    write_queue.submit(lambda db: release.wait(5))
+    futures = [
+        write_queue.submit(
+            lambda db, message=message: Chats._upsert_message(
+                db, chat.id, "new", message
+            )
+        )
+        for message in ({"role": "assistant"}, {"content": "Hello"})
+    ]
+    release.set()
+
+    assert futures[1].result(5) == {"role": "assistant", "content": "Hello"}
+    assert futures[0].result(5) == {"role": "assistant"}
+    assert one_by_one == []
+
+    messages = Chats.get_chat_by_id(chat.id).chat["history"]["messages"]
+    assert messages == {"new": {"role": "assistant", "content": "Hello"}}
@@ -0,0 +1,124 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+import open_webui.config  # noqa: F401, runs the migrations
+from open_webui.models import users as users_module
+from open_webui.models.users import (
+    UserLastActiveWriteBuffer,
+    Users,
+    user_cache,
+)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(user_cache, "ttl", 60)
+    yield user_cache
+    user_cache.entries.clear()
+
+
+def new_user(name="User"):
+    id = str(uuid.uuid4())
+    return Users.insert_new_user(id, name, f"{id}@example.com")
+
+
+def test_user_cache_is_invalidated_on_update(cache):
+    user = new_user()
+    assert Users.get_cached_user_by_id(user.id).name == "User"
+    assert user.id in cache.entries
+
+    Users.update_user_by_id(user.id, {"name": "Renamed"})
+    assert Users.get_cached_user_by_id(user.id).name == "Renamed"
+
+    Users.update_user_role_by_id(user.id, "admin")
+    assert Users.get_cached_user_by_id(user.id).role == "admin"
+
+    Users.update_user_settings_by_id(user.id, {"ui": {"theme": "dark"}})
+    assert Users.get_cached_user_by_id(user.id).settings.ui == {"theme": "dark"}
+
+
+def test_user_cache_is_invalidated_on_delete(cache):
+    user = new_user()
+    assert Users.get_cached_user_by_id(user.id) is not None
+
+    assert Users.delete_user_by_id(user.id)
+    assert user.id not in cache.entries
+    assert Users.get_cached_user_by_id(user.id) is None
+
+
+def test_user_cache_returns_copies(cache):
+    user = new_user()
+    Users.get_cached_user_by_id(user.id).name = "Changed"
+
+    assert Users.get_cached_user_by_id(user.id).name == "User"
+
+
+def test_update_users_last_active_sets_each_timestamp():
+    users = [new_user() for _ in range(3)]
+    before = Users.get_user_by_id(users[2].id).last_active_at
+
+    assert Users.update_users_last_active({users[0].id: 100, users[1].id: 200}) == 2
+    assert Users.get_user_by_id(users[0].id).last_active_at == 100
+    assert Users.get_user_by_id(users[1].id).last_active_at == 200
+    assert Users.get_user_by_id(users[2].id).last_active_at == before
+
+    assert Users.update_users_last_active({}) == 0
+
+
+def test_last_active_buffer_writes_the_latest_timestamps_in_batches(monkeypatch):
+    users = [new_user() for _ in range(5)]
+    buffer = UserLastActiveWriteBuffer(interval=60, batch_size=2)
+
+    batches = []
+    update_users_last_active = Users.update_users_last_active
+    monkeypatch.setattr(
+        Users,
+        "update_users_last_active",
+        lambda last_active: (
+            batches.append(last_active),
+            update_users_last_active(last_active),
+        )[1],
+    )
+
+    clock = iter(range(1000, 2000, 10))
+    monkeypatch.setattr(users_module, "time", SimpleNamespace(time=lambda: next(clock)))
+    for user in users + users[:1]:
+        buffer.touch(user.id)
+
+    buffer.flush_all()
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert buffer.pending == {}
+
+    # The second touch of the first user wins
+    assert Users.get_user_by_id(users[0].id).last_active_at == 1050
+    assert [Users.get_user_by_id(user.id).last_active_at for user in users[1:]] == [
+        1010,
+        1020,
+        1030,
+        1040,
+    ]
+
+
+def test_last_active_buffer_flushes_on_shutdown():
+    user = new_user()
+
+    async def run():
+        # As the app lifespan does: the periodic task is cancelled on shutdown, then
+        # what it didn't write yet is flushed
+        buffer = UserLastActiveWriteBuffer(interval=60)
+        task = asyncio.create_task(buffer.periodic_flush())
+        await asyncio.sleep(0)
+
+        buffer.pending[user.id] = 1234
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert Users.get_user_by_id(user.id).last_active_at != 1234
+
+        buffer.flush_all()
+
+    asyncio.run(run())
+    assert Users.get_user_by_id(user.id).last_active_at == 1234
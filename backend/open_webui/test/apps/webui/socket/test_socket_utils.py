@@ -0,0 +1,206 @@
+import asyncio
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from open_webui.socket import utils
+from open_webui.socket.utils import (
+    AsyncExpiringSet,
+    AsyncRedisExpiringSet,
+    AsyncRedisSetDict,
+    AsyncSetDict,
+    ChatCompletionEventBuffer,
+)
+
+
+class Stream:
+    """A streamed message whose content events go through a `ChatCompletionEventBuffer`."""
+
+    def __init__(self, **kwargs):
+        self.content = ""
+        self.events = []
+
+        async def event_emitter(event):
+            self.events.append(event)
+
+        self.buffer = ChatCompletionEventBuffer(
+            event_emitter, lambda: {"content": self.content}, **kwargs
+        )
+
+    async def append(self, value):
+        self.content += value
+        await self.buffer.update()
+
+
+def content_event(content):
+    return {"type": "chat:completion", "data": {"content": content}}
+
+
+def test_event_buffer_coalesces_at_max_updates():
+    async def run():
+        stream = Stream(interval=10000, max_updates=3)
+        for value in "abcdefg":
+            await stream.append(value)
+
+        assert stream.events == [content_event("abc"), content_event("abcdef")]
+        assert stream.buffer.pending_updates == 1
+
+        await stream.buffer.flush()
+        assert stream.events[-1] == content_event("abcdefg")
+        assert stream.buffer.emitted_events == 3
+        assert stream.buffer.coalesced_events == 4
+
+    asyncio.run(run())
+
+
+def test_event_buffer_flushes_after_interval():
+    async def run():
+        stream = Stream(interval=20, max_updates=100)
+        await stream.append("a")
+        await stream.append("b")
+        assert stream.events == []
+
+        await asyncio.sleep(0.1)
+        assert stream.events == [content_event("ab")]
+
+        # Nothing pending, the timer isn't armed again
+        await asyncio.sleep(0.05)
+        assert stream.buffer.timer is None
+        assert len(stream.events) == 1
+
+        await stream.append("c")
+        await asyncio.sleep(0.1)
+        assert stream.events == [content_event("ab"), content_event("abc")]
+
+    asyncio.run(run())
+
+
+def test_event_buffer_emit_flushes_pending_content_first():
+    async def run():
+        stream = Stream(interval=10000, max_updates=100)
+        await stream.append("a")
+        await stream.append("b")
+
+        status = {"type": "status", "data": {"description": "Searching"}}
+        await stream.buffer.emit(status)
+        assert stream.events == [content_event("ab"), status]
+
+        # Nothing pending, only the event goes out
+        await stream.buffer.emit(status)
+        assert stream.events == [content_event("ab"), status, status]
+        assert stream.buffer.timer is None
+
+    asyncio.run(run())
+
+
+def test_event_buffer_without_interval_emits_every_update():
+    async def run():
+        stream = Stream(interval=0)
+        for value in "abc":
+            await stream.append(value)
+
+        assert stream.events == [
+            content_event("a"),
+            content_event("ab"),
+            content_event("abc"),
+        ]
+
+    asyncio.run(run())
+
+
+def redis_set_dict():
+    set_dict = AsyncRedisSetDict("test:sets", "redis://localhost:6379/0")
+    set_dict.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    return set_dict
+
+
+def redis_expiring_set(timeout):
+    expiring_set = AsyncRedisExpiringSet(
+        "test:expiring", timeout, "redis://localhost:6379/0"
+    )
+    expiring_set.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    return expiring_set
+
+
+@pytest.mark.parametrize("new_set_dict", [AsyncSetDict, redis_set_dict])
+def test_set_dict(new_set_dict):
+    async def run():
+        set_dict = new_set_dict()
+        await set_dict.add("user-1", "sid-1")
+        await set_dict.add("user-1", "sid-2")
+        await set_dict.add("user-1", "sid-2")
+        await set_dict.add("user-2", "sid-3")
+
+        assert await set_dict.members("user-1") == {"sid-1", "sid-2"}
+        assert await set_dict.members("user-3") == set()
+        assert await set_dict.contains("user-1")
+        assert not await set_dict.contains("user-3")
+        assert sorted(await set_dict.keys()) == ["user-1", "user-2"]
+
+        # The key stays until its last member is removed
+        await set_dict.remove("user-1", "sid-1")
+        assert await set_dict.members("user-1") == {"sid-2"}
+        assert sorted(await set_dict.keys()) == ["user-1", "user-2"]
+
+        await set_dict.remove("user-1", "sid-2")
+        assert await set_dict.members("user-1") == set()
+        assert not await set_dict.contains("user-1")
+        assert await set_dict.keys() == ["user-2"]
+
+        # Removing what isn't there is a no-op
+        await set_dict.remove("user-1", "sid-1")
+        await set_dict.remove("user-2", "sid-1")
+        assert await set_dict.keys() == ["user-2"]
+        assert await set_dict.members("user-2") == {"sid-3"}
+
+    asyncio.run(run())
+
+
+def test_redis_set_dict_members_are_copies():
+    async def run():
+        set_dict = AsyncRedisSetDict(
+            "test:sets", "redis://localhost:6379/0", cache_ttl=60
+        )
+        set_dict.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        await set_dict.add("user-1", "sid-1")
+
+        (await set_dict.members("user-1")).add("sid-2")
+        assert await set_dict.members("user-1") == {"sid-1"}
+
+        # Writes through this worker drop the cached members
+        await set_dict.add("user-1", "sid-2")
+        assert await set_dict.members("user-1") == {"sid-1", "sid-2"}
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("new_expiring_set", [AsyncExpiringSet, redis_expiring_set])
+def test_expiring_set(new_expiring_set, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(utils, "time", SimpleNamespace(time=lambda: now[0]))
+
+    async def run():
+        expiring_set = new_expiring_set(60)
+        await expiring_set.touch("user-1")
+        now[0] += 30
+        await expiring_set.touch("user-2")
+        assert sorted(await expiring_set.members()) == ["user-1", "user-2"]
+
+        # Still alive right at the timeout
+        now[0] += 30
+        assert sorted(await expiring_set.members()) == ["user-1", "user-2"]
+        assert await expiring_set.expire() == 0
+
+        now[0] += 1
+        assert await expiring_set.members() == ["user-2"]
+        assert await expiring_set.expire() == 1
+
+        # Touching again keeps it alive
+        await expiring_set.touch("user-2")
+        now[0] += 59
+        assert await expiring_set.members() == ["user-2"]
+        assert await expiring_set.expire() == 0
+        assert await expiring_set.members() == ["user-2"]
+
+    asyncio.run(run())
@@ -0,0 +1,58 @@
+from open_webui.models.knowledge import KnowledgeModel
+from open_webui.models.tools import ToolModel
+from open_webui.utils.access_control import AccessControlEvaluator
+
+NOW = 1700000000
+
+
+def knowledge(access_control, id="shared-id"):
+    return KnowledgeModel(
+        id=id,
+        user_id="owner",
+        name="Knowledge",
+        description="",
+        access_control=access_control,
+        created_at=NOW,
+        updated_at=NOW,
+    )
+
+
+def tool(access_control):
+    return ToolModel(
+        id="shared-id",
+        user_id="owner",
+        name="Tool",
+        content="",
+        specs=[],
+        meta={},
+        access_control=access_control,
+        created_at=NOW,
+        updated_at=NOW,
+    )
+
+
+def test_has_access():
+    evaluator = AccessControlEvaluator("user", ["group"])
+
+    assert evaluator.has_access("read", None)
+    assert not evaluator.has_access("write", None)
+    assert evaluator.has_access("read", {"read": {"group_ids": ["group"]}})
+    assert evaluator.has_access("read", {"read": {"user_ids": ["user"]}})
+    assert not evaluator.has_access("write", {"read": {"group_ids": ["group"]}})
+
+
+def test_filter():
+    evaluator = AccessControlEvaluator("user", ["group"])
+    resources = [
+        knowledge(None, id="public"),
+        knowledge({"write": {"group_ids": ["group"], "user_ids": []}}),
+        tool({"write": {"group_ids": [], "user_ids": ["other"]}}),
+    ]
+
+    assert evaluator.filter(resources, "read") == [resources[0]]
+    assert evaluator.filter(resources, "write") == [resources[1]]
+
+
+def test_owner_has_access():
+    evaluator = AccessControlEvaluator("owner", [])
+    assert evaluator.can_access(tool({}), "write")
@@ -0,0 +1,409 @@
+import random
+import re
+import time
+
+import pytest
+
+from open_webui.utils.content_blocks import (
+    ContentBlockSerializer,
+    ContentDeltaEncoder,
+    ContentTagParser,
+    extract_attributes,
+    serialize_content_blocks,
+)
+
+REASONING_TAGS = [
+    ("think", "/think"),
+    ("thinking", "/thinking"),
+    ("reason", "/reason"),
+    ("reasoning", "/reasoning"),
+    ("thought", "/thought"),
+    ("Thought", "/Thought"),
+    ("|begin_of_thought|", "|end_of_thought|"),
+]
+CODE_INTERPRETER_TAGS = [("code_interpreter", "/code_interpreter")]
+SOLUTION_TAGS = [("|begin_of_solution|", "|end_of_solution|")]
+
+# Model outputs as they were streamed, to be replayed in chunks
+CORPUS = [
+    "Plain answer without any tags, but with a < b and x<y comparisons.",
+    "<think>\nThe user asks for 2 + 2. That is 4.\n</think>\n\nThe answer is **4**.",
+    "<think>\nFirst thought.\n</think>\n\nHere is the first part.\n\n<think>\nA second, longer thought about <details> and <b>tags</b>.\n</think>\n\nAnd the rest.",
+    "<thinking>Considering the options carefully here.</thinking>Option B is better.",
+    "<reasoning>Step one. Step two. Step three.</reasoning>\n\nDone.",
+    "<Thought>Capitalised thought tag content here.</Thought> Result follows.",
+    "<|begin_of_thought|>\n\nLet me work through this slowly.\n\n<|end_of_thought|>\n\n<|begin_of_solution|>\n\nThe solution is 42.\n\n<|end_of_solution|>",
+    '<think type="planning" effort="high">\nPlanning the reply in detail.\n</think>\nReply text.',
+    "Some intro text, then <think about this> is not a tag\nbecause of the newline, and <thinker> neither.",
+    "<think>\n\n</think>\n\nAn empty reasoning section is dropped.",
+    'Let me compute it.\n<code_interpreter type="code" lang="python">\nprint(sum(range(10)))\n</code_interpreter>',
+    '<code_interpreter type="code" lang="python">\nimport math\nprint(math.pi)\n</code_interpreter> trailing text is dropped',
+    "Use `<div>` and `</think>`-free markup: <span>ok</span> <th>head</th> <|some|> <thin",
+    "<think>Unclosed reasoning that never ends because the stream was cut",
+    "Before reasoning. <think>\nOne.\n</think>\n\nBetween.   <think>\nTwo.\n</think>\n\nAfter.",
+    '<think>\nMentions the `</thinking>` tag literally.\n</think>\n\nText <thi nking> and <think\nwrapped="1">\ninside\n</think> end',
+]
+
+
+def legacy_tag_content_handler(content_type, tags, content, content_blocks):
+    """The regex handler that rescanned the accumulated content on every delta."""
+    end_flag = False
+
+    if content_blocks[-1]["type"] == "text":
+        for start_tag, end_tag in tags:
+            start_tag_pattern = rf"<{re.escape(start_tag)}(\s.*?)?>"
+            match = re.search(start_tag_pattern, content)
+            if match:
+                attr_content = match.group(1) if match.group(1) else ""
+                attributes = extract_attributes(attr_content)
+
+                before_tag = content[: match.start()]
+                after_tag = content[match.end() :]
+
+                content_blocks[-1]["content"] = content_blocks[-1]["content"].replace(
+                    match.group(0) + after_tag, ""
+                )
+
+                if before_tag:
+                    content_blocks[-1]["content"] = before_tag
+
+                if not content_blocks[-1]["content"]:
+                    content_blocks.pop()
+
+                content_blocks.append(
+                    {
+                        "type": content_type,
+                        "start_tag": start_tag,
+                        "end_tag": end_tag,
+                        "attributes": attributes,
+                        "content": "",
+                        "started_at": time.time(),
+                    }
+                )
+
+                if after_tag:
+                    content_blocks[-1]["content"] = after_tag
+                    legacy_tag_content_handler(
+                        content_type, tags, after_tag, content_blocks
+                    )
+
+                break
+    elif content_blocks[-1]["type"] == content_type:
+        start_tag = content_blocks[-1]["start_tag"]
+        end_tag = content_blocks[-1]["end_tag"]
+        end_tag_pattern = rf"<{re.escape(end_tag)}>"
+
+        if re.search(end_tag_pattern, content):
+            end_flag = True
+
+            block_content = content_blocks[-1]["content"]
+            start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
+            block_content = re.sub(start_tag_pattern, "", block_content).strip()
+
+            end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
+            split_content = end_tag_regex.split(block_content, maxsplit=1)
+
+            block_content = split_content[0].strip() if split_content else ""
+            leftover_content = (
+                split_content[1].strip() if len(split_content) > 1 else ""
+            )
+
+            if block_content:
+                content_blocks[-1]["content"] = block_content
+                content_blocks[-1]["ended_at"] = time.time()
+                content_blocks[-1]["duration"] = int(
+                    content_blocks[-1]["ended_at"] - content_blocks[-1]["started_at"]
+                )
+
+                if content_type != "code_interpreter":
+                    content_blocks.append({"type": "text", "content": leftover_content})
+            else:
+                content_blocks.pop()
+                content_blocks.append({"type": "text", "content": leftover_content})
+
+            content = re.sub(
+                rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
+                "",
+                content,
+                flags=re.DOTALL,
+            )
+
+    return content, content_blocks, end_flag
+
+
+def replay_legacy(chunks):
+    content = ""
+    content_blocks = [{"type": "text", "content": ""}]
+    for value in chunks:
+        content = f"{content}{value}"
+        content_blocks[-1]["content"] += value
+
+        content, content_blocks, _ = legacy_tag_content_handler(
+            "reasoning", REASONING_TAGS, content, content_blocks
+        )
+        content, content_blocks, end = legacy_tag_content_handler(
+            "code_interpreter", CODE_INTERPRETER_TAGS, content, content_blocks
+        )
+        if end:
+            break
+        content, content_blocks, _ = legacy_tag_content_handler(
+            "solution", SOLUTION_TAGS, content, content_blocks
+        )
+    return content_blocks
+
+
+def replay(chunks):
+    tag_parser = ContentTagParser()
+    content_blocks = [{"type": "text", "content": ""}]
+    for value in chunks:
+        tag_parser.append(value)
+        content_blocks[-1]["content"] += value
+
+        tag_parser.parse("reasoning", REASONING_TAGS, content_blocks)
+        if tag_parser.parse("code_interpreter", CODE_INTERPRETER_TAGS, content_blocks):
+            break
+        tag_parser.parse("solution", SOLUTION_TAGS, content_blocks)
+    return content_blocks
+
+
+def split_into_chunks(text, seed):
+    rng = random.Random(seed)
+    chunks = []
+    while text:
+        size = rng.randint(1, 8)
+        chunks.append(text[:size])
+        text = text[size:]
+    return chunks
+
+
+@pytest.mark.parametrize("text", CORPUS)
+@pytest.mark.parametrize("seed", range(20))
+def test_tag_parser_matches_legacy_handler(text, seed):
+    chunks = split_into_chunks(text, seed)
+
+    expected = replay_legacy(chunks)
+    content_blocks = replay(chunks)
+
+    assert [block["type"] for block in content_blocks] == [
+        block["type"] for block in expected
+    ]
+    for raw in (False, True):
+        assert serialize_content_blocks(
+            content_blocks, raw=raw
+        ) == serialize_content_blocks(expected, raw=raw)
+
+
+def test_tag_parser_parses_attributes():
+    content_blocks = replay(
+        [
+            '<code_interpreter type="code" ',
+            'lang="python">\nprint(1)\n',
+            "</code_",
+            "interpreter>",
+        ]
+    )
+
+    assert content_blocks[-1]["type"] == "code_interpreter"
+    assert content_blocks[-1]["attributes"] == {"type": "code", "lang": "python"}
+    assert content_blocks[-1]["content"] == "print(1)"
+
+
+def test_tag_parser_closes_section_within_one_delta():
+    content_blocks = replay(["<think>a</think>b", "c", "d"])
+
+    assert [block["type"] for block in content_blocks] == ["reasoning", "text"]
+    assert content_blocks[-1]["content"] == "bcd"
+
+
+def test_tag_parser_only_scans_new_content():
+    tag_parser = ContentTagParser()
+    content_blocks = [{"type": "text", "content": ""}]
+
+    for value in ["Some text ", "with a <", "thi", "nk", ">"]:
+        tag_parser.append(value)
+        content_blocks[-1]["content"] += value
+        tag_parser.parse("reasoning", REASONING_TAGS, content_blocks)
+
+        if content_blocks[-1]["type"] == "text":
+            # Everything before a possible start tag has been consumed
+            position = tag_parser.positions["reasoning"]
+            assert tag_parser.content[position:] in ("", "<", "<thi", "<think")
+
+    assert [block["type"] for block in content_blocks] == ["text", "reasoning"]
+
+
+def stream_blocks():
+    """Content blocks of a response as the middleware builds them, one delta at a time."""
+    content_blocks = [{"type": "text", "content": ""}]
+    for value in ["Let me ", "check."]:
+        content_blocks[-1]["content"] += value
+        yield content_blocks
+
+    content_blocks.append(
+        {"type": "reasoning", "start_tag": "think", "end_tag": "/think", "content": ""}
+    )
+    yield content_blocks
+    for value in ["Thinking ", "about > it\n", "more"]:
+        content_blocks[-1]["content"] += value
+        yield content_blocks
+    content_blocks[-1]["duration"] = 2
+    yield content_blocks
+
+    content_blocks.append(
+        {"type": "code_interpreter", "attributes": {"lang": "python"}, "content": ""}
+    )
+    for value in ["print(", "1)"]:
+        content_blocks[-1]["content"] += value
+        yield content_blocks
+    content_blocks[-1]["output"] = {"stdout": "1"}
+    yield content_blocks
+
+    content_blocks.append({"type": "text", "content": ""})
+    for value in ["It ", "prints ", "1."]:
+        content_blocks[-1]["content"] += value
+        yield content_blocks
+
+
+@pytest.mark.parametrize("raw", [False, True])
+def test_serializer_matches_serialize_content_blocks(raw):
+    serializer = ContentBlockSerializer(raw=raw)
+
+    for content_blocks in stream_blocks():
+        assert serializer.serialize(content_blocks) == serialize_content_blocks(
+            content_blocks, raw=raw
+        )
+
+
+def test_serializer_after_last_block_is_mutated_in_place():
+    serializer = ContentBlockSerializer()
+    content_blocks = [
+        {"type": "text", "content": "Before"},
+        {"type": "code_interpreter", "attributes": {}, "content": "print(1)"},
+    ]
+    assert serializer.serialize(content_blocks) == serialize_content_blocks(
+        content_blocks
+    )
+
+    content_blocks[-1]["output"] = {"stdout": "1"}
+    content_blocks[-1]["attributes"]["lang"] = "python"
+    assert serializer.serialize(content_blocks) == serialize_content_blocks(
+        content_blocks
+    )
+    assert 'done="true"' in serializer.serialize(content_blocks)
+
+
+def test_serializer_after_block_is_appended():
+    serializer = ContentBlockSerializer()
+    content_blocks = [{"type": "text", "content": "First"}]
+    serializer.serialize(content_blocks)
+
+    for block in [
+        {"type": "reasoning", "start_tag": "think", "end_tag": "/think", "content": ""},
+        {"type": "text", "content": "Second"},
+        {"type": "text", "content": "Third"},
+    ]:
+        content_blocks.append(block)
+        assert serializer.serialize(content_blocks) == serialize_content_blocks(
+            content_blocks
+        )
+
+
+def test_serializer_after_block_is_replaced():
+    serializer = ContentBlockSerializer()
+    content_blocks = [
+        {"type": "text", "content": "First"},
+        {"type": "text", "content": "Second"},
+        {"type": "text", "content": "Third"},
+    ]
+    serializer.serialize(content_blocks)
+
+    # A finished block replaced by a new object
+    content_blocks[0] = {"type": "text", "content": "Replaced"}
+    assert serializer.serialize(content_blocks) == serialize_content_blocks(
+        content_blocks
+    )
+
+    # The open tail block replaced
+    content_blocks[-1] = {"type": "text", "content": "Last"}
+    assert serializer.serialize(content_blocks) == serialize_content_blocks(
+        content_blocks
+    )
+
+    # The list replaced, with fewer blocks
+    content_blocks = [{"type": "text", "content": "Only"}]
+    assert serializer.serialize(content_blocks) == "Only"
+    assert serializer.serialize([]) == ""
+
+
+def apply_payload(content, payload):
+    """What a client does with a payload, `content.slice(0, offset) + delta.content`."""
+    if "delta" not in payload:
+        return payload["content"]
+
+    delta = payload["delta"]
+    prefix = content.encode("utf-16-le")[: delta["offset"] * 2].decode("utf-16-le")
+    return prefix + delta["content"]
+
+
+def test_delta_encoder_offsets_in_utf16_code_units():
+    encoder = ContentDeltaEncoder(snapshot_interval=0)
+
+    assert encoder.encode("Hi 👋") == {"content": "Hi 👋"}
+    # The emoji is a surrogate pair, two code units
+    assert encoder.encode("Hi 👋 there") == {
+        "delta": {"offset": 5, "content": " there"}
+    }
+    assert encoder.encode("Hi 👋 👍🏽 there") == {
+        "delta": {"offset": 6, "content": "👍🏽 there"}
+    }
+    # Replacing text after the emojis
+    assert encoder.encode("Hi 👋 👍🏽 é") == {"delta": {"offset": 11, "content": "é"}}
+    assert encoder.encode("Hi") == {"delta": {"offset": 2, "content": ""}}
+
+
+def test_delta_encoder_snapshots_every_interval():
+    encoder = ContentDeltaEncoder(snapshot_interval=3)
+    payloads = [encoder.encode("a" * i) for i in range(1, 8)]
+
+    assert ["delta" not in payload for payload in payloads] == [
+        True,
+        False,
+        False,
+        True,
+        False,
+        False,
+        True,
+    ]
+    assert payloads[3] == {"content": "aaaa"}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_delta_encoder_client_stays_in_sync(seed):
+    rng = random.Random(seed)
+    encoder = ContentDeltaEncoder(snapshot_interval=4)
+    content = ""
+    client = ""
+
+    for _ in range(100):
+        # Mostly appends, sometimes a rewrite of the tail as when a block closes
+        if content and rng.random() < 0.2:
+            content = content[: rng.randrange(len(content))]
+        content += "".join(rng.choice("ab <>👋é\n") for _ in range(rng.randint(1, 5)))
+
+        client = apply_payload(client, encoder.encode(content))
+        assert client == content
+
+
+def test_delta_encoder_resyncs_a_client_after_a_snapshot():
+    encoder = ContentDeltaEncoder(snapshot_interval=3)
+    client = apply_payload("", encoder.encode("Hello"))
+
+    # The client misses a payload and goes out of sync
+    encoder.encode("Hello 👋")
+    client = apply_payload(client, encoder.encode("Hello 👋 world"))
+    assert client != "Hello 👋 world"
+
+    client = apply_payload(client, encoder.encode("Hello 👋 world!"))
+    assert client == "Hello 👋 world!"
+    client = apply_payload(client, encoder.encode("Hello 👋 world!!"))
+    assert client == "Hello 👋 world!!"
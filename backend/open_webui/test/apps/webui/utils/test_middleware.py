@@ -0,0 +1,142 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.constants import TASKS
+from open_webui.utils import middleware
+from open_webui.utils.middleware import (
+    combine_background_tasks,
+    get_combined_background_tasks,
+)
+
+ALL_TASKS = [
+    TASKS.FOLLOW_UP_GENERATION,
+    TASKS.TITLE_GENERATION,
+    TASKS.TAGS_GENERATION,
+]
+
+
+def get_config(**kwargs):
+    return SimpleNamespace(
+        **{
+            "ENABLE_COMBINED_BACKGROUND_TASKS": True,
+            "ENABLE_FOLLOW_UP_GENERATION": True,
+            "ENABLE_TITLE_GENERATION": True,
+            "ENABLE_TAGS_GENERATION": True,
+            "FOLLOW_UP_GENERATION_PROMPT_TEMPLATE": "",
+            "TITLE_GENERATION_PROMPT_TEMPLATE": "",
+            "TAGS_GENERATION_PROMPT_TEMPLATE": "",
+            **kwargs,
+        }
+    )
+
+
+def test_combined_tasks():
+    assert get_combined_background_tasks(get_config(), ALL_TASKS) == ALL_TASKS
+    assert get_combined_background_tasks(
+        get_config(), [TASKS.TITLE_GENERATION, TASKS.TAGS_GENERATION]
+    ) == [TASKS.TITLE_GENERATION, TASKS.TAGS_GENERATION]
+
+    assert (
+        get_combined_background_tasks(
+            get_config(ENABLE_COMBINED_BACKGROUND_TASKS=False), ALL_TASKS
+        )
+        == []
+    )
+    assert get_combined_background_tasks(get_config(), [TASKS.TITLE_GENERATION]) == []
+    assert (
+        get_combined_background_tasks(
+            get_config(ENABLE_TAGS_GENERATION=False, ENABLE_TITLE_GENERATION=False),
+            ALL_TASKS,
+        )
+        == []
+    )
+
+
+def test_tasks_with_a_custom_template_are_not_combined():
+    config = get_config(TITLE_GENERATION_PROMPT_TEMPLATE="Title for: {{MESSAGES}}")
+    assert get_combined_background_tasks(config, ALL_TASKS) == [
+        TASKS.FOLLOW_UP_GENERATION,
+        TASKS.TAGS_GENERATION,
+    ]
+
+    config = get_config(
+        TITLE_GENERATION_PROMPT_TEMPLATE="Title",
+        TAGS_GENERATION_PROMPT_TEMPLATE="Tags",
+    )
+    assert get_combined_background_tasks(config, ALL_TASKS) == []
+
+
+def completion(content):
+    return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+
+def run_background_tasks(monkeypatch, config, answer):
+    """Runs the handlers the way `process_chat_response` does, returns what was called."""
+    calls = []
+
+    async def generate_background_tasks(request, form_data, user):
+        calls.append("combined")
+        return completion(answer)
+
+    monkeypatch.setattr(
+        middleware, "generate_background_tasks", generate_background_tasks
+    )
+
+    def separate(task):
+        async def handler():
+            calls.append(f"separate {task}")
+
+        return handler
+
+    def setter(task):
+        async def handler(result):
+            calls.append(f"set {task} {result}")
+
+        return handler
+
+    async def run():
+        task_handlers = {task: separate(task) for task in ALL_TASKS}
+        await combine_background_tasks(
+            SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(config=config))),
+            {"model": "model", "messages": []},
+            None,
+            task_handlers,
+            {task: setter(task) for task in ALL_TASKS},
+        )
+        await asyncio.gather(*[handler() for handler in task_handlers.values()])
+
+    asyncio.run(run())
+    return calls
+
+
+def test_combined_answer_is_set_for_each_task(monkeypatch):
+    calls = run_background_tasks(
+        monkeypatch,
+        get_config(TAGS_GENERATION_PROMPT_TEMPLATE="Tags"),
+        'Here you go: {"title": "Hello", "tags": [], "follow_ups": ["Why?"]}',
+    )
+
+    result = {"title": "Hello", "tags": [], "follow_ups": ["Why?"]}
+    assert calls == [
+        "combined",
+        f"set {TASKS.FOLLOW_UP_GENERATION} {result}",
+        f"set {TASKS.TITLE_GENERATION} {result}",
+        f"separate {TASKS.TAGS_GENERATION}",
+    ]
+
+
+@pytest.mark.parametrize("answer", ["Not JSON at all", '{"title": "Hel', '["title"]'])
+def test_unparsed_combined_answer_falls_back_to_separate_calls(monkeypatch, answer):
+    calls = run_background_tasks(monkeypatch, get_config(), answer)
+
+    assert calls == ["combined"] + [f"separate {task}" for task in ALL_TASKS]
+
+
+def test_no_combined_call_when_disabled(monkeypatch):
+    calls = run_background_tasks(
+        monkeypatch, get_config(ENABLE_COMBINED_BACKGROUND_TASKS=False), "{}"
+    )
+
+    assert calls == [f"separate {task}" for task in ALL_TASKS]
@@ -0,0 +1,153 @@
+"""
+Benchmark for the chat list queries used by the sidebar, the archive and the folders.
+
+Fills a throw-away SQLite database with users that have a few thousand chats each
+and compares loading the lists through the full `ChatModel` (chat document and
+history messages of every row, as before) with the projection queries returning
+`LazyChatModel`.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_chat_list [--users N] [--chats N] [--messages N] [--repeat N]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+# The database is created on import, point it somewhere disposable first
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="bench_chat_list_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.environ['DATA_DIR']}/webui.db"
+
+from sqlalchemy import or_  # noqa: E402
+
+import open_webui.config  # noqa: E402, runs the migrations
+from open_webui.internal.db import get_db  # noqa: E402
+from open_webui.models.chats import Chat, ChatMessage, Chats  # noqa: E402
+
+
+def populate(users: int, chats: int, messages: int) -> tuple[list[str], str]:
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    folder_id = str(uuid.uuid4())
+    now = int(time.time())
+
+    with get_db() as db:
+        for user_id in user_ids:
+            for i in range(chats):
+                chat_id = str(uuid.uuid4())
+                db.add(
+                    Chat(
+                        id=chat_id,
+                        user_id=user_id,
+                        title=f"Chat {i}",
+                        chat={
+                            "title": f"Chat {i}",
+                            "models": ["model"],
+                            "history": {"currentId": f"{chat_id}-{messages - 1}"},
+                        },
+                        created_at=now - i,
+                        updated_at=now - i,
+                        archived=i % 10 == 0,
+                        pinned=False,
+                        meta={},
+                        folder_id=folder_id if i % 5 == 0 else None,
+                    )
+                )
+                db.add_all(
+                    ChatMessage(
+                        chat_id=chat_id,
+                        id=f"{chat_id}-{j}",
+                        parent_id=f"{chat_id}-{j - 1}" if j else None,
+                        data={
+                            "id": f"{chat_id}-{j}",
+                            "role": "user" if j % 2 == 0 else "assistant",
+                            "content": "lorem ipsum dolor sit amet " * 40,
+                        },
+                        created_at=now - i,
+                        updated_at=now - i,
+                    )
+                    for j in range(messages)
+                )
+            db.commit()
+
+    return user_ids, folder_id
+
+
+def legacy_chat_list(user_id: str, skip: int = 0, limit: int = 50):
+    with get_db() as db:
+        query = (
+            db.query(Chat)
+            .filter_by(user_id=user_id, archived=False)
+            .order_by(Chat.updated_at.desc())
+        )
+        if skip:
+            query = query.offset(skip)
+        if limit:
+            query = query.limit(limit)
+        return Chats._to_chat_models(db, query.all())
+
+
+def legacy_folder_chats(user_id: str, folder_id: str):
+    with get_db() as db:
+        query = (
+            db.query(Chat)
+            .filter_by(folder_id=folder_id, user_id=user_id, archived=False)
+            .filter(or_(Chat.pinned == False, Chat.pinned == None))
+            .order_by(Chat.updated_at.desc())
+        )
+        return Chats._to_chat_models(db, query.all())
+
+
+def measure(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=2)
+    parser.add_argument("--chats", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    user_ids, folder_id = populate(args.users, args.chats, args.messages)
+    user_id = user_ids[0]
+
+    scenarios = [
+        (
+            "first page",
+            lambda: legacy_chat_list(user_id, limit=60),
+            lambda: Chats.get_chat_list_by_user_id(user_id, limit=60),
+        ),
+        (
+            "all chats",
+            lambda: legacy_chat_list(user_id, limit=None),
+            lambda: Chats.get_chat_list_by_user_id(user_id, limit=None),
+        ),
+        (
+            "folder",
+            lambda: legacy_folder_chats(user_id, folder_id),
+            lambda: Chats.get_chats_by_folder_id_and_user_id(folder_id, user_id),
+        ),
+    ]
+
+    print(
+        f"{args.users} users x {args.chats} chats x {args.messages} messages "
+        f"({os.environ['DATA_DIR']})"
+    )
+    for label, full, projection in scenarios:
+        full_time = measure(full, args.repeat)
+        projection_time = measure(projection, args.repeat)
+        print(
+            f"{label:>12}: full {full_time * 1000:9.1f} ms, "
+            f"projection {projection_time * 1000:9.1f} ms "
+            f"({full_time / projection_time:5.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark for the event loop lag caused by database queries in async code.
+
+Fills a throw-away SQLite database with chats and runs a number of concurrent
+"streams" that each send `message` events the way `__event_emitter__` handles them
+(read the message, append to it, write it back), once through the synchronous table
+methods and once through their async variants. A ticker measures how late the event
+loop runs a task scheduled every few milliseconds meanwhile, which is how long every
+other request and stream of the worker was stalled.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_event_loop_lag [--streams N] [--events N] [--messages N]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+# The database is created on import, point it somewhere disposable first
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="bench_event_loop_lag_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.environ['DATA_DIR']}/webui.db"
+
+import open_webui.config  # noqa: E402, runs the migrations
+from open_webui.internal.db import async_engine, get_db  # noqa: E402
+from open_webui.models.chats import Chat, ChatMessage, Chats  # noqa: E402
+
+TICK_INTERVAL = 0.005
+
+
+def populate(streams: int, messages: int) -> list[str]:
+    chat_ids = [str(uuid.uuid4()) for _ in range(streams)]
+    now = int(time.time())
+
+    with get_db() as db:
+        for chat_id in chat_ids:
+            db.add(
+                Chat(
+                    id=chat_id,
+                    user_id="user",
+                    title="Chat",
+                    chat={"title": "Chat", "history": {"currentId": "0"}},
+                    created_at=now,
+                    updated_at=now,
+                    archived=False,
+                    meta={},
+                )
+            )
+            db.add_all(
+                ChatMessage(
+                    chat_id=chat_id,
+                    id=str(i),
+                    data={"id": str(i), "content": "lorem ipsum dolor sit amet " * 40},
+                    created_at=now,
+                    updated_at=now,
+                )
+                for i in range(messages)
+            )
+        db.commit()
+
+    return chat_ids
+
+
+async def sync_stream(chat_id: str, events: int):
+    for _ in range(events):
+        message = Chats.get_message_by_id_and_message_id(chat_id, "0")
+        Chats.upsert_message_to_chat_by_id_and_message_id(
+            chat_id, "0", {"content": message.get("content", "") + "x"}
+        )
+        await asyncio.sleep(0)
+
+
+async def async_stream(chat_id: str, events: int):
+    for _ in range(events):
+        message = await Chats.get_message_by_id_and_message_id_async(chat_id, "0")
+        await Chats.upsert_message_to_chat_by_id_and_message_id_async(
+            chat_id, "0", {"content": message.get("content", "") + "x"}
+        )
+
+
+async def measure(stream, chat_ids: list[str], events: int) -> tuple[float, list]:
+    loop = asyncio.get_running_loop()
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = loop.time()
+            await asyncio.sleep(TICK_INTERVAL)
+            lags.append(max(0.0, loop.time() - start - TICK_INTERVAL) * 1000)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(stream(chat_id, events) for chat_id in chat_ids))
+    elapsed = time.perf_counter() - start
+
+    done.set()
+    await ticker_task
+    return elapsed, lags
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=50)
+    args = parser.parse_args()
+
+    chat_ids = populate(args.streams, args.messages)
+
+    print(
+        f"{args.streams} streams x {args.events} events, {args.messages} messages per chat "
+        f"({os.environ['DATA_DIR']})"
+    )
+    for label, stream in [("sync", sync_stream), ("async", async_stream)]:
+        elapsed, lags = await measure(stream, chat_ids, args.events)
+        lags = sorted(lags) or [0.0]
+        print(
+            f"{label:>6}: {elapsed:6.2f} s, loop lag "
+            f"mean {statistics.mean(lags):7.1f} ms, "
+            f"p99 {lags[min(len(lags) - 1, int(len(lags) * 0.99))]:7.1f} ms, "
+            f"max {lags[-1]:7.1f} ms ({len(lags)} ticks)"
+        )
+
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,184 @@
+"""
+Benchmark for concurrent reads and writes on SQLite.
+
+Writer threads save streamed messages the way the realtime chat save does (one upsert
+per update of a message, plus status entries) while reader threads keep loading chat
+lists, once for each SQLite profile:
+
+* default: rollback journal, as before
+* wal: DATABASE_ENABLE_SQLITE_WAL with the cache and mmap pragmas
+* wal+queue: the same with DATABASE_ENABLE_SQLITE_WRITE_QUEUE
+
+Every profile runs in its own process on its own throw-away database, since the
+settings are read on import.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_sqlite_concurrency [--writers N] [--readers N] [--updates N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+PROFILES = {
+    "default": {},
+    "wal": {
+        "DATABASE_ENABLE_SQLITE_WAL": "true",
+        "DATABASE_SQLITE_CACHE_SIZE": "-65536",
+        "DATABASE_SQLITE_MMAP_SIZE": "268435456",
+    },
+    "wal+queue": {
+        "DATABASE_ENABLE_SQLITE_WAL": "true",
+        "DATABASE_SQLITE_CACHE_SIZE": "-65536",
+        "DATABASE_SQLITE_MMAP_SIZE": "268435456",
+        "DATABASE_ENABLE_SQLITE_WRITE_QUEUE": "true",
+    },
+}
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values) or [0.0]
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run(args):
+    import open_webui.config  # noqa: F401, runs the migrations
+    from open_webui.internal.db import get_db
+    from open_webui.models.chats import Chat, ChatMessage, Chats
+
+    user_id = str(uuid.uuid4())
+    now = int(time.time())
+    chat_ids = [str(uuid.uuid4()) for _ in range(args.writers)]
+
+    with get_db() as db:
+        for i in range(args.chats):
+            chat_id = chat_ids[i] if i < len(chat_ids) else str(uuid.uuid4())
+            db.add(
+                Chat(
+                    id=chat_id,
+                    user_id=user_id,
+                    title=f"Chat {i}",
+                    chat={"title": f"Chat {i}", "history": {"currentId": "0"}},
+                    created_at=now - i,
+                    updated_at=now - i,
+                    archived=False,
+                    meta={},
+                )
+            )
+            db.add(
+                ChatMessage(
+                    chat_id=chat_id,
+                    id="0",
+                    data={"id": "0", "content": ""},
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+        db.commit()
+
+    errors = []
+    write_times = []
+    read_times = []
+    writing = threading.Event()
+    writing.set()
+
+    def writer(chat_id):
+        content = ""
+        for i in range(args.updates):
+            content += "lorem ipsum "
+            start = time.perf_counter()
+            try:
+                Chats.upsert_message_to_chat_by_id_and_message_id(
+                    chat_id, "0", {"content": content}
+                )
+                if i % 10 == 0:
+                    if not Chats.add_message_statuses(
+                        {(chat_id, "0"): [{"description": f"step {i}"}]}
+                    ):
+                        errors.append("status")
+            except Exception as e:
+                errors.append(str(e))
+            write_times.append(time.perf_counter() - start)
+
+    def reader():
+        while writing.is_set():
+            start = time.perf_counter()
+            try:
+                Chats.get_chat_list_by_user_id(user_id, limit=60)
+            except Exception as e:
+                errors.append(str(e))
+            read_times.append(time.perf_counter() - start)
+
+    readers = [threading.Thread(target=reader) for _ in range(args.readers)]
+    writers = [threading.Thread(target=writer, args=(c,)) for c in chat_ids]
+
+    start = time.perf_counter()
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    writing.clear()
+    for thread in readers:
+        thread.join()
+
+    locked = sum("locked" in error for error in errors)
+    print(
+        f"{args.run:>10}: {len(write_times) / elapsed:7.0f} writes/s, "
+        f"write p99 {percentile(write_times, 0.99) * 1000:7.1f} ms, "
+        f"{len(read_times) / elapsed:6.0f} reads/s, "
+        f"read p99 {percentile(read_times, 0.99) * 1000:7.1f} ms, "
+        f"{len(errors)} errors ({locked} locked)",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--updates", type=int, default=100)
+    parser.add_argument("--chats", type=int, default=500)
+    parser.add_argument("--run", choices=PROFILES.keys(), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        return run(args)
+
+    print(
+        f"{args.writers} writers x {args.updates} updates, {args.readers} readers, "
+        f"{args.chats} chats"
+    )
+    for profile, env in PROFILES.items():
+        data_dir = tempfile.mkdtemp(prefix="bench_sqlite_concurrency_")
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "open_webui.test.benchmarks.bench_sqlite_concurrency",
+                *sys.argv[1:],
+                "--run",
+                profile,
+            ],
+            env={
+                **os.environ,
+                **env,
+                "DATA_DIR": data_dir,
+                "DATABASE_URL": f"sqlite:///{data_dir}/webui.db",
+                "GLOBAL_LOG_LEVEL": "ERROR",
+            },
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # The migrations print to stdout as well, the result is the last line
+        print(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
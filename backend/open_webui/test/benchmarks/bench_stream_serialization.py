@@ -0,0 +1,138 @@
+"""
+Micro-benchmark for the streaming response path of `process_chat_response`.
+
+Replays a recorded SSE stream (one `data: {...}` line per chunk, as produced by an
+OpenAI compatible endpoint) through `stream_body_handler` and reports the CPU time
+spent per token, once with the full re-serialization of the content blocks on every
+delta and once with the incremental `ContentBlockSerializer`.
+
+Persistence and socket emits are replaced with no-ops so only the in-process work
+is measured.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_stream_serialization [--sse FILE] [--tokens N]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from starlette.responses import StreamingResponse
+
+from open_webui.utils import middleware
+from open_webui.utils.content_blocks import serialize_content_blocks
+
+
+class FullContentBlockSerializer:
+    """Previous behaviour: re-render every block on every delta."""
+
+    def __init__(self, raw=False):
+        self.raw = raw
+
+    def serialize(self, content_blocks):
+        return serialize_content_blocks(content_blocks, raw=self.raw)
+
+
+class NullChats:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def generate_sse_lines(tokens: int) -> list[str]:
+    """Synthetic recording: a reasoning section followed by a markdown answer."""
+    lines = []
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "\n", "`code`", "- item"]
+
+    def chunk(content):
+        payload = {"choices": [{"index": 0, "delta": {"content": content}}]}
+        return f"data: {json.dumps(payload)}\n\n"
+
+    lines.append(chunk("<think>"))
+    for i in range(tokens // 4):
+        lines.append(chunk(f"{words[i % len(words)]} "))
+    lines.append(chunk("</think>"))
+    for i in range(tokens - tokens // 4):
+        lines.append(chunk(f"{words[i % len(words)]} "))
+    lines.append("data: [DONE]\n\n")
+    return lines
+
+
+def load_sse_lines(path: str) -> list[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line for line in f.read().splitlines(keepends=True) if line.strip()]
+
+
+async def replay(lines: list[str], serializer_cls) -> float:
+    async def body_iterator():
+        for line in lines:
+            yield line.encode("utf-8")
+
+    response = StreamingResponse(body_iterator(), media_type="text/event-stream")
+    request = SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(WEBUI_NAME="Open WebUI", config=SimpleNamespace())
+        )
+    )
+    metadata = {
+        "chat_id": "chat",
+        "message_id": "message",
+        "session_id": "session",
+        "features": {},
+    }
+
+    async def event_emitter(event):
+        pass
+
+    async def run_task(request, coroutine, id=None):
+        await coroutine
+        return "task", None
+
+    with mock.patch.multiple(
+        middleware,
+        Chats=NullChats(),
+        ContentBlockSerializer=serializer_cls,
+        get_event_emitter=lambda *args, **kwargs: event_emitter,
+        get_event_call=lambda *args, **kwargs: event_emitter,
+        get_sorted_filter_ids=lambda *args, **kwargs: [],
+        get_active_status_by_user_id=mock.AsyncMock(return_value=True),
+        create_task=run_task,
+    ):
+        start = time.process_time()
+        await middleware.process_chat_response(
+            request,
+            response,
+            {"model": "model", "messages": []},
+            SimpleNamespace(id="user", model_dump=lambda: {}),
+            metadata,
+            {"id": "model"},
+            [],
+            {},
+        )
+        return time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sse", help="recorded SSE stream to replay")
+    parser.add_argument("--tokens", type=int, default=4000)
+    args = parser.parse_args()
+
+    lines = load_sse_lines(args.sse) if args.sse else generate_sse_lines(args.tokens)
+    tokens = sum(1 for line in lines if line.startswith("data:"))
+
+    for label, serializer_cls in [
+        ("full", FullContentBlockSerializer),
+        ("incremental", middleware.ContentBlockSerializer),
+    ]:
+        elapsed = asyncio.run(replay(lines, serializer_cls))
+        print(
+            f"{label:>12}: {elapsed * 1000:9.1f} ms total, "
+            f"{elapsed / tokens * 1_000_000:8.1f} µs/token ({tokens} tokens)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -111,12 +111,13 @@ def has_access(
     user_id: str,
     type: str = "write",
     access_control: Optional[dict] = None,
+    user_group_ids: Optional[List[str]] = None,
 ) -> bool:
     if access_control is None:
         return type == "read"
 
-    user_groups = Groups.get_groups_by_member_id(user_id)
-    user_group_ids = [group.id for group in user_groups]
+    if user_group_ids is None:
+        return get_access_control_evaluator(user_id).has_access(type, access_control)
     permission_access = access_control.get(type, {})
     permitted_group_ids = permission_access.get("group_ids", [])
     permitted_user_ids = permission_access.get("user_ids", [])
@@ -126,6 +127,48 @@ def has_access(
     )
 
 
+class AccessControlEvaluator:
+    """
+    Access checks for one user, with the principals (the user id and its group ids)
+    looked up once, so a listing doesn't query the group ids for every resource.
+
+    An evaluator is meant for one listing: group changes made by other workers aren't
+    seen, so it must not be kept around.
+    """
+
+    def __init__(self, user_id: str, group_ids: List[str]):
+        self.user_id = user_id
+        self.group_ids = frozenset(group_ids)
+
+    def has_access(self, type: str = "write", access_control: Optional[dict] = None):
+        if access_control is None:
+            return type == "read"
+
+        permission_access = access_control.get(type, {})
+        return self.user_id in permission_access.get(
+            "user_ids", []
+        ) or not self.group_ids.isdisjoint(permission_access.get("group_ids", []))
+
+    def can_access(self, resource, type: str = "write") -> bool:
+        """Whether the user owns `resource` or has `type` access to it."""
+        return resource.user_id == self.user_id or self.has_access(
+            type, resource.access_control
+        )
+
+    def filter(self, resources: list, type: str = "write") -> list:
+        return [resource for resource in resources if self.can_access(resource, type)]
+
+
+def get_access_control_evaluator(user_id: str) -> AccessControlEvaluator:
+    return AccessControlEvaluator(user_id, Groups.get_group_ids_by_member_id(user_id))
+
+
+async def get_access_control_evaluator_async(user_id: str) -> AccessControlEvaluator:
+    return AccessControlEvaluator(
+        user_id, await Groups.get_group_ids_by_member_id_async(user_id)
+    )
+
+
 # Get all users with access to a resource
 def get_users_with_access(
     type: str = "write", access_control: Optional[dict] = None
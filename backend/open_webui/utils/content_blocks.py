@@ -0,0 +1,471 @@
+import html
+import json
+import re
+import time
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def render_content_block(content, block, raw=False):
+    """
+    Append the rendering of a single content block to the already rendered content.
+
+    Returns the new (unstripped) content. Rendering a block only ever depends on the
+    content rendered before it, which is what allows the prefix to be cached.
+    """
+    if block["type"] == "text":
+        content = f"{content}{block['content'].strip()}\n"
+    elif block["type"] == "tool_calls":
+        tool_calls = block.get("content", [])
+        results = block.get("results", [])
+
+        if results:
+
+            tool_calls_display_content = ""
+            for tool_call in tool_calls:
+
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_result = None
+                tool_result_files = None
+                for result in results:
+                    if tool_call_id == result.get("tool_call_id", ""):
+                        tool_result = result.get("content", None)
+                        tool_result_files = result.get("files", None)
+                        break
+
+                if tool_result:
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
+                else:
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+            if not raw:
+                content = f"{content}\n{tool_calls_display_content}\n\n"
+        else:
+            tool_calls_display_content = ""
+
+            for tool_call in tool_calls:
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+            if not raw:
+                content = f"{content}\n{tool_calls_display_content}\n\n"
+
+    elif block["type"] == "reasoning":
+        reasoning_display_content = "\n".join(
+            (f"> {line}" if not line.startswith(">") else line)
+            for line in block["content"].splitlines()
+        )
+
+        reasoning_duration = block.get("duration", None)
+
+        if reasoning_duration is not None:
+            if raw:
+                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+            else:
+                content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+            else:
+                content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+    elif block["type"] == "code_interpreter":
+        attributes = block.get("attributes", {})
+        output = block.get("output", None)
+        lang = attributes.get("lang", "")
+
+        content_stripped, original_whitespace = split_content_and_whitespace(content)
+        if is_opening_code_block(content_stripped):
+            # Remove trailing backticks that would open a new block
+            content = content_stripped.rstrip("`").rstrip() + original_whitespace
+        else:
+            # Keep content as is - either closing backticks or no backticks
+            content = content_stripped + original_whitespace
+
+        if output:
+            output = html.escape(json.dumps(output))
+
+            if raw:
+                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+            else:
+                content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+            else:
+                content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+    else:
+        block_content = str(block["content"]).strip()
+        content = f"{content}{block['type']}: {block_content}\n"
+
+    return content
+
+
+def serialize_content_blocks(content_blocks, raw=False):
+    content = ""
+
+    for block in content_blocks:
+        content = render_content_block(content, block, raw)
+
+    return content.strip()
+
+
+class ContentBlockSerializer:
+    """
+    Incremental equivalent of `serialize_content_blocks` for a growing list of blocks.
+
+    While streaming, only the last block of `content_blocks` is still being written to;
+    every block before it is finished. The rendering of the finished blocks is kept as a
+    prefix and only the open tail block is rendered again on each call, instead of the
+    whole response on every delta.
+
+    Finished blocks are tracked by identity. If the list no longer starts with the cached
+    blocks (e.g. a block was popped or the list was replaced), the prefix is rebuilt.
+    """
+
+    def __init__(self, raw=False):
+        self.raw = raw
+        self.reset()
+
+    def reset(self):
+        self._blocks = []
+        self._prefix = ""
+
+    def _is_valid_for(self, content_blocks):
+        if len(content_blocks) <= len(self._blocks):
+            return False
+
+        return all(
+            cached is block for cached, block in zip(self._blocks, content_blocks)
+        )
+
+    def serialize(self, content_blocks):
+        if not content_blocks:
+            return ""
+
+        if self._blocks and not self._is_valid_for(content_blocks):
+            self.reset()
+
+        # Advance the prefix over blocks that have been closed since the last call
+        for block in content_blocks[len(self._blocks) : -1]:
+            self._prefix = render_content_block(self._prefix, block, self.raw)
+            self._blocks.append(block)
+
+        return render_content_block(self._prefix, content_blocks[-1], self.raw).strip()
+
+
+def get_common_prefix_length(a, b):
+    if b.startswith(a):
+        return len(a)
+
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def get_utf16_length(content):
+    return len(content.encode("utf-16-le")) // 2
+
+
+class ContentDeltaEncoder:
+    """
+    Turns successive renderings of a message into `chat:completion` event payloads that
+    only carry what changed.
+
+    A delta payload holds the offset at which the previously sent content stops matching
+    and the text that replaces everything after it. Offsets are counted in UTF-16 code
+    units so clients can apply them with `content.slice(0, offset) + delta.content`.
+    The first payload, and then every `snapshot_interval` payloads, carries the full
+    content instead, in the same shape as a regular event, so clients can resync.
+    """
+
+    def __init__(self, snapshot_interval=50):
+        self.snapshot_interval = snapshot_interval
+        self.content = ""
+        self.content_length = 0  # in UTF-16 code units
+        self.count = 0
+
+    def encode(self, content):
+        offset = get_common_prefix_length(self.content, content)
+        offset_length = self.content_length - get_utf16_length(self.content[offset:])
+        appended = content[offset:]
+
+        self.content = content
+        self.content_length = offset_length + get_utf16_length(appended)
+
+        is_snapshot = self.count == 0 or (
+            self.snapshot_interval > 0 and self.count % self.snapshot_interval == 0
+        )
+        self.count += 1
+
+        if is_snapshot:
+            return {"content": content}
+        return {"delta": {"offset": offset_length, "content": appended}}
+
+
+def extract_attributes(tag_content):
+    """Extract attributes from a tag if they exist."""
+    attributes = {}
+    if not tag_content:  # Ensure tag_content is not None
+        return attributes
+    # Match attributes in the format: key="value" (ignores single quotes for simplicity)
+    matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
+    for key, value in matches:
+        attributes[key] = value
+    return attributes
+
+
+class ContentTagParser:
+    """
+    Streaming detection of `<start_tag ...>...<end_tag>` sections (reasoning, code
+    interpreter, solution) in the content of a response.
+
+    Gives the same results as searching the whole accumulated content with regexes
+    after every delta, which is what it replaces, but keeps a scan position per content
+    type between calls, so only the text appended since the previous call (plus a start
+    tag that may still be incomplete) is searched. The accumulated content is kept as
+    chunks and only joined when a section starts or ends.
+    """
+
+    def __init__(self, content=""):
+        self.chunks = [content] if content else []
+        self.length = len(content)
+
+        self.tags = {}
+        self.positions = {}
+        self.sections = {}
+
+    @property
+    def content(self):
+        """The accumulated content without the sections that have been closed."""
+        return self._get_content()
+
+    def append(self, value):
+        self.chunks.append(value)
+        self.length += len(value)
+
+    def _get_content(self, start=0):
+        # Only join the chunks that hold content[start:]
+        size, index = 0, len(self.chunks)
+        while index > 0 and self.length - size > start:
+            index -= 1
+            size += len(self.chunks[index])
+
+        content = "".join(self.chunks[index:])
+        if index == 0:
+            self.chunks = [content] if content else []
+        return content[start - (self.length - size) :]
+
+    def _get_tags(self, content_type, tags):
+        if content_type not in self.tags:
+            self.tags[content_type] = [
+                (
+                    start_tag,
+                    end_tag,
+                    re.compile(rf"<{re.escape(start_tag)}(\s.*?)?>"),
+                )
+                for start_tag, end_tag in tags
+            ]
+        return self.tags[content_type]
+
+    def _get_partial_start_tag_index(self, tags, content):
+        # Index of the first `<` that may still become a start tag
+        index = content.find("<")
+        while index != -1:
+            rest = content[index + 1 :]
+            for start_tag, _, _ in tags:
+                if start_tag.startswith(rest):
+                    return index
+
+                if rest.startswith(start_tag):
+                    attributes = rest[len(start_tag) :]
+                    # Attributes may not span lines, see the start tag pattern
+                    if not attributes or (
+                        attributes[0].isspace() and "\n" not in attributes[1:]
+                    ):
+                        return index
+            index = content.find("<", index + 1)
+        return len(content)
+
+    def _remove_sections(self, pattern):
+        content = self._get_content()
+        spans = [match.span() for match in pattern.finditer(content)]
+        if not spans:
+            return
+
+        def get_position(position):
+            removed = 0
+            for start, end in spans:
+                if position <= start:
+                    break
+                if position < end:
+                    return start - removed
+                removed += end - start
+            return position - removed
+
+        parts, offset = [], 0
+        for start, end in spans:
+            parts.append(content[offset:start])
+            offset = end
+        parts.append(content[offset:])
+
+        content = "".join(parts)
+        self.chunks = [content] if content else []
+        self.length = len(content)
+
+        self.positions = {
+            key: get_position(position) for key, position in self.positions.items()
+        }
+        for section in self.sections.values():
+            section["position"] = get_position(section["position"])
+
+    def _parse_text(self, content_type, tags, content_blocks):
+        position = self.positions.get(content_type, 0)
+        content = self._get_content(position)
+
+        for start_tag, end_tag, start_tag_pattern in tags:
+            match = start_tag_pattern.search(content)
+            if match:
+                break
+        else:
+            self.positions[content_type] = position + (
+                self._get_partial_start_tag_index(tags, content)
+            )
+            return False
+
+        # Capture everything before and after the matched tag
+        before_tag = self._get_content()[: position + match.start()]
+        after_tag = content[match.end() :]
+
+        # Remove the start tag and after from the currently handling text block
+        content_blocks[-1]["content"] = content_blocks[-1]["content"].replace(
+            match.group(0) + after_tag, ""
+        )
+
+        if before_tag:
+            content_blocks[-1]["content"] = before_tag
+
+        if not content_blocks[-1]["content"]:
+            content_blocks.pop()
+
+        content_blocks.append(
+            {
+                "type": content_type,
+                "start_tag": start_tag,
+                "end_tag": end_tag,
+                "attributes": extract_attributes(match.group(1) or ""),
+                "content": after_tag,
+                "started_at": time.time(),
+            }
+        )
+
+        self.positions[content_type] = position + match.end()
+        self.sections[content_type] = {
+            # Where to resume looking for start tags once the section is closed
+            "position": position,
+            # The end tag is looked for in all of the content, not only the section
+            "closed": f"<{end_tag}>" in before_tag,
+        }
+
+        if after_tag:
+            # Only the text after the start tag is searched for the end tag here
+            return self._parse_section(content_type, content_blocks, resume=False)
+        return False
+
+    def _parse_section(self, content_type, content_blocks, resume=True):
+        section = self.sections[content_type]
+        start_tag = content_blocks[-1]["start_tag"]
+        end_tag = content_blocks[-1]["end_tag"]
+        end_tag_pattern = rf"<{re.escape(end_tag)}>"
+
+        if not (resume and section["closed"]):
+            position = self.positions[content_type]
+            if resume:
+                # The end tag may have been cut off at the end of the previous delta
+                position = max(position - len(end_tag) - 1, 0)
+
+            if f"<{end_tag}>" not in self._get_content(position):
+                self.positions[content_type] = self.length
+                return False
+
+        del self.sections[content_type]
+
+        block_content = content_blocks[-1]["content"]
+        # Strip start and end tags from the content
+        start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
+        block_content = re.sub(start_tag_pattern, "", block_content).strip()
+
+        end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
+        split_content = end_tag_regex.split(block_content, maxsplit=1)
+
+        # Content inside the tag
+        block_content = split_content[0].strip() if split_content else ""
+
+        # Leftover content (everything after `</tag>`)
+        leftover_content = split_content[1].strip() if len(split_content) > 1 else ""
+
+        if block_content:
+            content_blocks[-1]["content"] = block_content
+            content_blocks[-1]["ended_at"] = time.time()
+            content_blocks[-1]["duration"] = int(
+                content_blocks[-1]["ended_at"] - content_blocks[-1]["started_at"]
+            )
+
+            # Reset the content_blocks by appending a new text block
+            if content_type != "code_interpreter":
+                content_blocks.append({"type": "text", "content": leftover_content})
+        else:
+            # Remove the block if content is empty
+            content_blocks.pop()
+            content_blocks.append({"type": "text", "content": leftover_content})
+
+        # Clean processed content
+        self.positions[content_type] = section["position"]
+        self._remove_sections(
+            re.compile(
+                rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
+                re.DOTALL,
+            )
+        )
+        return True
+
+    def parse(self, content_type, tags, content_blocks):
+        """
+        Look for sections of `content_type` in what was appended since the previous
+        call, updating `content_blocks` in place.
+
+        Returns True when a section was closed by its end tag.
+        """
+        if content_blocks[-1]["type"] == "text":
+            return self._parse_text(
+                content_type, self._get_tags(content_type, tags), content_blocks
+            )
+        elif (
+            content_blocks[-1]["type"] == content_type and content_type in self.sections
+        ):
+            return self._parse_section(content_type, content_blocks)
+        return False
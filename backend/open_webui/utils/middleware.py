@@ -13,6 +13,7 @@ import html
 import inspect
 import re
 import ast
+import functools
 
 from uuid import uuid4
 from concurrent.futures import ThreadPoolExecutor
@@ -22,19 +23,21 @@ from fastapi import Request, HTTPException
 from starlette.responses import Response, StreamingResponse
 
 
-from open_webui.models.chats import Chats
+from open_webui.models.chats import Chats, ChatMessageBuffer
 from open_webui.models.users import Users
 from open_webui.socket.main import (
     get_event_call,
     get_event_emitter,
     get_active_status_by_user_id,
 )
+from open_webui.socket.utils import ChatCompletionEventBuffer
 from open_webui.routers.tasks import (
     generate_queries,
     generate_title,
     generate_follow_ups,
     generate_image_prompt,
     generate_chat_tags,
+    generate_background_tasks,
 )
 from open_webui.routers.retrieval import process_web_search, SearchForm
 from open_webui.routers.images import (
@@ -82,10 +85,17 @@ from open_webui.utils.filter import (
     process_filter_functions,
 )
 from open_webui.utils.code_interpreter import execute_code_jupyter
+from open_webui.utils.content_blocks import (
+    ContentBlockSerializer,
+    ContentDeltaEncoder,
+    ContentTagParser,
+    serialize_content_blocks,
+)
 
 from open_webui.tasks import create_task
 
 from open_webui.config import (
+    get_config_snapshot,
     CACHE_DIR,
     DEFAULT_TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE,
     DEFAULT_CODE_INTERPRETER_PROMPT,
@@ -95,6 +105,9 @@ from open_webui.env import (
     GLOBAL_LOG_LEVEL,
     BYPASS_MODEL_ACCESS_CONTROL,
     ENABLE_REALTIME_CHAT_SAVE,
+    CHAT_STREAM_DELTA_SNAPSHOT_INTERVAL,
+    CHAT_STREAM_EMIT_INTERVAL,
+    CHAT_STREAM_EMIT_MAX_UPDATES,
 )
 from open_webui.constants import TASKS
 
@@ -604,6 +617,7 @@ async def chat_image_generation_handler(
 async def chat_completion_files_handler(
     request: Request, body: dict, user: UserModel
 ) -> tuple[dict, dict[str, list]]:
+    config = get_config_snapshot(request)
     sources = []
 
     if files := body.get("metadata", {}).get("files", None):
@@ -652,13 +666,13 @@ async def chat_completion_files_handler(
                         embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
                             query, prefix=prefix, user=user
                         ),
-                        k=request.app.state.config.TOP_K,
+                        k=config.TOP_K,
                         reranking_function=request.app.state.rf,
-                        k_reranker=request.app.state.config.TOP_K_RERANKER,
-                        r=request.app.state.config.RELEVANCE_THRESHOLD,
-                        hybrid_bm25_weight=request.app.state.config.HYBRID_BM25_WEIGHT,
-                        hybrid_search=request.app.state.config.ENABLE_RAG_HYBRID_SEARCH,
-                        full_context=request.app.state.config.RAG_FULL_CONTEXT,
+                        k_reranker=config.TOP_K_RERANKER,
+                        r=config.RELEVANCE_THRESHOLD,
+                        hybrid_bm25_weight=config.HYBRID_BM25_WEIGHT,
+                        hybrid_search=config.ENABLE_RAG_HYBRID_SEARCH,
+                        full_context=config.RAG_FULL_CONTEXT,
                     ),
                 )
         except Exception as e:
@@ -1002,6 +1016,77 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     return form_data, metadata, events
 
 
+def get_task_content(res) -> Optional[str]:
+    if not (res and isinstance(res, dict)):
+        return None
+
+    if len(res.get("choices", [])) == 1:
+        content = res.get("choices", [])[0].get("message", {}).get("content", "")
+    else:
+        content = ""
+    return content[content.find("{") : content.rfind("}") + 1]
+
+
+def parse_task_content(content: Optional[str]) -> Optional[dict]:
+    try:
+        return json.loads(content)
+    except Exception:
+        return None
+
+
+def get_combined_background_tasks(config, tasks) -> list[str]:
+    """
+    The tasks among `tasks` to generate with one task model call: the enabled ones
+    without a custom prompt template, which the combined prompt wouldn't follow, when
+    there are at least two of them.
+    """
+    if not config.ENABLE_COMBINED_BACKGROUND_TASKS:
+        return []
+
+    combinable = {
+        TASKS.FOLLOW_UP_GENERATION: (
+            config.ENABLE_FOLLOW_UP_GENERATION,
+            config.FOLLOW_UP_GENERATION_PROMPT_TEMPLATE,
+        ),
+        TASKS.TITLE_GENERATION: (
+            config.ENABLE_TITLE_GENERATION,
+            config.TITLE_GENERATION_PROMPT_TEMPLATE,
+        ),
+        TASKS.TAGS_GENERATION: (
+            config.ENABLE_TAGS_GENERATION,
+            config.TAGS_GENERATION_PROMPT_TEMPLATE,
+        ),
+    }
+    combined_tasks = [
+        task
+        for task, (enabled, template) in combinable.items()
+        if task in tasks and enabled and not template
+    ]
+    return combined_tasks if len(combined_tasks) > 1 else []
+
+
+async def combine_background_tasks(request, form_data, user, task_handlers, setters):
+    """
+    Replace the handlers of the tasks that can be combined by their setter, called
+    with the answer of one task model call for all of them. The handlers are kept,
+    one call per task, when that answer can't be parsed.
+    """
+    combined_tasks = get_combined_background_tasks(
+        request.app.state.config, task_handlers
+    )
+    if not combined_tasks:
+        return
+
+    res = await generate_background_tasks(request, form_data, user)
+    result = parse_task_content(get_task_content(res))
+    if not isinstance(result, dict):
+        log.debug("Combined background tasks answer not parsed, running them apart")
+        return
+
+    for task in combined_tasks:
+        task_handlers[task] = functools.partial(setters[task], result)
+
+
 async def process_chat_response(
     request, response, form_data, user, metadata, model, events, tasks
 ):
@@ -1044,162 +1129,132 @@ async def process_chat_response(
                 )
 
             if tasks and messages:
-                if (
-                    TASKS.FOLLOW_UP_GENERATION in tasks
-                    and tasks[TASKS.FOLLOW_UP_GENERATION]
-                ):
-                    res = await generate_follow_ups(
-                        request,
+                task_form_data = {
+                    "model": message["model"],
+                    "messages": messages,
+                    "chat_id": metadata["chat_id"],
+                }
+
+                user_message = get_last_user_message(messages)
+                if user_message and len(user_message) > 100:
+                    user_message = user_message[:100] + "..."
+
+                async def set_follow_ups(follow_ups):
+                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                        metadata["chat_id"],
+                        metadata["message_id"],
                         {
-                            "model": message["model"],
-                            "messages": messages,
-                            "message_id": metadata["message_id"],
-                            "chat_id": metadata["chat_id"],
+                            "followUps": follow_ups,
                         },
-                        user,
                     )
 
-                    if res and isinstance(res, dict):
-                        if len(res.get("choices", [])) == 1:
-                            follow_ups_string = (
-                                res.get("choices", [])[0]
-                                .get("message", {})
-                                .get("content", "")
-                            )
-                        else:
-                            follow_ups_string = ""
-
-                        follow_ups_string = follow_ups_string[
-                            follow_ups_string.find("{") : follow_ups_string.rfind("}")
-                            + 1
-                        ]
-
-                        try:
-                            follow_ups = json.loads(follow_ups_string).get(
-                                "follow_ups", []
-                            )
+                    await event_emitter(
+                        {
+                            "type": "chat:message:follow_ups",
+                            "data": {
+                                "follow_ups": follow_ups,
+                            },
+                        }
+                    )
 
-                            Chats.upsert_message_to_chat_by_id_and_message_id(
-                                metadata["chat_id"],
-                                metadata["message_id"],
-                                {
-                                    "followUps": follow_ups,
-                                },
-                            )
+                async def set_title(title):
+                    if not title:
+                        title = messages[0].get("content", user_message)
 
-                            await event_emitter(
-                                {
-                                    "type": "chat:message:follow_ups",
-                                    "data": {
-                                        "follow_ups": follow_ups,
-                                    },
-                                }
-                            )
-                        except Exception as e:
-                            pass
+                    Chats.update_chat_title_by_id(metadata["chat_id"], title)
 
-                if TASKS.TITLE_GENERATION in tasks:
-                    user_message = get_last_user_message(messages)
-                    if user_message and len(user_message) > 100:
-                        user_message = user_message[:100] + "..."
+                    await event_emitter(
+                        {
+                            "type": "chat:title",
+                            "data": title,
+                        }
+                    )
 
-                    if tasks[TASKS.TITLE_GENERATION]:
+                async def set_tags(tags):
+                    Chats.update_chat_tags_by_id(metadata["chat_id"], tags, user)
 
-                        res = await generate_title(
-                            request,
-                            {
-                                "model": message["model"],
-                                "messages": messages,
-                                "chat_id": metadata["chat_id"],
-                            },
-                            user,
-                        )
+                    await event_emitter(
+                        {
+                            "type": "chat:tags",
+                            "data": tags,
+                        }
+                    )
 
-                        if res and isinstance(res, dict):
-                            if len(res.get("choices", [])) == 1:
-                                title_string = (
-                                    res.get("choices", [])[0]
-                                    .get("message", {})
-                                    .get(
-                                        "content", message.get("content", user_message)
-                                    )
-                                )
-                            else:
-                                title_string = ""
+                async def follow_ups_task():
+                    res = await generate_follow_ups(
+                        request,
+                        {**task_form_data, "message_id": metadata["message_id"]},
+                        user,
+                    )
 
-                            title_string = title_string[
-                                title_string.find("{") : title_string.rfind("}") + 1
-                            ]
+                    result = parse_task_content(get_task_content(res))
+                    if result is not None:
+                        await set_follow_ups(result.get("follow_ups", []))
 
-                            try:
-                                title = json.loads(title_string).get(
-                                    "title", user_message
-                                )
-                            except Exception as e:
-                                title = ""
+                async def title_task():
+                    res = await generate_title(request, task_form_data, user)
 
-                            if not title:
-                                title = messages[0].get("content", user_message)
+                    content = get_task_content(res)
+                    if content is not None:
+                        result = parse_task_content(content)
+                        await set_title(
+                            result.get("title", user_message)
+                            if result is not None
+                            else ""
+                        )
 
-                            Chats.update_chat_title_by_id(metadata["chat_id"], title)
+                async def tags_task():
+                    res = await generate_chat_tags(request, task_form_data, user)
 
-                            await event_emitter(
-                                {
-                                    "type": "chat:title",
-                                    "data": title,
-                                }
-                            )
-                    elif len(messages) == 2:
-                        title = messages[0].get("content", user_message)
+                    result = parse_task_content(get_task_content(res))
+                    if result is not None:
+                        await set_tags(result.get("tags", []))
 
-                        Chats.update_chat_title_by_id(metadata["chat_id"], title)
+                task_handlers = {}
+                if tasks.get(TASKS.FOLLOW_UP_GENERATION):
+                    task_handlers[TASKS.FOLLOW_UP_GENERATION] = follow_ups_task
+                if tasks.get(TASKS.TITLE_GENERATION):
+                    task_handlers[TASKS.TITLE_GENERATION] = title_task
+                elif TASKS.TITLE_GENERATION in tasks and len(messages) == 2:
+                    title = messages[0].get("content", user_message)
 
-                        await event_emitter(
-                            {
-                                "type": "chat:title",
-                                "data": message.get("content", user_message),
-                            }
-                        )
+                    Chats.update_chat_title_by_id(metadata["chat_id"], title)
 
-                if TASKS.TAGS_GENERATION in tasks and tasks[TASKS.TAGS_GENERATION]:
-                    res = await generate_chat_tags(
-                        request,
+                    await event_emitter(
                         {
-                            "model": message["model"],
-                            "messages": messages,
-                            "chat_id": metadata["chat_id"],
-                        },
-                        user,
+                            "type": "chat:title",
+                            "data": message.get("content", user_message),
+                        }
                     )
+                if tasks.get(TASKS.TAGS_GENERATION):
+                    task_handlers[TASKS.TAGS_GENERATION] = tags_task
+
+                await combine_background_tasks(
+                    request,
+                    {**task_form_data, "message_id": metadata["message_id"]},
+                    user,
+                    task_handlers,
+                    {
+                        TASKS.FOLLOW_UP_GENERATION: lambda result: set_follow_ups(
+                            result.get("follow_ups", [])
+                        ),
+                        TASKS.TITLE_GENERATION: lambda result: set_title(
+                            result.get("title", user_message)
+                        ),
+                        TASKS.TAGS_GENERATION: lambda result: set_tags(
+                            result.get("tags", [])
+                        ),
+                    },
+                )
 
-                    if res and isinstance(res, dict):
-                        if len(res.get("choices", [])) == 1:
-                            tags_string = (
-                                res.get("choices", [])[0]
-                                .get("message", {})
-                                .get("content", "")
-                            )
-                        else:
-                            tags_string = ""
-
-                        tags_string = tags_string[
-                            tags_string.find("{") : tags_string.rfind("}") + 1
-                        ]
-
-                        try:
-                            tags = json.loads(tags_string).get("tags", [])
-                            Chats.update_chat_tags_by_id(
-                                metadata["chat_id"], tags, user
-                            )
-
-                            await event_emitter(
-                                {
-                                    "type": "chat:tags",
-                                    "data": tags,
-                                }
-                            )
-                        except Exception as e:
-                            pass
+                # The tasks are independent of each other, run them concurrently
+                results = await asyncio.gather(
+                    *[handler() for handler in task_handlers.values()],
+                    return_exceptions=True,
+                )
+                for task, result in zip(task_handlers, results):
+                    if isinstance(result, Exception):
+                        log.error(f"Error in background task {task}: {result}")
 
     event_emitter = None
     event_caller = None
@@ -1273,7 +1328,7 @@ async def process_chat_response(
                     )
 
                     # Send a webhook notification if the user is not active
-                    if not get_active_status_by_user_id(user.id):
+                    if not await get_active_status_by_user_id(user.id):
                         webhook_url = Users.get_user_webhook_url_by_id(user.id)
                         if webhook_url:
                             post_webhook(
@@ -1355,134 +1410,31 @@ async def process_chat_response(
             },
         )
 
-        def split_content_and_whitespace(content):
-            content_stripped = content.rstrip()
-            original_whitespace = (
-                content[len(content_stripped) :]
-                if len(content) > len(content_stripped)
-                else ""
-            )
-            return content_stripped, original_whitespace
-
-        def is_opening_code_block(content):
-            backtick_segments = content.split("```")
-            # Even number of segments means the last backticks are opening a new block
-            return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
-
         # Handle as a background task
         async def post_response_handler(response, events):
-            def serialize_content_blocks(content_blocks, raw=False):
-                content = ""
-
-                for block in content_blocks:
-                    if block["type"] == "text":
-                        content = f"{content}{block['content'].strip()}\n"
-                    elif block["type"] == "tool_calls":
-                        attributes = block.get("attributes", {})
-
-                        tool_calls = block.get("content", [])
-                        results = block.get("results", [])
-
-                        if results:
-
-                            tool_calls_display_content = ""
-                            for tool_call in tool_calls:
-
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_result = None
-                                tool_result_files = None
-                                for result in results:
-                                    if tool_call_id == result.get("tool_call_id", ""):
-                                        tool_result = result.get("content", None)
-                                        tool_result_files = result.get("files", None)
-                                        break
-
-                                if tool_result:
-                                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
-                                else:
-                                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
-
-                            if not raw:
-                                content = f"{content}\n{tool_calls_display_content}\n\n"
-                        else:
-                            tool_calls_display_content = ""
-
-                            for tool_call in tool_calls:
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
-
-                            if not raw:
-                                content = f"{content}\n{tool_calls_display_content}\n\n"
-
-                    elif block["type"] == "reasoning":
-                        reasoning_display_content = "\n".join(
-                            (f"> {line}" if not line.startswith(">") else line)
-                            for line in block["content"].splitlines()
-                        )
-
-                        reasoning_duration = block.get("duration", None)
-
-                        if reasoning_duration is not None:
-                            if raw:
-                                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
-                            else:
-                                content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
-                            else:
-                                content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
-
-                    elif block["type"] == "code_interpreter":
-                        attributes = block.get("attributes", {})
-                        output = block.get("output", None)
-                        lang = attributes.get("lang", "")
-
-                        content_stripped, original_whitespace = (
-                            split_content_and_whitespace(content)
-                        )
-                        if is_opening_code_block(content_stripped):
-                            # Remove trailing backticks that would open a new block
-                            content = (
-                                content_stripped.rstrip("`").rstrip()
-                                + original_whitespace
-                            )
-                        else:
-                            # Keep content as is - either closing backticks or no backticks
-                            content = content_stripped + original_whitespace
-
-                        if output:
-                            output = html.escape(json.dumps(output))
-
-                            if raw:
-                                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
-                            else:
-                                content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
-                            else:
-                                content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-
-                    else:
-                        block_content = str(block["content"]).strip()
-                        content = f"{content}{block['type']}: {block_content}\n"
+            # Renders only the open tail block on each delta, see ContentBlockSerializer
+            content_serializer = ContentBlockSerializer()
+
+            # Clients that opt in receive only the changed part of the content
+            content_delta_encoder = (
+                ContentDeltaEncoder(CHAT_STREAM_DELTA_SNAPSHOT_INTERVAL)
+                if metadata.get("stream_delta", False)
+                else None
+            )
 
-                return content.strip()
+            def get_content_event_data(content_blocks):
+                content = content_serializer.serialize(content_blocks)
+                if content_delta_encoder:
+                    return content_delta_encoder.encode(content)
+                return {"content": content}
+
+            # Coalesces content updates into one emit per time window
+            stream_event_emitter = ChatCompletionEventBuffer(
+                event_emitter,
+                lambda: get_content_event_data(content_blocks),
+                interval=CHAT_STREAM_EMIT_INTERVAL,
+                max_updates=CHAT_STREAM_EMIT_MAX_UPDATES,
+            )
 
             def convert_content_blocks_to_messages(content_blocks):
                 messages = []
@@ -1524,156 +1476,6 @@ async def process_chat_response(
 
                 return messages
 
-            def tag_content_handler(content_type, tags, content, content_blocks):
-                end_flag = False
-
-                def extract_attributes(tag_content):
-                    """Extract attributes from a tag if they exist."""
-                    attributes = {}
-                    if not tag_content:  # Ensure tag_content is not None
-                        return attributes
-                    # Match attributes in the format: key="value" (ignores single quotes for simplicity)
-                    matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
-                    for key, value in matches:
-                        attributes[key] = value
-                    return attributes
-
-                if content_blocks[-1]["type"] == "text":
-                    for start_tag, end_tag in tags:
-                        # Match start tag e.g., <tag> or <tag attr="value">
-                        start_tag_pattern = rf"<{re.escape(start_tag)}(\s.*?)?>"
-                        match = re.search(start_tag_pattern, content)
-                        if match:
-                            attr_content = (
-                                match.group(1) if match.group(1) else ""
-                            )  # Ensure it's not None
-                            attributes = extract_attributes(
-                                attr_content
-                            )  # Extract attributes safely
-
-                            # Capture everything before and after the matched tag
-                            before_tag = content[
-                                : match.start()
-                            ]  # Content before opening tag
-                            after_tag = content[
-                                match.end() :
-                            ]  # Content after opening tag
-
-                            # Remove the start tag and after from the currently handling text block
-                            content_blocks[-1]["content"] = content_blocks[-1][
-                                "content"
-                            ].replace(match.group(0) + after_tag, "")
-
-                            if before_tag:
-                                content_blocks[-1]["content"] = before_tag
-
-                            if not content_blocks[-1]["content"]:
-                                content_blocks.pop()
-
-                            # Append the new block
-                            content_blocks.append(
-                                {
-                                    "type": content_type,
-                                    "start_tag": start_tag,
-                                    "end_tag": end_tag,
-                                    "attributes": attributes,
-                                    "content": "",
-                                    "started_at": time.time(),
-                                }
-                            )
-
-                            if after_tag:
-                                content_blocks[-1]["content"] = after_tag
-                                tag_content_handler(
-                                    content_type, tags, after_tag, content_blocks
-                                )
-
-                            break
-                elif content_blocks[-1]["type"] == content_type:
-                    start_tag = content_blocks[-1]["start_tag"]
-                    end_tag = content_blocks[-1]["end_tag"]
-                    # Match end tag e.g., </tag>
-                    end_tag_pattern = rf"<{re.escape(end_tag)}>"
-
-                    # Check if the content has the end tag
-                    if re.search(end_tag_pattern, content):
-                        end_flag = True
-
-                        block_content = content_blocks[-1]["content"]
-                        # Strip start and end tags from the content
-                        start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
-                        block_content = re.sub(
-                            start_tag_pattern, "", block_content
-                        ).strip()
-
-                        end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
-                        split_content = end_tag_regex.split(block_content, maxsplit=1)
-
-                        # Content inside the tag
-                        block_content = (
-                            split_content[0].strip() if split_content else ""
-                        )
-
-                        # Leftover content (everything after `</tag>`)
-                        leftover_content = (
-                            split_content[1].strip() if len(split_content) > 1 else ""
-                        )
-
-                        if block_content:
-                            content_blocks[-1]["content"] = block_content
-                            content_blocks[-1]["ended_at"] = time.time()
-                            content_blocks[-1]["duration"] = int(
-                                content_blocks[-1]["ended_at"]
-                                - content_blocks[-1]["started_at"]
-                            )
-
-                            # Reset the content_blocks by appending a new text block
-                            if content_type != "code_interpreter":
-                                if leftover_content:
-
-                                    content_blocks.append(
-                                        {
-                                            "type": "text",
-                                            "content": leftover_content,
-                                        }
-                                    )
-                                else:
-                                    content_blocks.append(
-                                        {
-                                            "type": "text",
-                                            "content": "",
-                                        }
-                                    )
-
-                        else:
-                            # Remove the block if content is empty
-                            content_blocks.pop()
-
-                            if leftover_content:
-                                content_blocks.append(
-                                    {
-                                        "type": "text",
-                                        "content": leftover_content,
-                                    }
-                                )
-                            else:
-                                content_blocks.append(
-                                    {
-                                        "type": "text",
-                                        "content": "",
-                                    }
-                                )
-
-                        # Clean processed content
-                        content = re.sub(
-                            rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
-                            "",
-                            content,
-                            flags=re.DOTALL,
-                        )
-
-                return content, content_blocks, end_flag
-
             message = Chats.get_message_by_id_and_message_id(
                 metadata["chat_id"], metadata["message_id"]
             )
@@ -1723,6 +1525,8 @@ async def process_chat_response(
 
             solution_tags = [("|begin_of_solution|", "|end_of_solution|")]
 
+            tag_parser = ContentTagParser(content)
+
             try:
                 for event in events:
                     await event_emitter(
@@ -1733,7 +1537,7 @@ async def process_chat_response(
                     )
 
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -1742,7 +1546,6 @@ async def process_chat_response(
                     )
 
                 async def stream_body_handler(response):
-                    nonlocal content
                     nonlocal content_blocks
 
                     response_tool_calls = []
@@ -1762,6 +1565,8 @@ async def process_chat_response(
                         # Remove the prefix
                         data = data[len("data:") :].strip()
 
+                        content_updated = False
+
                         try:
                             data = json.loads(data)
 
@@ -1775,11 +1580,13 @@ async def process_chat_response(
 
                             if data:
                                 if "event" in data:
-                                    await event_emitter(data.get("event", {}))
+                                    await stream_event_emitter.emit(
+                                        data.get("event", {})
+                                    )
 
                                 if "selected_model_id" in data:
                                     model_id = data["selected_model_id"]
-                                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                                         metadata["chat_id"],
                                         metadata["message_id"],
                                         {
@@ -1791,7 +1598,7 @@ async def process_chat_response(
                                     if not choices:
                                         error = data.get("error", {})
                                         if error:
-                                            await event_emitter(
+                                            await stream_event_emitter.emit(
                                                 {
                                                     "type": "chat:completion",
                                                     "data": {
@@ -1801,7 +1608,7 @@ async def process_chat_response(
                                             )
                                         usage = data.get("usage", {})
                                         if usage:
-                                            await event_emitter(
+                                            await stream_event_emitter.emit(
                                                 {
                                                     "type": "chat:completion",
                                                     "data": {
@@ -1899,12 +1706,7 @@ async def process_chat_response(
                                             reasoning_block = content_blocks[-1]
 
                                         reasoning_block["content"] += reasoning_content
-
-                                        data = {
-                                            "content": serialize_content_blocks(
-                                                content_blocks
-                                            )
-                                        }
+                                        content_updated = True
 
                                     if value:
                                         if (
@@ -1930,7 +1732,7 @@ async def process_chat_response(
                                                 }
                                             )
 
-                                        content = f"{content}{value}"
+                                        tag_parser.append(value)
                                         if not content_blocks:
                                             content_blocks.append(
                                                 {
@@ -1944,62 +1746,52 @@ async def process_chat_response(
                                         )
 
                                         if DETECT_REASONING:
-                                            content, content_blocks, _ = (
-                                                tag_content_handler(
-                                                    "reasoning",
-                                                    reasoning_tags,
-                                                    content,
-                                                    content_blocks,
-                                                )
+                                            tag_parser.parse(
+                                                "reasoning",
+                                                reasoning_tags,
+                                                content_blocks,
                                             )
 
                                         if DETECT_CODE_INTERPRETER:
-                                            content, content_blocks, end = (
-                                                tag_content_handler(
-                                                    "code_interpreter",
-                                                    code_interpreter_tags,
-                                                    content,
-                                                    content_blocks,
-                                                )
+                                            end = tag_parser.parse(
+                                                "code_interpreter",
+                                                code_interpreter_tags,
+                                                content_blocks,
                                             )
 
                                             if end:
                                                 break
 
                                         if DETECT_SOLUTION:
-                                            content, content_blocks, _ = (
-                                                tag_content_handler(
-                                                    "solution",
-                                                    solution_tags,
-                                                    content,
-                                                    content_blocks,
-                                                )
+                                            tag_parser.parse(
+                                                "solution",
+                                                solution_tags,
+                                                content_blocks,
                                             )
 
                                         if ENABLE_REALTIME_CHAT_SAVE:
-                                            # Save message in the database
-                                            Chats.upsert_message_to_chat_by_id_and_message_id(
+                                            # Save message in the database (write-behind)
+                                            await ChatMessageBuffer.upsert_message(
                                                 metadata["chat_id"],
                                                 metadata["message_id"],
                                                 {
-                                                    "content": serialize_content_blocks(
+                                                    "content": content_serializer.serialize(
                                                         content_blocks
                                                     ),
                                                 },
                                             )
                                         else:
-                                            data = {
-                                                "content": serialize_content_blocks(
-                                                    content_blocks
-                                                ),
-                                            }
+                                            content_updated = True
 
-                                await event_emitter(
-                                    {
-                                        "type": "chat:completion",
-                                        "data": data,
-                                    }
-                                )
+                                if content_updated:
+                                    await stream_event_emitter.update()
+                                else:
+                                    await stream_event_emitter.emit(
+                                        {
+                                            "type": "chat:completion",
+                                            "data": data,
+                                        }
+                                    )
                         except Exception as e:
                             done = "data: [DONE]" in line
                             if done:
@@ -2008,6 +1800,8 @@ async def process_chat_response(
                                 log.debug("Error: ", e)
                                 continue
 
+                    await stream_event_emitter.flush()
+
                     if content_blocks:
                         # Clean up the last text block
                         if content_blocks[-1]["type"] == "text":
@@ -2049,14 +1843,7 @@ async def process_chat_response(
                         }
                     )
 
-                    await event_emitter(
-                        {
-                            "type": "chat:completion",
-                            "data": {
-                                "content": serialize_content_blocks(content_blocks),
-                            },
-                        }
-                    )
+                    await stream_event_emitter.update(flush=True)
 
                     tools = metadata.get("tools", {})
 
@@ -2171,14 +1958,7 @@ async def process_chat_response(
                         }
                     )
 
-                    await event_emitter(
-                        {
-                            "type": "chat:completion",
-                            "data": {
-                                "content": serialize_content_blocks(content_blocks),
-                            },
-                        }
-                    )
+                    await stream_event_emitter.update(flush=True)
 
                     try:
                         res = await generate_chat_completion(
@@ -2211,14 +1991,7 @@ async def process_chat_response(
                         content_blocks[-1]["type"] == "code_interpreter"
                         and retries < MAX_RETRIES
                     ):
-                        await event_emitter(
-                            {
-                                "type": "chat:completion",
-                                "data": {
-                                    "content": serialize_content_blocks(content_blocks),
-                                },
-                            }
-                        )
+                        await stream_event_emitter.update(flush=True)
 
                         retries += 1
                         log.debug(f"Attempt count: {retries}")
@@ -2333,14 +2106,7 @@ async def process_chat_response(
                             }
                         )
 
-                        await event_emitter(
-                            {
-                                "type": "chat:completion",
-                                "data": {
-                                    "content": serialize_content_blocks(content_blocks),
-                                },
-                            }
-                        )
+                        await stream_event_emitter.update(flush=True)
 
                         try:
                             res = await generate_chat_completion(
@@ -2372,24 +2138,30 @@ async def process_chat_response(
                 title = Chats.get_chat_title_by_id(metadata["chat_id"])
                 data = {
                     "done": True,
-                    "content": serialize_content_blocks(content_blocks),
+                    "content": content_serializer.serialize(content_blocks),
                     "title": title,
                 }
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
-                            "content": serialize_content_blocks(content_blocks),
+                            "content": content_serializer.serialize(content_blocks),
                         },
                     )
+                else:
+                    # Write out the updates still held by the write-behind buffer
+                    await ChatMessageBuffer.flush(
+                        metadata["chat_id"], metadata["message_id"]
+                    )
 
                 # Send a webhook notification if the user is not active
-                if not get_active_status_by_user_id(user.id):
+                if not await get_active_status_by_user_id(user.id):
                     webhook_url = Users.get_user_webhook_url_by_id(user.id)
                     if webhook_url:
+                        content = tag_parser.content
                         post_webhook(
                             request.app.state.WEBUI_NAME,
                             webhook_url,
@@ -2402,27 +2174,36 @@ async def process_chat_response(
                             },
                         )
 
-                await event_emitter(
+                await stream_event_emitter.emit(
                     {
                         "type": "chat:completion",
                         "data": data,
                     }
                 )
+                log.debug(
+                    f"Streamed {stream_event_emitter.emitted_events} content events, "
+                    f"{stream_event_emitter.coalesced_events} coalesced"
+                )
 
                 await background_tasks_handler()
             except asyncio.CancelledError:
                 log.warning("Task was cancelled!")
-                await event_emitter({"type": "task-cancelled"})
+                await stream_event_emitter.emit({"type": "task-cancelled"})
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
-                            "content": serialize_content_blocks(content_blocks),
+                            "content": content_serializer.serialize(content_blocks),
                         },
                     )
+                else:
+                    # Write out the updates still held by the write-behind buffer
+                    await ChatMessageBuffer.flush(
+                        metadata["chat_id"], metadata["message_id"]
+                    )
 
             if response.background is not None:
                 await response.background()
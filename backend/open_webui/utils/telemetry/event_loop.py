@@ -0,0 +1,44 @@
+"""Event loop lag monitor.
+
+Sleeps for a fixed interval and measures how much later than requested the loop
+woke up. Anything that blocks the loop, such as a synchronous database query in an
+`async def` route, shows up as lag and stalls every other request and stream of the
+worker for that long.
+
+Metrics collected:
+
+* event_loop.lag (histogram, milliseconds)
+
+Recorded through the global meter provider, so only exported when OpenTelemetry
+metrics are enabled. Lags above `EVENT_LOOP_LAG_WARN_THRESHOLD` are logged as well.
+"""
+
+import asyncio
+import logging
+
+from opentelemetry import metrics
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+meter = metrics.get_meter(__name__)
+event_loop_lag_histogram = meter.create_histogram(
+    name="event_loop.lag",
+    description="Delay of the event loop in running a task scheduled on time",
+    unit="ms",
+)
+
+
+async def monitor_event_loop_lag(interval: float, warn_threshold: float):
+    loop = asyncio.get_running_loop()
+
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, (loop.time() - start - interval) * 1000)
+
+        event_loop_lag_histogram.record(lag)
+        if warn_threshold and lag > warn_threshold:
+            log.warning(f"Event loop blocked for {lag:.0f} ms")